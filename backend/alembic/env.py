@@ -11,7 +11,7 @@ from app.db.session import Base
 # Import all models so Alembic can detect them
 from app.models import (  # noqa: F401
     User, TargetRace, TrainingPlan, PlannedWeek, PlannedSession,
-    Activity, WeeklyAnalysis,
+    Activity, ActivityStreamLevel, BestEffort, DailyLoad, WeeklyAnalysis,
 )
 
 config = context.config
@@ -1,31 +1,40 @@
+import hashlib
+import os
+import tempfile
 import uuid
+import zipfile
+from bisect import bisect_left, bisect_right
 from typing import Optional
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, BackgroundTasks, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Response, UploadFile, BackgroundTasks, status
 from sqlalchemy import select, desc
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import get_current_user
 from app.db.session import get_db
 from app.models.activity import Activity
+from app.models.activity_stream import ActivityStreamLevel
 from app.models.user import User
 from app.models.training_plan import SportType
-from app.schemas.activity import ActivityUploadResponse, ActivityListItem, ActivityDetail
-from app.services.parsers.fit_parser import parse_fit
-from app.services.parsers.tcx_parser import parse_tcx
-from app.services.analytics.training_metrics import (
-    calc_tss,
-    calc_trimp,
-    calc_hr_drift,
-    calc_pace_consistency,
-    calc_time_in_hr_zones,
-    calc_intensity_factor,
-    calc_variability_index,
-)
-from app.services.file_service import upload_file, generate_file_key
+from app.schemas.activity import ActivityUploadResponse, ActivityListItem, ActivityDetail, ActivityStreamResponse
+from app.schemas.job import JobResponse
+from app.core.config import settings
+from app.services.critical_power import load_power_efforts
+from app.services.ingestion import detect_format, athlete_thresholds, ingest_activity_path
+from app.services.file_service import delete_file, upload_path, generate_file_key
+from app.services.dedupe import find_by_hash, find_similar
+from app.services.activity_builder import build_activity, build_related
+from app.services.bulk_import import JOB_KIND as IMPORT_JOB_KIND, run_zip_import
+from app.services.daily_load import refresh_daily_load
+from app.services.load_risk import invalidate as invalidate_load_risk
+from app.services.jobs import create_job, get_job
+from app.services.parsers.downsample import FULL_RESOLUTION
 
 router = APIRouter()
 
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
 
 async def _run_ai_analysis(activity_id: uuid.UUID, db_url: str):
     """Background task to run AI analysis on an activity."""
@@ -37,9 +46,67 @@ async def _run_ai_analysis(activity_id: uuid.UUID, db_url: str):
         pass
 
 
+async def _spool_upload(file: UploadFile, max_bytes: int, suffix: str) -> tuple[str, str]:
+    """
+    Copy the upload to a temp file in chunks, hashing on the way.
+
+    Retorna (caminho, sha256). 413 assim que passar de max_bytes — o
+    arquivo nunca fica inteiro em memória. Quem chama remove o arquivo.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    tmp = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+    try:
+        with tmp:
+            while chunk := await file.read(SPOOL_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Arquivo maior que o limite de {max_bytes // (1024 * 1024)} MB",
+                    )
+                digest.update(chunk)
+                tmp.write(chunk)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+    return tmp.name, digest.hexdigest()
+
+
+async def _parse_new_upload(path: str, digest: str, file_format: str, user: User, db: AsyncSession):
+    """
+    Parsed dict for a new file, or the existing Activity if it is a duplicate
+    (mesmo hash antes do parse; mesmo treino em outro formato depois).
+    """
+    existing = await find_by_hash(db, user.id, digest)
+    if existing:
+        return existing
+
+    # Parse + métricas no pool de ingestão (fora do event loop), via mmap do arquivo
+    athlete = athlete_thresholds(user)
+    athlete["power_efforts"] = await load_power_efforts(db, user.id)
+    try:
+        parsed = await ingest_activity_path(path, file_format, athlete)
+    except ValueError as e:
+        # arquivo corrompido, sem atividade ou sem horário válido
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Não foi possível ler o arquivo: {e}")
+
+    existing = await find_similar(db, user.id, parsed["start_time"], parsed["total_distance_meters"])
+    return existing or parsed
+
+
+def _duplicate_response(response: Response, activity: Activity) -> ActivityUploadResponse:
+    """Existing activity, flagged as duplicate (200 instead of 201)."""
+    response.status_code = status.HTTP_200_OK
+    result = ActivityUploadResponse.model_validate(activity)
+    result.duplicate = True
+    return result
+
+
 @router.post("/upload", response_model=ActivityUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_activity(
     background_tasks: BackgroundTasks,
+    response: Response,
     file: UploadFile = File(...),
     feeling: Optional[str] = Form(None),
     perceived_effort: Optional[int] = Form(None),
@@ -48,143 +115,115 @@ async def upload_activity(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    content = await file.read()
     filename = file.filename or ""
 
-    # Parse file
-    if filename.lower().endswith(".fit"):
-        parsed = parse_fit(content)
-    elif filename.lower().endswith(".tcx"):
-        parsed = parse_tcx(content)
-    else:
+    file_format = detect_format(filename)
+    if file_format is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Formato não suportado. Use .FIT (preferencial) ou .TCX",
         )
 
-    # Upload original to storage
-    file_key = generate_file_key(str(current_user.id), filename)
-    await upload_file(content, file_key)
-
-    # Calculate TSS
-    sport = parsed["sport"]
-    tss = calc_tss(
-        sport=sport,
-        duration_s=parsed["total_timer_seconds"],
-        distance_m=parsed["total_distance_meters"],
-        avg_hr=parsed.get("avg_hr"),
-        np=parsed.get("normalized_power"),
-        ftp=current_user.ftp,
-        threshold_pace=current_user.run_threshold_pace,
-        css=current_user.css,
-        hr_max=current_user.hr_max,
-    )
+    path, digest = await _spool_upload(file, settings.MAX_UPLOAD_MB * 1024 * 1024, f".{file_format}")
+    try:
+        parsed = await _parse_new_upload(path, digest, file_format, current_user, db)
+        if isinstance(parsed, Activity):
+            return _duplicate_response(response, parsed)
 
-    # Calculate additional metrics
-    trimp = None
-    if parsed.get("avg_hr") and current_user.hr_max:
-        trimp = calc_trimp(
-            duration_s=parsed["total_timer_seconds"],
-            avg_hr=parsed["avg_hr"],
-            hr_rest=current_user.hr_rest or 60,
-            hr_max=current_user.hr_max,
+        user_id = current_user.id
+        file_key = generate_file_key(str(user_id), filename)
+        activity = build_activity(
+            user_id,
+            parsed,
+            file_key=file_key,
+            content_hash=digest,
+            perceived_effort=perceived_effort,
+            feeling=feeling,
+            athlete_notes=athlete_notes,
         )
 
-    hr_drift = calc_hr_drift(parsed.get("hr_stream") or [])
-    pace_con = calc_pace_consistency(parsed.get("pace_stream") or [])
-
-    # Time in HR zones
-    time_in_zones = None
-    hr_zone_dist = None
-    if parsed.get("hr_stream") and current_user.hr_max:
-        time_in_zones = calc_time_in_hr_zones(parsed["hr_stream"], current_user.hr_max)
-        total_time = sum(time_in_zones.values())
-        if total_time > 0:
-            hr_zone_dist = {k: round(v / total_time * 100, 1) for k, v in time_in_zones.items()}
-
-    # IF and VI
-    intensity_factor = None
-    variability_index = parsed.get("variability_index")
-    if parsed.get("normalized_power") and current_user.ftp:
-        intensity_factor = calc_intensity_factor(parsed["normalized_power"], current_user.ftp)
-
-    # Map sport string to enum
-    sport_enum = SportType(sport) if sport in [e.value for e in SportType] else SportType.RUN
-
-    activity = Activity(
-        user_id=current_user.id,
-        sport=sport_enum,
-        title=parsed["title"],
-        start_time=parsed["start_time"],
-        end_time=parsed.get("end_time"),
-        source_file=file_key,
-        source_format=parsed["source_format"],
-        total_elapsed_seconds=parsed["total_elapsed_seconds"],
-        total_timer_seconds=parsed["total_timer_seconds"],
-        total_moving_seconds=parsed.get("total_moving_seconds"),
-        total_distance_meters=parsed["total_distance_meters"],
-        avg_pace_min_km=parsed.get("avg_pace_min_km"),
-        max_pace_min_km=parsed.get("max_pace_min_km"),
-        avg_speed_kmh=parsed.get("avg_speed_kmh"),
-        max_speed_kmh=parsed.get("max_speed_kmh"),
-        avg_hr=parsed.get("avg_hr"),
-        max_hr=parsed.get("max_hr"),
-        min_hr=parsed.get("min_hr"),
-        hr_zone_distribution=hr_zone_dist,
-        time_in_zones_seconds=time_in_zones,
-        avg_cadence=parsed.get("avg_cadence"),
-        max_cadence=parsed.get("max_cadence"),
-        avg_power=parsed.get("avg_power"),
-        max_power=parsed.get("max_power"),
-        normalized_power=parsed.get("normalized_power"),
-        intensity_factor=intensity_factor,
-        variability_index=variability_index,
-        total_ascent_m=parsed.get("total_ascent_m"),
-        total_descent_m=parsed.get("total_descent_m"),
-        avg_temperature_c=parsed.get("avg_temperature_c"),
-        max_temperature_c=parsed.get("max_temperature_c"),
-        calories=parsed.get("calories"),
-        tss=tss,
-        trimp=trimp,
-        training_effect_aerobic=parsed.get("training_effect_aerobic"),
-        training_effect_anaerobic=parsed.get("training_effect_anaerobic"),
-        avg_ground_contact_time_ms=parsed.get("avg_ground_contact_time_ms"),
-        avg_stride_length_m=parsed.get("avg_stride_length_m"),
-        avg_vertical_oscillation_mm=parsed.get("avg_vertical_oscillation_mm"),
-        avg_vertical_ratio_pct=parsed.get("avg_vertical_ratio_pct"),
-        avg_ground_contact_balance_pct=parsed.get("avg_ground_contact_balance_pct"),
-        avg_stroke_rate=parsed.get("avg_stroke_rate"),
-        pool_length_m=parsed.get("pool_length_m"),
-        total_lengths=parsed.get("total_lengths"),
-        swolf=parsed.get("swolf"),
-        perceived_effort=perceived_effort,
-        feeling=feeling,
-        athlete_notes=athlete_notes,
-        hr_stream=parsed.get("hr_stream"),
-        pace_stream=parsed.get("pace_stream"),
-        power_stream=parsed.get("power_stream"),
-        cadence_stream=parsed.get("cadence_stream"),
-        altitude_stream=parsed.get("altitude_stream"),
-        gps_stream=parsed.get("gps_stream"),
-        laps_data=parsed.get("laps_data"),
-    )
+        # Link to planned session if provided
+        if planned_session_id:
+            try:
+                activity.planned_session_id = uuid.UUID(planned_session_id)
+            except ValueError:
+                pass
 
-    # Link to planned session if provided
-    if planned_session_id:
+        db.add(activity)
         try:
-            activity.planned_session_id = uuid.UUID(planned_session_id)
-        except ValueError:
-            pass
+            await db.flush()
+        except IntegrityError:
+            # Upload concorrente do mesmo arquivo ganhou a corrida
+            await db.rollback()
+            existing = await find_by_hash(db, user_id, digest)
+            if existing:
+                return _duplicate_response(response, existing)
+            raise
 
-    db.add(activity)
-    await db.commit()
+        # Pirâmide de zoom dos streams + melhores esforços
+        db.add_all(build_related(activity, parsed))
+        await db.flush()
+        # PMC: só a partir do dia da atividade
+        await refresh_daily_load(db, user_id, activity.start_time.date())
+
+        # Original no storage só com o INSERT aceito; sai de novo se o commit falhar
+        await upload_path(path, file_key)
+        try:
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            await delete_file(file_key)
+            raise
+    finally:
+        os.unlink(path)
+
+    invalidate_load_risk(user_id)
     await db.refresh(activity)
 
     # Trigger AI analysis in background
-    from app.core.config import settings
     background_tasks.add_task(_run_ai_analysis, activity.id, settings.DATABASE_URL)
 
-    return activity
+    result = ActivityUploadResponse.model_validate(activity)
+    result.invalid_timestamps = parsed.get("invalid_timestamps") or 0
+    result.malformed_trackpoints = parsed.get("malformed_trackpoints") or 0
+    return result
+
+
+@router.post("/import", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def import_activities_zip(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Importação em lote: ZIP com .FIT/.TCX (ex.: export completo do Garmin).
+
+    O ZIP vai para um arquivo temporário e é processado em background;
+    acompanhe por GET /activities/import/{job_id}. Não dispara análise de IA.
+    """
+    if not (file.filename or "").lower().endswith(".zip"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Envie um arquivo .zip")
+
+    zip_path, _ = await _spool_upload(file, settings.MAX_IMPORT_MB * 1024 * 1024, ".zip")
+
+    if not zipfile.is_zipfile(zip_path):
+        os.unlink(zip_path)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Arquivo ZIP inválido")
+
+    job = create_job(current_user.id, IMPORT_JOB_KIND)
+    background_tasks.add_task(run_zip_import, job, zip_path, current_user.id, athlete_thresholds(current_user))
+    return job.to_dict()
+
+
+@router.get("/import/{job_id}", response_model=JobResponse)
+async def get_import_status(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+):
+    job = get_job(job_id, current_user.id)
+    if not job or job.kind != IMPORT_JOB_KIND:
+        raise HTTPException(status_code=404, detail="Importação não encontrada")
+    return job.to_dict()
 
 
 @router.get("", response_model=list[ActivityListItem])
@@ -227,6 +266,96 @@ async def get_activity(
     return activity
 
 
+def _pick_level(levels: list, width: int, t_start: int, t_end: int):
+    """
+    Menor nível que ainda entrega `width` pontos na janela pedida;
+    se nenhum basta, a resolução cheia.
+    """
+    full = next((lv for lv in levels if lv.level == FULL_RESOLUTION), None)
+    for lv in sorted((lv for lv in levels if lv.level != FULL_RESOLUTION), key=lambda lv: lv.n_points):
+        span = max(lv.t_end - lv.t_start, 1)
+        window = max(min(t_end, lv.t_end) - max(t_start, lv.t_start), 0)
+        if lv.n_points * window / span >= width:
+            return lv
+    return full or max(levels, key=lambda lv: lv.n_points)
+
+
+@router.get("/{activity_id}/streams", response_model=list[ActivityStreamResponse])
+async def get_activity_streams(
+    activity_id: uuid.UUID,
+    types: Optional[str] = Query(None, description="Streams separados por vírgula (hr,pace,power,...)"),
+    width: int = Query(1000, ge=10, le=100_000, description="Pontos desejados na janela (largura do gráfico)"),
+    start: Optional[int] = Query(None, ge=0, description="Início da janela (segundos desde o início)"),
+    end: Optional[int] = Query(None, ge=0, description="Fim da janela (segundos desde o início)"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Streams no nível de zoom adequado: escolhe o menor nível pré-computado
+    que ainda cobre `width` pontos na janela [start, end] e recorta a janela.
+    """
+    owned = await db.execute(
+        select(Activity.id).where(
+            Activity.id == activity_id,
+            Activity.user_id == current_user.id,
+        )
+    )
+    if owned.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Atividade não encontrada")
+
+    # Primeiro só os metadados dos níveis; os dados apenas do escolhido
+    query = select(
+        ActivityStreamLevel.id,
+        ActivityStreamLevel.stream,
+        ActivityStreamLevel.level,
+        ActivityStreamLevel.n_points,
+        ActivityStreamLevel.t_start,
+        ActivityStreamLevel.t_end,
+    ).where(ActivityStreamLevel.activity_id == activity_id)
+    wanted = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    if wanted:
+        query = query.where(ActivityStreamLevel.stream.in_(wanted))
+    rows = (await db.execute(query)).all()
+
+    by_stream: dict[str, list] = {}
+    for row in rows:
+        by_stream.setdefault(row.stream, []).append(row)
+
+    chosen = {}
+    for name, levels in by_stream.items():
+        lo = start if start is not None else levels[0].t_start
+        hi = end if end is not None else levels[0].t_end
+        chosen[name] = _pick_level(levels, width, lo, hi)
+
+    if not chosen:
+        return []
+
+    data_rows = await db.execute(
+        select(ActivityStreamLevel.id, ActivityStreamLevel.data).where(
+            ActivityStreamLevel.id.in_([lv.id for lv in chosen.values()])
+        )
+    )
+    data_by_id = {row.id: row.data for row in data_rows}
+
+    out = []
+    for name, lv in sorted(chosen.items()):
+        data = data_by_id[lv.id]
+        if start is not None or end is not None:
+            t = data["t"]
+            i = bisect_left(t, start) if start is not None else 0
+            j = bisect_right(t, end) if end is not None else len(t)
+            data = {k: v[i:j] for k, v in data.items()}
+        out.append(ActivityStreamResponse(
+            stream=name,
+            level=lv.level,
+            n_points=len(data["t"]),
+            t_start=lv.t_start,
+            t_end=lv.t_end,
+            data=data,
+        ))
+    return out
+
+
 @router.delete("/{activity_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_activity(
     activity_id: uuid.UUID,
@@ -243,5 +372,9 @@ async def delete_activity(
     if not activity:
         raise HTTPException(status_code=404, detail="Atividade não encontrada")
 
+    day = activity.start_time.date()
     await db.delete(activity)
+    await db.flush()
+    await refresh_daily_load(db, current_user.id, day)
     await db.commit()
+    invalidate_load_risk(current_user.id)
@@ -0,0 +1,220 @@
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import get_current_user
+from app.db.session import get_db
+from app.models.best_effort import BestEffort
+from app.models.training_plan import SportType
+from app.models.user import User
+from app.schemas.metrics import (
+    BestEffortResponse,
+    CriticalPowerEffort,
+    CriticalPowerResponse,
+    PowerCurveResponse,
+    PaceRecordResponse,
+    PaceRecordsResponse,
+    PaceTrendPoint,
+    LoadRiskPoint,
+    LoadRiskResponse,
+    PmcPoint,
+    PmcResponse,
+)
+from app.services.analytics.best_efforts import PACE_DISTANCES
+from app.services.analytics.load_metrics import to_optional
+from app.services.analytics.training_metrics import get_form_status
+from app.services.critical_power import CP_FIT_DAYS, power_model
+from app.services.daily_load import ensure_daily_load, load_range
+from app.services.load_risk import get_load_risk
+
+router = APIRouter()
+
+
+async def _best_per_target(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    metric: str,
+    since: Optional[datetime] = None,
+    higher_is_better: bool = True,
+    sport: Optional[SportType] = None,
+) -> list[BestEffort]:
+    """Best row per target (duração/distância) for the user, via the best_efforts index."""
+    order = BestEffort.value.desc() if higher_is_better else BestEffort.value.asc()
+    ranked = (
+        select(
+            BestEffort,
+            func.row_number().over(
+                partition_by=BestEffort.target,
+                order_by=(order, BestEffort.start_time.asc()),
+            ).label("rank"),
+        )
+        .where(BestEffort.user_id == user_id, BestEffort.metric == metric)
+    )
+    if since is not None:
+        ranked = ranked.where(BestEffort.start_time >= since)
+    if sport is not None:
+        ranked = ranked.where(BestEffort.sport == sport)
+    ranked = ranked.subquery()
+
+    best = select(BestEffort).join(ranked, BestEffort.id == ranked.c.id).where(ranked.c.rank == 1)
+    result = await db.execute(best.order_by(BestEffort.target))
+    return list(result.scalars().all())
+
+
+@router.get("/power-curve", response_model=PowerCurveResponse)
+async def get_power_curve(
+    days: Optional[int] = Query(None, ge=1, le=3650, description="Janela em dias (vazio = histórico inteiro)"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Curva potência-duração: melhor média por duração (5 s, 1 min, 20 min, ...)."""
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    efforts = await _best_per_target(db, current_user.id, "power", since)
+    return PowerCurveResponse(
+        days=days,
+        efforts=[BestEffortResponse.model_validate(e) for e in efforts],
+    )
+
+
+@router.get("/critical-power", response_model=CriticalPowerResponse)
+async def get_critical_power(
+    days: int = Query(CP_FIT_DAYS, ge=14, le=365, description="Janela dos esforços usados no ajuste"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    CP e W′ ajustados aos melhores esforços de 2–20 min da janela (modelo
+    trabalho-tempo). Sem esforços suficientes, cai para o FTP do perfil com
+    W′ padrão (source="ftp").
+    """
+    model = await power_model(db, current_user.id, current_user.ftp, days)
+    cp, w_prime = model["cp"], model["w_prime"]
+    return CriticalPowerResponse(
+        days=days,
+        cp=round(cp, 1) if cp else None,
+        w_prime=round(w_prime) if w_prime else None,
+        source=model["source"],
+        efforts=[
+            CriticalPowerEffort(
+                duration_s=t,
+                watts=w,
+                model_watts=round(cp + w_prime / t, 1) if cp else None,
+            )
+            for t, w in model["efforts"]
+        ],
+    )
+
+
+@router.get("/pace-records", response_model=PaceRecordsResponse)
+async def get_pace_records(
+    sport: str = Query("run", description="run ou swim"),
+    months: int = Query(12, ge=1, le=120, description="Meses de histórico na tendência"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    PRs por distância-padrão (1 km, 5 km, 10 km, meia... / 100 m, 400 m...)
+    e a tendência mensal do melhor tempo, só a partir do índice best_efforts.
+    """
+    if sport not in PACE_DISTANCES:
+        raise HTTPException(status_code=400, detail="Esporte inválido. Use run ou swim")
+    sport_enum = SportType(sport)
+    pace_unit = 100 if sport == "swim" else 1000
+
+    records = await _best_per_target(db, current_user.id, "pace", higher_is_better=False, sport=sport_enum)
+
+    since = datetime.utcnow() - timedelta(days=months * 30)
+    month = func.date_trunc("month", BestEffort.start_time).label("month")
+    result = await db.execute(
+        select(BestEffort.target, month, func.min(BestEffort.value).label("best"))
+        .where(
+            BestEffort.user_id == current_user.id,
+            BestEffort.metric == "pace",
+            BestEffort.sport == sport_enum,
+            BestEffort.start_time >= since,
+        )
+        .group_by(BestEffort.target, month)
+        .order_by(BestEffort.target, month)
+    )
+
+    return PaceRecordsResponse(
+        sport=sport,
+        records=[
+            PaceRecordResponse(
+                **BestEffortResponse.model_validate(r).model_dump(),
+                pace_s=round(r.value / r.target * pace_unit, 1),
+            )
+            for r in records
+        ],
+        trend=[
+            PaceTrendPoint(
+                target=row.target,
+                month=row.month.date(),
+                value=row.best,
+                pace_s=round(row.best / row.target * pace_unit, 1),
+            )
+            for row in result
+        ],
+    )
+
+
+@router.get("/pmc", response_model=PmcResponse)
+async def get_pmc(
+    days: int = Query(180, ge=7, le=3650, description="Dias até hoje no gráfico"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Performance Management Chart: TSS diário, CTL (42 d), ATL (7 d) e TSB.
+
+    Lê a série materializada na daily_load (range scan); o CTL/ATL já vem
+    acumulado desde o primeiro treino, então a janela não distorce a curva.
+    """
+    await ensure_daily_load(db, current_user.id)
+    today = date.today()
+    series = await load_range(db, current_user.id, today - timedelta(days=days - 1), today)
+    tss, ctl, atl, tsb = (np.round(series[key], 1).tolist() for key in ("tss", "ctl", "atl", "tsb"))
+    return PmcResponse(
+        days=days,
+        ctl=ctl[-1],
+        atl=atl[-1],
+        tsb=tsb[-1],
+        form=get_form_status(float(series["tsb"][-1])),
+        points=[
+            PmcPoint(date=d, tss=t, ctl=c, atl=a, tsb=b)
+            for d, t, c, a, b in zip(series["dates"].tolist(), tss, ctl, atl, tsb)
+        ],
+    )
+
+
+@router.get("/load-risk", response_model=LoadRiskResponse)
+async def get_load_risk_series(
+    days: Optional[int] = Query(None, ge=7, le=3650, description="Últimos N dias (vazio = histórico inteiro)"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Risco de lesão por carga: monotonia e strain (janela de 7 dias) e ACWR
+    (7 d / 28 d) para cada dia. Séries em cache até a próxima atividade.
+    """
+    series = await get_load_risk(db, current_user.id)
+    window = slice(-days, None) if days else slice(None)
+    dates = series["dates"][window].tolist()
+    tss = series["tss"][window].tolist()
+    monotony, strain, acwr = (to_optional(series[key][window]) for key in ("monotony", "strain", "acwr"))
+
+    return LoadRiskResponse(
+        days=days,
+        monotony=monotony[-1] if dates else None,
+        strain=strain[-1] if dates else None,
+        acwr=acwr[-1] if dates else None,
+        points=[
+            LoadRiskPoint(date=d, tss=round(t, 1), monotony=m, strain=s, acwr=a)
+            for d, t, m, s, a in zip(dates, tss, monotony, strain, acwr)
+        ],
+    )
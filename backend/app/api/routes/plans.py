@@ -2,7 +2,7 @@ import uuid
 from datetime import date, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -13,7 +13,7 @@ from app.models.user import User
 from app.models.race import TargetRace
 from app.models.training_plan import TrainingPlan, PlannedWeek, PlannedSession, PlanPhase, SportType, SessionIntensity
 from app.models.weekly_analysis import WeeklyAnalysis
-from app.schemas.race import RaceCreate, RaceResponse
+from app.schemas.race import RaceCreate, RaceResponse, TaperResponse
 from app.schemas.plan import (
     GeneratePlanRequest,
     TrainingPlanResponse,
@@ -23,6 +23,8 @@ from app.schemas.plan import (
 )
 from app.schemas.analysis import WeeklyAnalysisResponse
 from app.services.agents.coach_agent import generate_periodization, generate_weekly_plan, analyze_week
+from app.services.analytics.taper import TARGET_TSB, optimize_taper, taper_horizon_error
+from app.services.daily_load import ensure_daily_load, load_on
 
 router = APIRouter()
 
@@ -73,6 +75,49 @@ async def delete_race(
     await db.commit()
 
 
+@router.get("/races/{race_id}/taper", response_model=TaperResponse)
+async def optimize_race_taper(
+    race_id: uuid.UUID,
+    tsb_min: float = Query(TARGET_TSB[0], ge=-30, le=50, description="TSB mínimo no dia da prova"),
+    tsb_max: float = Query(TARGET_TSB[1], ge=-30, le=50, description="TSB máximo no dia da prova"),
+    top_k: int = Query(5, ge=1, le=20),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Melhores polimentos (formato, duração e intensidade) para chegar à prova
+    com o TSB na janela alvo perdendo o mínimo de CTL, a partir da carga atual.
+    """
+    if tsb_min >= tsb_max:
+        raise HTTPException(status_code=400, detail="tsb_min deve ser menor que tsb_max")
+
+    result = await db.execute(
+        select(TargetRace).where(TargetRace.id == race_id, TargetRace.user_id == current_user.id)
+    )
+    race = result.scalar_one_or_none()
+    if not race:
+        raise HTTPException(status_code=404, detail="Prova não encontrada")
+
+    await ensure_daily_load(db, current_user.id)
+    today = date.today()
+    load = await load_on(db, current_user.id, today)
+    error = taper_horizon_error(load["ctl"], today, race.race_date)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
+    taper = optimize_taper(load["ctl"], load["atl"], today, race.race_date, (tsb_min, tsb_max), top_k)
+    return TaperResponse(
+        race_id=race.id,
+        race_date=race.race_date,
+        ctl=round(load["ctl"], 1),
+        atl=round(load["atl"], 1),
+        tsb=round(load["tsb"], 1),
+        target_tsb_min=tsb_min,
+        target_tsb_max=tsb_max,
+        **taper,
+    )
+
+
 # ============================================================
 # Periodization & Plans
 # ============================================================
@@ -270,6 +315,10 @@ async def generate_week_sessions(
             "goal_time_seconds": week.plan.race.goal_time_seconds,
         }
 
+    # Carga atual (PMC) para o coach
+    await ensure_daily_load(db, current_user.id)
+    load_history = await load_on(db, current_user.id, date.today())
+
     # Call AI
     plan_data = await generate_weekly_plan(
         athlete_profile=athlete_profile,
@@ -278,7 +327,7 @@ async def generate_week_sessions(
         week_number=week.week_number,
         total_weeks=week.plan.total_weeks,
         previous_week_analysis=None,
-        load_history={"ctl": 0, "atl": 0, "tsb": 0},
+        load_history=load_history,
         modality=current_user.modality.value,
     )
 
@@ -368,6 +417,7 @@ async def analyze_week_endpoint(
             "total_distance_meters": act.total_distance_meters,
             "avg_hr": act.avg_hr,
             "tss": act.tss or 0,
+            "aerobic_decoupling_pct": act.aerobic_decoupling_pct,
         })
 
     planned_week_data = {
@@ -383,12 +433,16 @@ async def analyze_week_endpoint(
         "ftp": current_user.ftp,
     }
 
+    # Carga ao fim da semana analisada (ou hoje, se ainda em curso)
+    await ensure_daily_load(db, current_user.id)
+    load_history = await load_on(db, current_user.id, min(week.end_date, date.today()))
+
     # Call AI
     analysis_result = await analyze_week(
         week_activities=week_activities,
         planned_week=planned_week_data,
         athlete_profile=athlete_profile,
-        load_history={"ctl": 0, "atl": 0, "tsb": 0},
+        load_history=load_history,
         modality=current_user.modality.value,
     )
 
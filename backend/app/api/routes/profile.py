@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import uuid
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -6,8 +8,11 @@ from app.core.security import get_current_user
 from app.db.session import get_db
 from app.models.user import User
 from app.models.race import TargetRace
-from app.schemas.user import UserResponse, UserUpdate
+from app.schemas.user import UserResponse, UserUpdate, ProfileUpdateResponse
 from app.schemas.race import RaceCreate, RaceResponse
+from app.schemas.job import JobResponse
+from app.services.jobs import get_job
+from app.services.recompute import JOB_KIND as RECOMPUTE_JOB_KIND, THRESHOLD_FIELDS, request_recompute, run_recompute
 
 router = APIRouter()
 
@@ -17,16 +22,40 @@ async def get_profile(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-@router.put("", response_model=UserResponse)
+@router.put("", response_model=ProfileUpdateResponse)
 async def update_profile(
     data: UserUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
+    """
+    Atualiza o perfil. Se FTP, pace de limiar, CSS ou FC mudarem, TSS/IF/zonas
+    das atividades são recalculados em background (recompute_job).
+    """
     update_data = data.model_dump(exclude_unset=True)
+    changed = {f for f in THRESHOLD_FIELDS if f in update_data and update_data[f] != getattr(current_user, f)}
     for field, value in update_data.items():
         setattr(current_user, field, value)
 
     await db.commit()
     await db.refresh(current_user)
-    return current_user
+
+    response = ProfileUpdateResponse.model_validate(current_user)
+    if changed:
+        job, created = request_recompute(current_user.id, changed)
+        if created:
+            background_tasks.add_task(run_recompute, job, current_user.id)
+        response.recompute_job = JobResponse(**job.to_dict())
+    return response
+
+
+@router.get("/recompute/{job_id}", response_model=JobResponse)
+async def get_recompute_status(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+):
+    job = get_job(job_id, current_user.id)
+    if not job or job.kind != RECOMPUTE_JOB_KIND:
+        raise HTTPException(status_code=404, detail="Recálculo não encontrado")
+    return job.to_dict()
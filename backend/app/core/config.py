@@ -42,6 +42,17 @@ class Settings(BaseSettings):
     S3_SECRET_KEY: Optional[str] = None
     S3_REGION: str = "auto"
 
+    # Ingestão (parse + métricas) — 0 desliga o pool e roda inline
+    INGEST_MAX_WORKERS: int = 2
+    # Importação em lote (ZIP): atividades por commit
+    IMPORT_BATCH_SIZE: int = 50
+    # Recálculo de TSS/IF/zonas quando os limiares mudam: atividades por UPDATE
+    RECOMPUTE_BATCH_SIZE: int = 200
+
+    # Tamanho máximo de upload (413 acima disso)
+    MAX_UPLOAD_MB: int = 50
+    MAX_IMPORT_MB: int = 2048
+
     model_config = {
         "env_file": ".env",
         "env_file_encoding": "utf-8",
@@ -0,0 +1,61 @@
+"""
+Schema upgrade — colunas e índices novos em tabelas que já existem.
+
+O schema nasce do Base.metadata.create_all no startup, que cria tabelas
+novas (best_efforts, daily_load, ...) mas nunca altera as existentes. As
+colunas e índices acrescentados depois a elas ficam listados aqui e são
+aplicados logo após o create_all: só o que falta no banco é criado, então o
+passo é idempotente e não faz nada num banco recém-criado. Tipos e
+definições vêm do próprio modelo.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from app.db.session import Base
+
+# tabela -> colunas acrescentadas depois da criação (todas anuláveis)
+ADDED_COLUMNS = {
+    "activities": (
+        "content_hash",
+        "normalized_graded_pace_min_km",
+        "normalized_graded_pace_s_km",
+        "power_time_in_zones_seconds",
+        "pace_time_in_zones_seconds",
+        "aerobic_decoupling_pct",
+        "power_curve",
+        "cp_watts",
+        "w_prime_j",
+        "min_wbal_pct",
+        "graded_pace_stream",
+        "wbal_stream",
+        "intervals_data",
+    ),
+}
+
+# tabela -> índices acrescentados depois da criação
+ADDED_INDEXES = {
+    "activities": ("ix_activities_user_content_hash", "ix_activities_user_start_time"),
+}
+
+
+def upgrade_schema(conn: Connection) -> None:
+    """Add the missing columns and indexes (rodar via conn.run_sync)."""
+    inspector = inspect(conn)
+    preparer = conn.dialect.identifier_preparer
+    for table_name, columns in ADDED_COLUMNS.items():
+        table = Base.metadata.tables[table_name]
+        existing = {c["name"] for c in inspector.get_columns(table_name)}
+        for name in columns:
+            if name not in existing:
+                column = table.c[name]
+                conn.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=conn.dialect)}"
+                ))
+
+    for table_name, names in ADDED_INDEXES.items():
+        table = Base.metadata.tables[table_name]
+        existing = {ix["name"] for ix in inspector.get_indexes(table_name)}
+        for index in table.indexes:
+            if index.name in names and index.name not in existing:
+                index.create(conn)
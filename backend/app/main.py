@@ -6,7 +6,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.core.config import settings
+from app.db.migrations import upgrade_schema
 from app.db.session import engine, Base
+from app.services.ingestion import shutdown_pool
 import app.models  # noqa: F401 — register all models with Base.metadata
 
 
@@ -14,8 +16,10 @@ import app.models  # noqa: F401 — register all models with Base.metadata
 async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
     print("DB: tables OK")
     yield
+    shutdown_pool()
 
 
 app = FastAPI(
@@ -34,6 +38,28 @@ app.add_middleware(
 )
 
 
+# Limite de tamanho por rota de upload (MB); checado pelo Content-Length
+# antes de o corpo ser lido. Uploads sem Content-Length são barrados no spool.
+_UPLOAD_LIMITS = {
+    "/api/v1/activities/upload": "MAX_UPLOAD_MB",
+    "/api/v1/activities/import": "MAX_IMPORT_MB",
+}
+
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    setting = _UPLOAD_LIMITS.get(request.url.path)
+    length = request.headers.get("content-length")
+    if setting and request.method == "POST" and length and length.isdigit():
+        limit_mb = getattr(settings, setting)
+        if int(length) > limit_mb * 1024 * 1024:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Arquivo maior que o limite de {limit_mb} MB"},
+            )
+    return await call_next(request)
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Catch unhandled exceptions so CORS headers are still present and error details are visible."""
@@ -51,12 +77,13 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 
 # Routers
-from app.api.routes import auth, profile, activities, plans  # noqa: E402
+from app.api.routes import auth, profile, activities, plans, metrics  # noqa: E402
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Auth"])
 app.include_router(profile.router, prefix="/api/v1/profile", tags=["Profile"])
 app.include_router(activities.router, prefix="/api/v1/activities", tags=["Activities"])
 app.include_router(plans.router, prefix="/api/v1/plans", tags=["Plans"])
+app.include_router(metrics.router, prefix="/api/v1/metrics", tags=["Metrics"])
 
 
 @app.get("/")
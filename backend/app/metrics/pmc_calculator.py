@@ -9,6 +9,10 @@ Performance Management Chart calculations:
 from datetime import date, timedelta
 from typing import List, Dict
 
+import numpy as np
+
+from app.services.analytics.kernels import ewma
+
 
 class PMCCalculator:
     """
@@ -72,7 +76,8 @@ class PMCCalculator:
     ) -> List[Dict]:
         """
         Projeta CTL/ATL/TSB durante taper com TSS reduzido.
-        Útil para planejar a forma no dia da prova.
+        Útil para planejar a forma no dia da prova. Para buscar o melhor
+        formato/duração/intensidade, ver services.analytics.taper.
         
         Args:
             current_ctl: Current CTL value
@@ -83,32 +88,24 @@ class PMCCalculator:
         Returns:
             List of projected daily values
         """
-        projections = []
-        ctl = current_ctl
-        atl = current_atl
-        
-        for day in range(1, days + 1):
-            # TSS progressivamente menor durante taper
-            if day <= 7:
-                daily_tss = current_ctl * taper_intensity  # Semana 1: reduced
-            else:
-                daily_tss = current_ctl * (taper_intensity / 2)  # Semana 2: even more reduced
-            
-            ctl = ctl + (daily_tss - ctl) / self.CTL_DAYS
-            atl = atl + (daily_tss - atl) / self.ATL_DAYS
-            tsb = ctl - atl
-            
-            projections.append({
-                'day': day,
-                'date': (date.today() + timedelta(days=day)).isoformat(),
-                'projected_tss': round(daily_tss, 0),
-                'ctl': round(ctl, 1),
-                'atl': round(atl, 1),
-                'tsb': round(tsb, 1)
-            })
-        
-        return projections
-    
+        # TSS progressivamente menor: semana 1 reduzida, semana 2 ainda mais
+        day = np.arange(1, days + 1)
+        daily_tss = np.where(day <= 7, current_ctl * taper_intensity, current_ctl * (taper_intensity / 2))
+        ctl = ewma(daily_tss, self.CTL_DAYS, current_ctl)
+        atl = ewma(daily_tss, self.ATL_DAYS, current_atl)
+
+        return [
+            {
+                'day': d,
+                'date': (date.today() + timedelta(days=d)).isoformat(),
+                'projected_tss': round(t, 0),
+                'ctl': round(c, 1),
+                'atl': round(a, 1),
+                'tsb': round(c - a, 1)
+            }
+            for d, t, c, a in zip(day.tolist(), daily_tss.tolist(), ctl.tolist(), atl.tolist())
+        ]
+
     def get_form_status(self, tsb: float) -> Dict:
         """
         Get human-readable form status based on TSB.
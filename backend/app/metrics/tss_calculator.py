@@ -6,9 +6,19 @@ Calculates Training Stress Score (TSS) for different sports:
 - Run: rTSS based on pace relative to threshold pace
 - Swim: sTSS based on pace relative to CSS (Critical Swim Speed)
 - HR: Fallback hrTSS when no power/pace data available
+
+As fórmulas ficam em app.services.analytics.load_metrics; esta classe só
+traduz atividades no formato Strava para as colunas do kernel em lote.
 """
 from typing import Optional
-import math
+
+from app.services.analytics.load_metrics import batch_load_metrics, to_optional
+
+_SPORTS = {
+    'ride': 'bike', 'bike': 'bike', 'cycling': 'bike', 'virtualride': 'bike',
+    'run': 'run', 'running': 'run', 'virtualrun': 'run',
+    'swim': 'swim', 'swimming': 'swim',
+}
 
 
 class TSSCalculator:
@@ -22,6 +32,26 @@ class TSSCalculator:
         self.run_threshold_pace = athlete_config.get('run_threshold_pace_sec', 300)  # 5:00/km
         self.run_lthr = athlete_config.get('run_lthr', 165)
         self.fc_max = athlete_config.get('fc_max', 185)
+        self.fc_rest = athlete_config.get('fc_rest', 60)
+    
+    @property
+    def thresholds(self) -> dict:
+        return {
+            'ftp': self.ftp,
+            'run_threshold_pace': self.run_threshold_pace,
+            'css': self.css_pace,
+            'hr_max': self.fc_max,
+            'hr_rest': self.fc_rest,
+        }
+    
+    def _metrics(self, sport: str, duration_seconds: int, distance_meters: Optional[float] = None,
+                 avg_hr: Optional[int] = None, normalized_power: Optional[float] = None,
+                 ngp_sec_per_km: Optional[float] = None) -> dict:
+        out = batch_load_metrics(
+            [sport], [duration_seconds], [distance_meters], [avg_hr], [normalized_power], [ngp_sec_per_km],
+            self.thresholds,
+        )
+        return {key: to_optional(values)[0] for key, values in out.items()}
     
     # ==================== BIKE TSS ====================
     def calc_bike_tss(
@@ -33,59 +63,29 @@ class TSSCalculator:
     ) -> float:
         """
         Calcula TSS para bike.
-        Prioridade: NP > Avg Power > HR
+        Prioridade: NP > Avg Power (x1.05 como estimativa de NP) > HR
         
         TSS = (duration_sec * NP * IF) / (FTP * 3600) * 100
         IF = NP / FTP
         """
-        if normalized_power and self.ftp:
-            np = normalized_power
-        elif avg_power and self.ftp:
-            np = avg_power * 1.05  # Estimativa de NP baseado em avg
-        elif avg_hr:
-            # hrTSS como fallback
-            return self._calc_hr_tss(duration_seconds, avg_hr)
-        else:
-            return 0.0
-        
-        intensity_factor = np / self.ftp
-        duration_hours = duration_seconds / 3600
-        tss = (duration_hours * np * intensity_factor) / self.ftp * 100
-        
-        return round(tss, 1)
+        np_watts = normalized_power or (avg_power * 1.05 if avg_power else None)
+        return self._metrics('bike', duration_seconds, avg_hr=avg_hr, normalized_power=np_watts)['tss']
     
     # ==================== RUN TSS ====================
     def calc_run_tss(
         self,
         duration_seconds: int,
         distance_meters: float,
-        avg_hr: Optional[int] = None
+        avg_hr: Optional[int] = None,
+        ngp_sec_per_km: Optional[float] = None
     ) -> float:
         """
         Calcula rTSS (running TSS) baseado em pace ou hrTSS baseado em FC.
         
-        rTSS = (duration_sec * NGP * IF) / (threshold_pace * 3600) * 100
-        Onde NGP = Normalized Graded Pace (sem elevação, usa pace médio)
+        rTSS = duration_hours * IF² * 100, IF = threshold_pace / NGP
+        NGP = Normalized Graded Pace (ajustado à inclinação); sem ele, usa o pace médio
         """
-        if distance_meters and distance_meters > 0:
-            # Pace em segundos por km
-            pace_sec_per_km = (duration_seconds / distance_meters) * 1000
-            
-            # Intensity Factor = threshold_pace / atual_pace
-            # (invertido porque pace menor = mais rápido)
-            intensity_factor = self.run_threshold_pace / pace_sec_per_km
-            intensity_factor = min(intensity_factor, 1.5)  # Cap em 150%
-            
-            duration_hours = duration_seconds / 3600
-            
-            # rTSS simplificado
-            tss = duration_hours * (intensity_factor ** 2) * 100
-            return round(tss, 1)
-        
-        elif avg_hr:
-            return self._calc_hr_tss(duration_seconds, avg_hr)
-        
-        return 0.0
+        return self._metrics('run', duration_seconds, distance_meters, avg_hr, ngp_sec_per_km=ngp_sec_per_km)['tss']
     
     # ==================== SWIM TSS ====================
     def calc_swim_tss(
@@ -99,99 +99,53 @@ class TSSCalculator:
         sTSS = duration_hours * IF² * 100
         IF = CSS / pace_atual (invertido)
         """
-        if distance_meters and distance_meters > 0:
-            # Pace em segundos por 100m
-            pace_sec_per_100m = (duration_seconds / distance_meters) * 100
-            
-            # IF = CSS / pace (CSS menor = mais rápido = IF > 1)
-            intensity_factor = self.css_pace / pace_sec_per_100m
-            intensity_factor = min(intensity_factor, 1.5)  # Cap
-            
-            duration_hours = duration_seconds / 3600
-            tss = duration_hours * (intensity_factor ** 2) * 100
-            
-            return round(tss, 1)
-        
-        return 0.0
+        return self._metrics('swim', duration_seconds, distance_meters)['tss']
     
     # ==================== HR TSS (fallback) ====================
     def _calc_hr_tss(self, duration_seconds: int, avg_hr: int) -> float:
         """
         hrTSS como fallback quando não há dados de potência/pace.
-        Fórmula de Coggan simplificada.
+        Reserva de FC entre fc_rest e fc_max.
         """
-        # TRIMP modificado
-        hr_reserve = (avg_hr - 60) / (self.fc_max - 60)  # Assume FC repouso = 60
-        hr_reserve = max(0, min(hr_reserve, 1))
-        
-        duration_hours = duration_seconds / 3600
-        
-        # Aproximação: hrTSS ≈ TRIMP * fator
-        trimp = duration_hours * hr_reserve * 100
-        tss = trimp * 0.8  # Fator de ajuste
-        
-        return round(tss, 1)
+        return self._metrics('other', duration_seconds, avg_hr=avg_hr)['tss']
     
     # ==================== Cálculo automático por tipo ====================
+    def calc_tss_batch(self, activities: list[dict]) -> list[dict]:
+        """
+        TSS, IF e TRIMP de várias atividades numa única chamada vetorizada.
+        """
+        sports, np_watts = [], []
+        for activity in activities:
+            sport = _SPORTS.get((activity.get('sport_type') or '').lower(), 'other')
+            sports.append(sport)
+            watts = activity.get('weighted_average_watts')
+            if not watts and sport == 'bike' and activity.get('average_watts'):
+                watts = activity['average_watts'] * 1.05
+            np_watts.append(watts)
+        
+        out = batch_load_metrics(
+            sport=sports,
+            duration_s=[a.get('moving_time') or 0 for a in activities],
+            distance_m=[a.get('distance') for a in activities],
+            avg_hr=[a.get('average_heartrate') for a in activities],
+            np_watts=np_watts,
+            ngp_s_km=[a.get('normalized_graded_pace_sec') for a in activities],
+            thresholds=self.thresholds,
+        )
+        columns = {key: to_optional(values) for key, values in out.items()}
+        return [
+            {'tss': columns['tss'][i], 'intensity_factor': columns['intensity_factor'][i], 'trimp': columns['trimp'][i]}
+            for i in range(len(activities))
+        ]
+    
     def calc_tss(self, activity: dict) -> float:
         """
         Calcula TSS automaticamente baseado no tipo de atividade.
         """
-        sport = activity.get('sport_type', '').lower()
-        
-        if sport in ['ride', 'bike', 'cycling', 'virtualride']:
-            return self.calc_bike_tss(
-                duration_seconds=activity.get('moving_time', 0),
-                normalized_power=activity.get('weighted_average_watts'),
-                avg_power=activity.get('average_watts'),
-                avg_hr=activity.get('average_heartrate')
-            )
-        
-        elif sport in ['run', 'running', 'virtualrun']:
-            return self.calc_run_tss(
-                duration_seconds=activity.get('moving_time', 0),
-                distance_meters=activity.get('distance', 0),
-                avg_hr=activity.get('average_heartrate')
-            )
-        
-        elif sport in ['swim', 'swimming']:
-            return self.calc_swim_tss(
-                duration_seconds=activity.get('moving_time', 0),
-                distance_meters=activity.get('distance', 0)
-            )
-        
-        # Fallback para outros tipos (strength, etc.)
-        elif activity.get('average_heartrate'):
-            return self._calc_hr_tss(
-                activity.get('moving_time', 0),
-                activity.get('average_heartrate')
-            )
-        
-        return 0.0
+        return self.calc_tss_batch([activity])[0]['tss']
     
     def get_intensity_factor(self, activity: dict) -> Optional[float]:
         """
         Calculate intensity factor for an activity.
         """
-        sport = activity.get('sport_type', '').lower()
-        
-        if sport in ['ride', 'bike', 'cycling', 'virtualride']:
-            np = activity.get('weighted_average_watts') or activity.get('average_watts')
-            if np and self.ftp:
-                return round(np / self.ftp, 3)
-        
-        elif sport in ['run', 'running', 'virtualrun']:
-            distance = activity.get('distance', 0)
-            moving_time = activity.get('moving_time', 0)
-            if distance and moving_time:
-                pace_sec_per_km = (moving_time / distance) * 1000
-                return round(self.run_threshold_pace / pace_sec_per_km, 3)
-        
-        elif sport in ['swim', 'swimming']:
-            distance = activity.get('distance', 0)
-            moving_time = activity.get('moving_time', 0)
-            if distance and moving_time:
-                pace_sec_per_100m = (moving_time / distance) * 100
-                return round(self.css_pace / pace_sec_per_100m, 3)
-        
-        return None
+        return self.calc_tss_batch([activity])[0]['intensity_factor']
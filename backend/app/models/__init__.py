@@ -6,6 +6,9 @@ from app.models.training_plan import (
     PlanPhase, SportType, SessionIntensity,
 )
 from app.models.activity import Activity
+from app.models.activity_stream import ActivityStreamLevel
+from app.models.best_effort import BestEffort
+from app.models.daily_load import DailyLoad
 from app.models.weekly_analysis import WeeklyAnalysis
 
 __all__ = [
@@ -13,6 +16,6 @@ __all__ = [
     "TargetRace", "RaceType", "RacePriority",
     "TrainingPlan", "PlannedWeek", "PlannedSession",
     "PlanPhase", "SportType", "SessionIntensity",
-    "Activity",
+    "Activity", "ActivityStreamLevel", "BestEffort", "DailyLoad",
     "WeeklyAnalysis",
 ]
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import String, Integer, Float, DateTime, Text, ForeignKey
+from sqlalchemy import String, Integer, Float, DateTime, Text, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -11,6 +11,11 @@ from app.models.training_plan import SportType
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (
+        # Dedupe: hash exato por usuário + busca aproximada por horário de início
+        Index("ix_activities_user_content_hash", "user_id", "content_hash", unique=True),
+        Index("ix_activities_user_start_time", "user_id", "start_time"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -23,6 +28,7 @@ class Activity(Base):
     end_time: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     source_file: Mapped[str | None] = mapped_column(String(512), nullable=True)
     source_format: Mapped[str | None] = mapped_column(String(10), nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)  # SHA-256 do arquivo
 
     # Tempo
     total_elapsed_seconds: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -33,6 +39,8 @@ class Activity(Base):
     total_distance_meters: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
     avg_pace_min_km: Mapped[float | None] = mapped_column(Float, nullable=True)
     max_pace_min_km: Mapped[float | None] = mapped_column(Float, nullable=True)
+    normalized_graded_pace_min_km: Mapped[float | None] = mapped_column(Float, nullable=True)  # NGP (corrida)
+    normalized_graded_pace_s_km: Mapped[float | None] = mapped_column(Float, nullable=True)  # NGP sem arredondar
     avg_speed_kmh: Mapped[float | None] = mapped_column(Float, nullable=True)
     max_speed_kmh: Mapped[float | None] = mapped_column(Float, nullable=True)
 
@@ -42,6 +50,9 @@ class Activity(Base):
     min_hr: Mapped[int | None] = mapped_column(Integer, nullable=True)
     hr_zone_distribution: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     time_in_zones_seconds: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    power_time_in_zones_seconds: Mapped[dict | None] = mapped_column(JSON, nullable=True)  # 7 zonas Coggan
+    pace_time_in_zones_seconds: Mapped[dict | None] = mapped_column(JSON, nullable=True)  # corrida
+    aerobic_decoupling_pct: Mapped[float | None] = mapped_column(Float, nullable=True)  # Pa:HR / Pw:HR
 
     # Cadencia
     avg_cadence: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -53,6 +64,10 @@ class Activity(Base):
     normalized_power: Mapped[int | None] = mapped_column(Integer, nullable=True)
     intensity_factor: Mapped[float | None] = mapped_column(Float, nullable=True)
     variability_index: Mapped[float | None] = mapped_column(Float, nullable=True)
+    power_curve: Mapped[dict | None] = mapped_column(JSON, nullable=True)  # {"duração_s": watts} média-máxima
+    cp_watts: Mapped[float | None] = mapped_column(Float, nullable=True)  # CP usado no W′bal
+    w_prime_j: Mapped[float | None] = mapped_column(Float, nullable=True)  # W′ usado no W′bal
+    min_wbal_pct: Mapped[float | None] = mapped_column(Float, nullable=True)  # menor W′bal, % de W′
 
     # Elevacao
     total_ascent_m: Mapped[float | None] = mapped_column(Float, nullable=True)
@@ -93,13 +108,16 @@ class Activity(Base):
     # Streams 1Hz (para graficos)
     hr_stream: Mapped[list | None] = mapped_column(JSON, nullable=True)
     pace_stream: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    graded_pace_stream: Mapped[list | None] = mapped_column(JSON, nullable=True)  # pace ajustado à inclinação
     power_stream: Mapped[list | None] = mapped_column(JSON, nullable=True)
     cadence_stream: Mapped[list | None] = mapped_column(JSON, nullable=True)
     altitude_stream: Mapped[list | None] = mapped_column(JSON, nullable=True)
     gps_stream: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    wbal_stream: Mapped[list | None] = mapped_column(JSON, nullable=True)  # W′bal (J)
 
     # Laps
     laps_data: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    intervals_data: Mapped[list | None] = mapped_column(JSON, nullable=True)  # blocos detectados nos streams
 
     # Analise IA
     ai_analysis: Mapped[dict | None] = mapped_column(JSON, nullable=True)
@@ -108,3 +126,5 @@ class Activity(Base):
     # Relationships
     user = relationship("User", back_populates="activities")
     planned_session = relationship("PlannedSession", back_populates="activity", uselist=False)
+    stream_levels = relationship("ActivityStreamLevel", back_populates="activity", passive_deletes=True)
+    best_efforts = relationship("BestEffort", back_populates="activity", passive_deletes=True)
@@ -0,0 +1,31 @@
+import uuid
+
+from sqlalchemy import String, Integer, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID, JSON
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.session import Base
+
+
+class ActivityStreamLevel(Base):
+    """Um nível da pirâmide de zoom de um stream (250/1000/4000 pontos ou 0 = resolução cheia)."""
+
+    __tablename__ = "activity_stream_levels"
+    __table_args__ = (
+        Index("ix_activity_stream_levels_lookup", "activity_id", "stream", "level"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    activity_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("activities.id", ondelete="CASCADE"), nullable=False
+    )
+    stream: Mapped[str] = mapped_column(String(20), nullable=False)  # hr, pace, power, cadence, altitude, gps
+    level: Mapped[int] = mapped_column(Integer, nullable=False)
+    n_points: Mapped[int] = mapped_column(Integer, nullable=False)
+    t_start: Mapped[int] = mapped_column(Integer, nullable=False)
+    t_end: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # Colunas: {"t": [...], "hr": [...]} (gps: {"t", "lat", "lon"})
+    data: Mapped[dict] = mapped_column(JSON, nullable=False)
+
+    activity = relationship("Activity", back_populates="stream_levels")
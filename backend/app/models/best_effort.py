@@ -0,0 +1,43 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import String, Integer, Float, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.session import Base
+from app.models.training_plan import SportType
+
+
+class BestEffort(Base):
+    """
+    Melhor esforço de uma atividade para uma duração/distância alvo.
+
+    Uma linha por (atividade, métrica, alvo): o "melhor dos últimos N dias"
+    é um MAX/MIN por índice, sem reler streams. Sai junto com a atividade
+    (ON DELETE CASCADE).
+    """
+
+    __tablename__ = "best_efforts"
+    __table_args__ = (
+        Index("ix_best_efforts_user_metric_target_time", "user_id", "metric", "target", "start_time"),
+        Index("ix_best_efforts_user_metric_target_value", "user_id", "metric", "target", "value"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    activity_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("activities.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    sport: Mapped[SportType] = mapped_column(nullable=False)
+    start_time: Mapped[datetime] = mapped_column(DateTime, nullable=False)  # início da atividade
+
+    # power: alvo = duração (s), valor = watts médios (maior é melhor)
+    metric: Mapped[str] = mapped_column(String(20), nullable=False)
+    target: Mapped[int] = mapped_column(Integer, nullable=False)
+    value: Mapped[float] = mapped_column(Float, nullable=False)
+    offset_s: Mapped[int | None] = mapped_column(Integer, nullable=True)  # início do trecho na atividade
+
+    activity = relationship("Activity", back_populates="best_efforts")
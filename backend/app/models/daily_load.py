@@ -0,0 +1,31 @@
+import uuid
+from datetime import date
+
+from sqlalchemy import Date, Float, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+
+
+class DailyLoad(Base):
+    """
+    Carga diária materializada: TSS do dia e CTL/ATL/TSB ao fim do dia.
+
+    Uma linha por dia, contínua do primeiro ao último dia com atividade
+    (dias sem treino com TSS 0). Editar o histórico recalcula só a partir
+    do dia afetado; depois do último dia, CTL/ATL só decaem (ver
+    services/daily_load.py).
+    """
+
+    __tablename__ = "daily_load"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    tss: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    ctl: Mapped[float] = mapped_column(Float, nullable=False)
+    atl: Mapped[float] = mapped_column(Float, nullable=False)
+    tsb: Mapped[float] = mapped_column(Float, nullable=False)
@@ -23,6 +23,9 @@ class ActivityUploadResponse(BaseModel):
     ai_score: Optional[int] = None
     ai_analysis: Optional[dict] = None
     source_format: Optional[str] = None
+    duplicate: bool = False  # True quando o arquivo/treino já existia
+    invalid_timestamps: int = 0  # trackpoints TCX com horário ilegível (tempo interpolado)
+    malformed_trackpoints: int = 0  # trackpoints TCX com valor inválido, descartados no parse
 
     model_config = {"from_attributes": True}
 
@@ -58,6 +61,7 @@ class ActivityDetail(BaseModel):
 
     avg_pace_min_km: Optional[float] = None
     max_pace_min_km: Optional[float] = None
+    normalized_graded_pace_min_km: Optional[float] = None
     avg_speed_kmh: Optional[float] = None
     max_speed_kmh: Optional[float] = None
 
@@ -66,6 +70,9 @@ class ActivityDetail(BaseModel):
     min_hr: Optional[int] = None
     hr_zone_distribution: Optional[dict] = None
     time_in_zones_seconds: Optional[dict] = None
+    power_time_in_zones_seconds: Optional[dict] = None
+    pace_time_in_zones_seconds: Optional[dict] = None
+    aerobic_decoupling_pct: Optional[float] = None
 
     avg_cadence: Optional[int] = None
     max_cadence: Optional[int] = None
@@ -75,6 +82,10 @@ class ActivityDetail(BaseModel):
     normalized_power: Optional[int] = None
     intensity_factor: Optional[float] = None
     variability_index: Optional[float] = None
+    power_curve: Optional[dict] = None
+    cp_watts: Optional[float] = None
+    w_prime_j: Optional[float] = None
+    min_wbal_pct: Optional[float] = None
 
     total_ascent_m: Optional[float] = None
     total_descent_m: Optional[float] = None
@@ -103,13 +114,25 @@ class ActivityDetail(BaseModel):
 
     hr_stream: Optional[list] = None
     pace_stream: Optional[list] = None
+    graded_pace_stream: Optional[list] = None
     power_stream: Optional[list] = None
     cadence_stream: Optional[list] = None
     altitude_stream: Optional[list] = None
+    wbal_stream: Optional[list] = None
     laps_data: Optional[list] = None
+    intervals_data: Optional[list] = None
 
     ai_analysis: Optional[dict] = None
     ai_score: Optional[int] = None
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class ActivityStreamResponse(BaseModel):
+    stream: str
+    level: int  # 0 = resolução cheia
+    n_points: int
+    t_start: int
+    t_end: int
+    data: dict[str, list]
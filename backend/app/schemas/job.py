@@ -0,0 +1,19 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class JobResponse(BaseModel):
+    id: uuid.UUID
+    kind: str
+    status: str  # pending | running | done | failed
+    total: int
+    done: int
+    progress: float  # %
+    counts: dict[str, int]
+    items: list[dict]
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
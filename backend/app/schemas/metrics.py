@@ -0,0 +1,89 @@
+import uuid
+from datetime import date, datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class BestEffortResponse(BaseModel):
+    target: int  # duração (s) ou distância (m), conforme a métrica
+    value: float  # watts (power) ou segundos (pace)
+    activity_id: uuid.UUID
+    start_time: datetime
+    offset_s: Optional[int] = None
+
+    model_config = {"from_attributes": True}
+
+
+class PowerCurveResponse(BaseModel):
+    days: Optional[int] = None  # None = histórico inteiro
+    efforts: list[BestEffortResponse]
+
+
+class CriticalPowerEffort(BaseModel):
+    duration_s: int
+    watts: float  # melhor média na janela
+    model_watts: Optional[float] = None  # CP + W′/t
+
+
+class CriticalPowerResponse(BaseModel):
+    days: int
+    cp: Optional[float] = None  # W
+    w_prime: Optional[float] = None  # J
+    source: Optional[str] = None  # fit | ftp | None (sem dados)
+    efforts: list[CriticalPowerEffort]
+
+
+class PaceRecordResponse(BestEffortResponse):
+    pace_s: float  # s/km (run) ou s/100m (swim)
+
+
+class PaceTrendPoint(BaseModel):
+    target: int  # distância (m)
+    month: date
+    value: float  # melhor tempo do mês (s)
+    pace_s: float
+
+
+class PaceRecordsResponse(BaseModel):
+    sport: str
+    records: list[PaceRecordResponse]
+    trend: list[PaceTrendPoint]
+
+
+class PmcPoint(BaseModel):
+    date: date
+    tss: float
+    ctl: float  # fitness
+    atl: float  # fadiga
+    tsb: float  # forma
+
+
+class FormStatus(BaseModel):
+    text: str
+    status: str
+
+
+class PmcResponse(BaseModel):
+    days: int
+    ctl: float  # valores de hoje
+    atl: float
+    tsb: float
+    form: FormStatus
+    points: list[PmcPoint]
+
+
+class LoadRiskPoint(BaseModel):
+    date: date
+    tss: float
+    monotony: Optional[float] = None  # média / desvio dos últimos 7 dias
+    strain: Optional[float] = None  # TSS de 7 dias x monotonia
+    acwr: Optional[float] = None  # carga aguda (7 d) / crônica (28 d)
+
+
+class LoadRiskResponse(BaseModel):
+    days: Optional[int] = None  # None = histórico inteiro
+    monotony: Optional[float] = None  # valores de hoje
+    strain: Optional[float] = None
+    acwr: Optional[float] = None
+    points: list[LoadRiskPoint]
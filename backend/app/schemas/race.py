@@ -46,3 +46,36 @@ class RaceResponse(BaseModel):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class TaperPoint(BaseModel):
+    date: date
+    tss: float  # TSS planejado do dia
+    ctl: float
+    atl: float
+    tsb: float
+
+
+class TaperCandidate(BaseModel):
+    shape: str  # step, two_step, linear, exponential
+    length_days: int
+    intensity: float  # fração da carga de manutenção (CTL atual)
+    start_date: date
+    race_tsb: float  # forma na manhã da prova
+    race_ctl: float
+    ctl_loss_pct: float  # em relação ao pico de CTL da projeção
+    in_target: bool
+    score: float  # menor = melhor
+    points: list[TaperPoint]
+
+
+class TaperResponse(BaseModel):
+    race_id: uuid.UUID
+    race_date: date
+    ctl: float  # valores de hoje
+    atl: float
+    tsb: float
+    target_tsb_min: float
+    target_tsb_max: float
+    evaluated: int  # candidatos avaliados
+    candidates: list[TaperCandidate]
@@ -5,6 +5,7 @@ from typing import Optional
 from pydantic import BaseModel, EmailStr
 
 from app.models.user import SportModality, ExperienceLevel
+from app.schemas.job import JobResponse
 
 
 class UserCreate(BaseModel):
@@ -65,6 +66,10 @@ class UserResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class ProfileUpdateResponse(UserResponse):
+    recompute_job: Optional[JobResponse] = None  # recálculo disparado pela mudança de limiares
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -0,0 +1,94 @@
+"""
+Activity Builder — monta os objetos ORM a partir da saída da ingestão.
+
+Compartilhado entre o upload unitário e a importação em lote (ZIP).
+"""
+import uuid
+from typing import Any, Optional
+
+from app.models.activity import Activity
+from app.models.activity_stream import ActivityStreamLevel
+from app.models.best_effort import BestEffort
+from app.models.training_plan import SportType
+
+_SPORT_VALUES = {e.value for e in SportType}
+
+# Campos copiados 1:1 do dict da ingestão para o Activity
+_PARSED_FIELDS = (
+    "end_time",
+    "total_moving_seconds",
+    "avg_pace_min_km", "max_pace_min_km", "normalized_graded_pace_min_km",
+    "normalized_graded_pace_s_km", "avg_speed_kmh", "max_speed_kmh",
+    "avg_hr", "max_hr", "min_hr", "hr_zone_distribution", "time_in_zones_seconds",
+    "power_time_in_zones_seconds", "pace_time_in_zones_seconds", "aerobic_decoupling_pct",
+    "avg_cadence", "max_cadence",
+    "avg_power", "max_power", "normalized_power", "intensity_factor", "variability_index", "power_curve",
+    "cp_watts", "w_prime_j", "min_wbal_pct",
+    "total_ascent_m", "total_descent_m",
+    "avg_temperature_c", "max_temperature_c",
+    "calories", "tss", "trimp", "training_effect_aerobic", "training_effect_anaerobic",
+    "avg_ground_contact_time_ms", "avg_stride_length_m", "avg_vertical_oscillation_mm",
+    "avg_vertical_ratio_pct", "avg_ground_contact_balance_pct",
+    "avg_stroke_rate", "pool_length_m", "total_lengths", "swolf",
+    "hr_stream", "pace_stream", "graded_pace_stream", "power_stream", "cadence_stream", "altitude_stream", "gps_stream",
+    "wbal_stream",
+    "laps_data", "intervals_data",
+)
+
+
+def build_activity(
+    user_id: uuid.UUID,
+    parsed: dict[str, Any],
+    file_key: str,
+    content_hash: Optional[str] = None,
+    **extra: Any,
+) -> Activity:
+    """
+    Activity from the ingestion output. `extra` carries user-supplied
+    fields (feeling, perceived_effort, athlete_notes, planned_session_id).
+    """
+    sport = parsed["sport"]
+    sport_enum = SportType(sport) if sport in _SPORT_VALUES else SportType.RUN
+
+    return Activity(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        sport=sport_enum,
+        title=parsed["title"],
+        start_time=parsed["start_time"],
+        source_file=file_key,
+        source_format=parsed["source_format"],
+        content_hash=content_hash,
+        total_elapsed_seconds=parsed["total_elapsed_seconds"],
+        total_timer_seconds=parsed["total_timer_seconds"],
+        total_distance_meters=parsed["total_distance_meters"],
+        **{field: parsed.get(field) for field in _PARSED_FIELDS},
+        **extra,
+    )
+
+
+def build_stream_levels(activity_id: uuid.UUID, parsed: dict[str, Any]) -> list[ActivityStreamLevel]:
+    """Zoom-pyramid rows for one activity (see downsample.build_pyramid)."""
+    return [
+        ActivityStreamLevel(activity_id=activity_id, **level)
+        for level in parsed.get("stream_levels", [])
+    ]
+
+
+def build_best_efforts(activity: Activity, parsed: dict[str, Any]) -> list[BestEffort]:
+    """Best-effort index rows for one activity (see analytics.best_efforts)."""
+    return [
+        BestEffort(
+            user_id=activity.user_id,
+            activity_id=activity.id,
+            sport=activity.sport,
+            start_time=activity.start_time,
+            **effort,
+        )
+        for effort in parsed.get("best_efforts", [])
+    ]
+
+
+def build_related(activity: Activity, parsed: dict[str, Any]) -> list:
+    """Rows inserted alongside the Activity: stream levels + best efforts."""
+    return [*build_stream_levels(activity.id, parsed), *build_best_efforts(activity, parsed)]
@@ -36,6 +36,25 @@ def _format_duration(seconds: int) -> str:
     return f"{m}min"
 
 
+def _format_intervals(intervals: Optional[list]) -> str:
+    """Uma linha por bloco de trabalho detectado (duração, distância, pace/potência, FC)."""
+    lines = []
+    for block in intervals or []:
+        if block.get("type") != "work":
+            continue
+        parts = [_format_duration(block["duration_s"]) if block["duration_s"] >= 60 else f"{block['duration_s']}s"]
+        if block.get("distance_m"):
+            parts.append(f"{block['distance_m'] / 1000:.2f}km")
+        if block.get("avg_power"):
+            parts.append(f"{block['avg_power']}W")
+        elif block.get("avg_pace_min_km"):
+            parts.append(f"{_format_pace(block['avg_pace_min_km'] * 60)}/km")
+        if block.get("avg_hr"):
+            parts.append(f"FC {block['avg_hr']}bpm")
+        lines.append(f"- #{block['interval']}: " + " | ".join(parts))
+    return "\n".join(lines)
+
+
 async def analyze_activity(
     activity_data: dict,
     planned_session: Optional[dict],
@@ -72,9 +91,17 @@ ATIVIDADE:
 - Cadência: {activity_data.get('avg_cadence', 'N/A')}spm
 - Potência Média: {activity_data.get('avg_power', 'N/A')}W | NP: {activity_data.get('normalized_power', 'N/A')}W
 - IF: {activity_data.get('intensity_factor', 'N/A')} | VI: {activity_data.get('variability_index', 'N/A')}
+- W′bal mínimo: {activity_data.get('min_wbal_pct', 'N/A')}% de W′ (CP {activity_data.get('cp_watts', 'N/A')}W, W′ {activity_data.get('w_prime_j', 'N/A')}J)
 - Elevação: +{activity_data.get('total_ascent_m', 0)}m
-- HR Drift: {activity_data.get('hr_drift', 'N/A')}%
+- Desacoplamento aeróbico (Pa:HR): {activity_data.get('aerobic_decoupling_pct', 'N/A')}% (saída/FC, 2ª metade vs 1ª, sem aquecimento)
 - Sensação: {activity_data.get('feeling', 'N/A')} | RPE: {activity_data.get('perceived_effort', 'N/A')}
+"""
+
+    intervals = _format_intervals(activity_data.get("intervals_data"))
+    if intervals:
+        user_msg += f"""
+INTERVALOS DETECTADOS (blocos de trabalho):
+{intervals}
 """
 
     if planned_session:
@@ -97,7 +124,7 @@ Responda em JSON com estas chaves:
     "heart_rate": "análise da FC",
     "cadence": "análise da cadência",
     "power": "análise da potência (se aplicável)",
-    "consistency": "consistência dos splits"
+    "consistency": "consistência dos splits e da execução dos intervalos"
   },
   "planned_vs_actual": {
     "compliance_pct": 0-100,
@@ -107,7 +134,7 @@ Responda em JSON com estas chaves:
   "warnings": ["alertas/atenções"],
   "recommendations": ["recomendações para próximos treinos"],
   "fatigue_indicators": {
-    "hr_drift": "interpretação do HR drift",
+    "aerobic_decoupling": "interpretação do desacoplamento aeróbico (Pa:HR)",
     "estimated_fatigue": "baixa/moderada/alta"
   }
 }"""
@@ -150,7 +177,8 @@ async def analyze_week(
         activities_text += (
             f"- {act.get('sport', 'N/A')}: {_format_duration(act.get('total_timer_seconds', 0))} | "
             f"{act.get('total_distance_meters', 0) / 1000:.1f}km | "
-            f"TSS: {act.get('tss', 0):.0f} | FC: {act.get('avg_hr', 'N/A')}bpm\n"
+            f"TSS: {act.get('tss', 0):.0f} | FC: {act.get('avg_hr', 'N/A')}bpm | "
+            f"Pa:HR: {act.get('aerobic_decoupling_pct', 'N/A')}%\n"
         )
 
     user_msg = f"""Analise a semana de treino completa.
@@ -435,6 +463,11 @@ async def analyze_activity_background(activity_id: uuid.UUID, db_url: str):
             "tss": activity.tss,
             "avg_cadence": activity.avg_cadence,
             "total_ascent_m": activity.total_ascent_m,
+            "aerobic_decoupling_pct": activity.aerobic_decoupling_pct,
+            "intervals_data": activity.intervals_data,
+            "min_wbal_pct": activity.min_wbal_pct,
+            "cp_watts": activity.cp_watts,
+            "w_prime_j": activity.w_prime_j,
             "feeling": activity.feeling,
             "perceived_effort": activity.perceived_effort,
         }
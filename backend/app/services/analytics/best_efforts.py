@@ -0,0 +1,103 @@
+"""
+Best Efforts — melhores esforços por atividade, calculados na ingestão.
+
+power: curva média-máxima (watts) nas durações de POWER_CURVE_DURATIONS,
+sobre o stream de potência em 1 Hz.
+pace: menor tempo (s) para as distâncias de PACE_DISTANCES (corrida e
+natação), sobre a distância acumulada.
+
+critical_power_at: CP/W′ numa data, ajustados aos esforços de potência dos
+CP_FIT_DAYS dias anteriores a ela.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+import numpy as np
+
+from app.services.analytics.kernels import fastest_for_distance, fit_critical_power, mean_max
+from app.services.parsers.streams import ActivityStreams
+
+POWER_CURVE_DURATIONS = (1, 5, 10, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 5400, 7200)
+
+# Janela de esforços do ajuste CP/W′
+CP_FIT_DAYS = 90
+
+# W′ típico de ciclista treinado, usado com o FTP quando não há ajuste
+DEFAULT_W_PRIME_J = 20000.0
+
+# Distâncias-padrão (m) por esporte
+PACE_DISTANCES = {
+    "run": (400, 1000, 1609, 5000, 10000, 21097, 42195),
+    "swim": (100, 200, 400, 750, 1000, 1500, 1900, 3800),
+}
+
+
+def calc_power_curve(streams: ActivityStreams) -> Optional[list[dict[str, Any]]]:
+    """
+    Mean-maximal power at the fixed durations, from the 1 Hz power stream
+    (segundos sem dado contam como 0). Returns best-effort entries (metric="power").
+    """
+    if streams.power is None:
+        return None
+
+    curve = mean_max(np.nan_to_num(streams.power), POWER_CURVE_DURATIONS)
+    if not curve:
+        return None
+
+    return [
+        {"metric": "power", "target": d, "value": round(watts, 1), "offset_s": streams.t0 + offset}
+        for d, (watts, offset) in curve.items()
+    ]
+
+
+def calc_pace_efforts(streams: ActivityStreams, sport: str) -> Optional[list[dict[str, Any]]]:
+    """
+    Fastest time for each standard distance of the sport, from the
+    cumulative distance stream. Returns best-effort entries (metric="pace").
+    """
+    distances = PACE_DISTANCES.get(sport)
+    t, dist = streams.valid("distance")
+    if not distances or len(t) < 2:
+        return None
+
+    fastest = fastest_for_distance(t, dist, distances)
+    if not fastest:
+        return None
+
+    return [
+        {"metric": "pace", "target": int(d), "value": round(seconds, 1), "offset_s": int(start)}
+        for d, (seconds, start) in fastest.items()
+    ]
+
+
+def critical_power_at(
+    efforts: Optional[dict[str, np.ndarray]],
+    at: datetime,
+    ftp: Optional[float],
+    days: int = CP_FIT_DAYS,
+) -> dict[str, Any]:
+    """
+    CP/W′ as of `at`: ajuste (kernels.fit_critical_power) aos melhores watts
+    por duração dos esforços com início em [at - days, at).
+
+    `efforts`: {"time": datetime64[s], "target", "value"} (ver
+    services.critical_power.load_power_efforts). Sem pontos suficientes, o
+    FTP faz o papel de CP com DEFAULT_W_PRIME_J. Retorna {"cp", "w_prime",
+    "source" (fit | ftp | None), "efforts": [(duração, watts), ...]}.
+    """
+    points: list[tuple[int, float]] = []
+    if efforts is not None and len(efforts["time"]):
+        end = np.datetime64(at, "s")
+        window = (efforts["time"] >= end - np.timedelta64(timedelta(days=days))) & (efforts["time"] < end)
+        if window.any():
+            targets, index = np.unique(efforts["target"][window], return_inverse=True)
+            best = np.full(len(targets), -np.inf)
+            np.maximum.at(best, index, efforts["value"][window])
+            points = list(zip(targets.tolist(), best.tolist()))
+
+    fit = fit_critical_power([t for t, _ in points], [w for _, w in points]) if points else None
+    if fit is not None:
+        return {"cp": fit[0], "w_prime": fit[1], "source": "fit", "efforts": points}
+    if ftp:
+        return {"cp": float(ftp), "w_prime": DEFAULT_W_PRIME_J, "source": "ftp", "efforts": points}
+    return {"cp": None, "w_prime": None, "source": None, "efforts": points}
@@ -0,0 +1,553 @@
+"""
+Kernels — núcleos numéricos (NumPy) compartilhados pelos parsers e métricas.
+
+Séries de atividade chegam com falhas (sensor caindo, smart recording,
+auto-pause). Os kernels trabalham numa grade de 1 Hz reamostrada pelos
+timestamps, não pelo índice da amostra, para que uma janela de 30 s
+cubra de fato 30 s.
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+
+# Falha curta (amostra perdida / smart recording): repete o último valor.
+# Acima disso a falha é parada e vira 0.
+DEFAULT_MAX_GAP_S = 3.0
+
+NP_WINDOW_S = 30
+
+# Alinhamento de séries: intervalo entre amostras acima disso é pausa
+ALIGN_MAX_GAP_S = 10.0
+
+# Grade: altitude suavizada e inclinação medida em janelas de 10 s;
+# fora de ±45% o custo de Minetti deixa de valer (ruído de GPS/barômetro)
+ALT_SMOOTH_S = 5
+GRADE_WINDOW_S = 10
+MAX_GRADE = 0.45
+
+
+# ============================================================
+# Reamostragem em 1 Hz
+# ============================================================
+def resample_1hz(
+    values: Sequence[float],
+    t: Optional[Sequence[float]] = None,
+    max_gap_s: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Values on a 1 Hz grid from the first to the last timestamp.
+
+    Cada segundo recebe a última amostra até ele (sample-and-hold); segundos
+    a mais de `max_gap_s` da última amostra viram 0. Sem `max_gap_s`, usa
+    max(DEFAULT_MAX_GAP_S, 3 x mediana do intervalo) — cobre streams já
+    reduzidos (LTTB), onde as amostras ficam espaçadas.
+    Amostras com valor ou tempo NaN são ignoradas. Sem `t`, assume 1 Hz.
+    """
+    v = np.asarray(values, dtype=np.float64)
+    if t is None:
+        return v[~np.isnan(v)]
+
+    t = np.asarray(t, dtype=np.float64)
+    ok = ~np.isnan(v) & ~np.isnan(t)
+    v, t = v[ok], t[ok]
+    if len(t) == 0:
+        return v
+    if np.any(np.diff(t) < 0):
+        order = np.argsort(t, kind="stable")
+        v, t = v[order], t[order]
+
+    sec = np.floor(t - t[0]).astype(np.int64)
+    if max_gap_s is None:
+        step = float(np.median(np.diff(sec))) if len(sec) > 1 else 1.0
+        max_gap_s = max(DEFAULT_MAX_GAP_S, 3 * step)
+
+    grid = np.arange(sec[-1] + 1)
+    last = np.searchsorted(sec, grid, side="right") - 1
+    out = v[last]
+    out[grid - sec[last] > max_gap_s] = 0.0
+    return out
+
+
+def sample_on_grid(
+    values: Sequence[float],
+    t: Sequence[float],
+    grid: np.ndarray,
+    max_gap_s: float = ALIGN_MAX_GAP_S,
+    interpolate: bool = False,
+) -> np.ndarray:
+    """
+    Values at absolute times `grid` (sample-and-hold), for aligning several
+    series on one shared 1 Hz axis.
+
+    Diferente do resample_1hz, a grade é do chamador e o que não tem amostra
+    vira NaN: antes da 1ª / depois da última amostra e dentro de intervalos
+    entre amostras maiores que `max_gap_s` (pausa, sensor caído) — assim a
+    falha de um sensor não conta como zero nas médias, e smart recording
+    (amostras a cada poucos segundos) continua contínuo. Com `interpolate`,
+    interpolação linear entre amostras em vez de repetir a última (séries
+    acumuladas, como distância).
+    """
+    v = np.asarray(values, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)
+    ok = ~np.isnan(v) & ~np.isnan(t)
+    v, t = v[ok], t[ok]
+    out = np.full(len(grid), np.nan)
+    if len(t) == 0:
+        return out
+    if np.any(np.diff(t) < 0):
+        order = np.argsort(t, kind="stable")
+        v, t = v[order], t[order]
+
+    last = np.searchsorted(t, grid, side="right") - 1
+    idx = np.maximum(last, 0)
+    gap_after = np.append(np.diff(t), np.inf)[idx]
+    has = (last >= 0) & ((grid == t[idx]) | (gap_after <= max_gap_s))
+    out[has] = v[idx[has]]
+    if interpolate:
+        inner = has & (gap_after > 0) & np.isfinite(gap_after)
+        i = idx[inner]
+        out[inner] += (v[i + 1] - v[i]) * (grid[inner] - t[i]) / gap_after[inner]
+    return out
+
+
+# ============================================================
+# Média móvel (soma acumulada, O(n))
+# ============================================================
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over `window` samples; len(x) - window + 1 values."""
+    if len(x) < window:
+        return np.empty(0)
+    c = np.concatenate(([0.0], np.cumsum(x, dtype=np.float64)))
+    return (c[window:] - c[:-window]) / window
+
+
+# ============================================================
+# Normalized Power
+# ============================================================
+def normalized_power(
+    power: Sequence[float],
+    t: Optional[Sequence[float]] = None,
+    max_gap_s: Optional[float] = None,
+) -> Optional[int]:
+    """
+    NP = (média de (média móvel de 30 s)^4)^(1/4), sobre a grade de 1 Hz.
+
+    Retorna None com menos de 30 s de dados.
+    """
+    x = resample_1hz(power, t, max_gap_s)
+    rolling = rolling_mean(x, NP_WINDOW_S)
+    if len(rolling) == 0:
+        return None
+    return int(round(float(np.mean(rolling**4)) ** 0.25))
+
+
+# ============================================================
+# Graded pace (custo energético de Minetti)
+# ============================================================
+def minetti_cost_ratio(grade: np.ndarray) -> np.ndarray:
+    """
+    Energy cost of running at `grade` relative to flat ground (Minetti 2002).
+
+    C(i) = 155.4i^5 - 30.4i^4 - 43.3i^3 + 46.3i^2 + 19.5i + 3.6 (J/kg/m);
+    a razão C(i) / C(0) converte velocidade real em velocidade no plano.
+    """
+    i = np.clip(grade, -MAX_GRADE, MAX_GRADE)
+    cost = ((((155.4 * i - 30.4) * i - 43.3) * i + 46.3) * i + 19.5) * i + 3.6
+    return cost / 3.6
+
+
+def graded_speed(
+    t_dist: Sequence[float],
+    distance: Sequence[float],
+    t_alt: Optional[Sequence[float]] = None,
+    altitude: Optional[Sequence[float]] = None,
+    max_gap_s: Optional[float] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Flat-equivalent speed (m/s) on a 1 Hz grid, from cumulative distance
+    and altitude (each with its own timestamps).
+
+    Distância e altitude são interpoladas na mesma grade — daí saem
+    velocidade e inclinação alinhadas, segundo a segundo. Segundos dentro
+    de uma falha maior que `max_gap_s` (pausa) ficam com velocidade 0, como
+    no resample_1hz. Sem altitude, devolve a velocidade real.
+    Retorna (grade de tempo relativa ao 1º ponto, velocidade).
+    """
+    t = np.asarray(t_dist, dtype=np.float64)
+    d = np.asarray(distance, dtype=np.float64)
+    ok = ~np.isnan(t) & ~np.isnan(d)
+    t, d = t[ok], d[ok]
+    if len(t) < 2:
+        return np.empty(0), np.empty(0)
+    if np.any(np.diff(t) < 0):
+        order = np.argsort(t, kind="stable")
+        t, d = t[order], d[order]
+    d = np.maximum.accumulate(d)
+
+    t0 = t[0]
+    grid = np.arange(int(t[-1] - t0) + 1, dtype=np.float64)
+    rel = t - t0
+    d1 = np.interp(grid, rel, d)
+    speed = np.diff(d1, prepend=d1[0])
+
+    if max_gap_s is None:
+        step = float(np.median(np.diff(rel)))
+        max_gap_s = max(DEFAULT_MAX_GAP_S, 3 * step)
+    seg = np.searchsorted(rel, grid, side="left")
+    gap = np.diff(rel, prepend=rel[0])[np.minimum(seg, len(rel) - 1)]
+    speed[gap > max_gap_s] = 0.0
+
+    if t_alt is None or altitude is None:
+        return grid, speed
+    ta = np.asarray(t_alt, dtype=np.float64)
+    alt = np.asarray(altitude, dtype=np.float64)
+    ok = ~np.isnan(ta) & ~np.isnan(alt)
+    if ok.sum() < 2:
+        return grid, speed
+    a1 = np.interp(grid, ta[ok] - t0, alt[ok])
+
+    # média móvel centrada (bordas repetidas) contra o ruído de altitude
+    half = ALT_SMOOTH_S // 2
+    padded = np.concatenate((np.full(half, a1[0]), a1, np.full(half, a1[-1])))
+    a1 = rolling_mean(padded, 2 * half + 1)
+
+    # inclinação em janela centrada; trechos quase parados ficam planos
+    w = GRADE_WINDOW_S // 2
+    lo = np.maximum(np.arange(len(grid)) - w, 0)
+    hi = np.minimum(np.arange(len(grid)) + w, len(grid) - 1)
+    run = d1[hi] - d1[lo]
+    grade = np.divide(a1[hi] - a1[lo], run, out=np.zeros_like(run), where=run > 1.0)
+
+    return grid, speed * minetti_cost_ratio(grade)
+
+
+def normalized_graded_speed(speed: np.ndarray) -> Optional[float]:
+    """
+    NGP as a speed (m/s): 30 s rolling mean and 4th-power mean, as NP.
+
+    Retorna None com menos de 30 s de dados.
+    """
+    rolling = rolling_mean(speed, NP_WINDOW_S)
+    if len(rolling) == 0:
+        return None
+    return float(np.mean(rolling**4)) ** 0.25
+
+
+# ============================================================
+# Média-máxima (curva potência-duração)
+# ============================================================
+def mean_max(x: np.ndarray, durations: Sequence[int]) -> dict[int, tuple[float, int]]:
+    """
+    Best average over each window length in `durations` (amostras de 1 s).
+
+    Uma soma acumulada e, para cada duração d, max(c[i+d] - c[i]) / d —
+    O(n) por duração. Retorna {d: (média, início)}; durações maiores que a
+    série ficam de fora.
+    """
+    n = len(x)
+    c = np.concatenate(([0.0], np.cumsum(x, dtype=np.float64)))
+    out = {}
+    for d in durations:
+        if d > n or d <= 0:
+            continue
+        sums = c[d:] - c[:-d]
+        i = int(np.argmax(sums))
+        out[int(d)] = (float(sums[i]) / d, i)
+    return out
+
+
+# ============================================================
+# Menor tempo para cobrir uma distância (janela por distância)
+# ============================================================
+def fastest_for_distance(t: np.ndarray, d: np.ndarray, distances: Sequence[float]) -> dict[float, tuple[float, float]]:
+    """
+    Shortest time to cover each distance, over cumulative distance `d`
+    at times `t`.
+
+    Janela de dois ponteiros: para cada ponto final j, o ponteiro inicial é
+    o instante em que a distância valia d[j] - D — todos achados de uma vez
+    (np.interp sobre d, que é monotônica), com interpolação linear entre
+    amostras. Retorna {D: (segundos, início)}; distâncias maiores que o
+    total ficam de fora.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    d = np.maximum.accumulate(np.asarray(d, dtype=np.float64))  # ruído de GPS não anda para trás
+    out = {}
+    if len(d) < 2:
+        return out
+    for dist in distances:
+        ends = d - d[0] >= dist
+        if not ends.any():
+            continue
+        t_start = np.interp(d[ends] - dist, d, t)
+        elapsed = t[ends] - t_start
+        i = int(np.argmin(elapsed))
+        if elapsed[i] > 0:
+            out[dist] = (float(elapsed[i]), float(t_start[i]))
+    return out
+
+
+# ============================================================
+# Tempo em zonas (histograma ponderado pelo tempo)
+# ============================================================
+ZONE_MAX_GAP_S = 10.0
+
+
+def time_in_zones(
+    values: Sequence[float],
+    t: Sequence[float],
+    lower: Sequence[float],
+    upper: Sequence[float],
+    max_gap_s: float = ZONE_MAX_GAP_S,
+) -> np.ndarray:
+    """
+    Seconds spent in each zone [lower[k], upper[k]] (limites inclusivos).
+
+    Cada amostra i recebe o intervalo t[i] - t[i-1], limitado a `max_gap_s`
+    (pausas não contam). A zona sai de um searchsorted sobre os limites
+    superiores — em empate vale a zona de menor limite superior — e os
+    segundos são somados por bincount. Valores fora de todas as zonas ou
+    NaN não contam.
+    """
+    v = np.asarray(values, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)
+    lower = np.asarray(lower, dtype=np.float64)
+    upper = np.asarray(upper, dtype=np.float64)
+    n_zones = len(upper)
+    if len(v) < 2:
+        return np.zeros(n_zones)
+
+    dt = np.clip(np.diff(t), 0.0, max_gap_s)
+    v = v[1:]
+
+    order = np.argsort(upper, kind="stable")
+    k = np.searchsorted(upper[order], v, side="left")
+    inside = k < n_zones
+    zone = order[np.minimum(k, n_zones - 1)]
+    inside &= v >= lower[zone]  # NaN falha aqui também
+
+    return np.bincount(zone[inside], weights=dt[inside], minlength=n_zones)
+
+
+# ============================================================
+# Média exponencial (CTL/ATL do PMC)
+# ============================================================
+EWMA_BLOCK = 128
+
+
+def ewma(x: Sequence[float], time_constant: float, initial=0.0, block: int = EWMA_BLOCK) -> np.ndarray:
+    """
+    Exponentially weighted average y[n] = y[n-1] + (x[n] - y[n-1]) / time_constant.
+
+    Filtro linear de 1ª ordem sem laço por dia: o eixo final é quebrado em
+    blocos de `block` amostras; dentro do bloco a resposta sai de um produto
+    por uma matriz triangular de potências de a = 1 - 1/time_constant e o
+    valor que entra em cada bloco, de uma segunda matriz sobre os finais de
+    bloco. Só aparecem potências a^k <= 1 (sem overflow em históricos
+    longos). Eixos iniciais são séries independentes (ex.: cenários), com
+    `initial` escalar ou um valor por série.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    lead, n = x.shape[:-1], x.shape[-1]
+    y0 = np.broadcast_to(np.asarray(initial, dtype=np.float64), lead)
+    if n == 0:
+        return np.zeros(x.shape)
+
+    a = 1.0 - 1.0 / time_constant
+    block = min(block, n)
+    n_blocks = -(-n // block)
+    padded = np.zeros(lead + (n_blocks * block,))
+    padded[..., :n] = x
+    blocks = padded.reshape(lead + (n_blocks, block))
+
+    # resposta de cada bloco partindo de zero: z[j] = (1-a) * sum_k a^(j-k) x[k]
+    lag = np.arange(block)[:, None] - np.arange(block)[None, :]
+    inner = np.where(lag >= 0, a ** np.maximum(lag, 0), 0.0)
+    z = (1.0 - a) * blocks @ inner.T
+
+    # valor ao fim de cada bloco: mesma recorrência com fator a^block
+    blag = np.arange(n_blocks)[:, None] - np.arange(n_blocks)[None, :]
+    outer = np.where(blag >= 0, (a**block) ** np.maximum(blag, 0), 0.0)
+    ends = z[..., -1] @ outer.T + y0[..., None] * (a**block) ** np.arange(1, n_blocks + 1)
+
+    carry = np.concatenate([y0[..., None], ends[..., :-1]], axis=-1)
+    y = z + carry[..., None] * a ** np.arange(1, block + 1)
+    return y.reshape(lead + (n_blocks * block,))[..., :n]
+
+
+# ============================================================
+# Desacoplamento aeróbico (Pa:HR / Pw:HR)
+# ============================================================
+DECOUPLING_WARMUP_S = 600
+DECOUPLING_MIN_S = 1200
+
+
+def aerobic_decoupling(
+    hr: np.ndarray,
+    output: np.ndarray,
+    warmup_s: int = DECOUPLING_WARMUP_S,
+    min_duration_s: int = DECOUPLING_MIN_S,
+) -> Optional[float]:
+    """
+    Decoupling (%) of output (velocidade ou potência) vs HR: quanto a razão
+    saída/FC caiu da 1ª para a 2ª metade.
+
+    `hr` e `output` alinhados segundo a segundo (sample_on_grid; NaN =
+    sem dado). Só contam segundos em movimento com os dois sinais; os
+    primeiros `warmup_s` deles (aquecimento) saem e o restante é dividido
+    em duas metades de mesmo tempo em movimento — não de mesmo número de
+    amostras. None com menos de `min_duration_s` analisáveis.
+    """
+    moving = (hr > 0) & (output > 0)  # NaN falha aqui também
+    kept = moving & (np.cumsum(moving) > warmup_s)
+    elapsed = np.cumsum(kept)
+    total = int(elapsed[-1]) if len(elapsed) else 0
+    if total < min_duration_s:
+        return None
+
+    first = kept & (elapsed <= total // 2)
+    second = kept & (elapsed > total // 2)
+    ef_first = output[first].mean() / hr[first].mean()
+    ef_second = output[second].mean() / hr[second].mean()
+    return float((ef_first - ef_second) / ef_first * 100)
+
+
+# ============================================================
+# Detecção de intervalos (blocos de trabalho / recuperação)
+# ============================================================
+INTERVAL_SMOOTH_S = 20
+INTERVAL_MIN_WORK_S = 30
+INTERVAL_MIN_RECOVERY_S = 20
+INTERVAL_MIN_CONTRAST = 1.2
+INTERVAL_HIST_BINS = 256
+
+
+def _otsu_threshold(x: np.ndarray, bins: int = INTERVAL_HIST_BINS) -> float:
+    """Threshold maximizing the between-class variance of `x` (Otsu, por histograma)."""
+    counts, edges = np.histogram(x, bins=bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    w0 = np.cumsum(counts)[:-1].astype(np.float64)
+    w1 = len(x) - w0
+    s0 = np.cumsum(counts * centers)[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        m0 = s0 / w0
+        m1 = (s0[-1] + counts[-1] * centers[-1] - s0) / w1
+        between = np.where((w0 > 0) & (w1 > 0), w0 * w1 * (m0 - m1) ** 2, -1.0)
+    return float(edges[1 + int(np.argmax(between))])
+
+
+def segment_intervals(
+    x: np.ndarray,
+    smooth_s: int = INTERVAL_SMOOTH_S,
+    min_work_s: int = INTERVAL_MIN_WORK_S,
+    min_recovery_s: int = INTERVAL_MIN_RECOVERY_S,
+    min_contrast: float = INTERVAL_MIN_CONTRAST,
+) -> np.ndarray:
+    """
+    Work blocks of a 1 Hz output signal (potência ou velocidade) as
+    (início, fim) em índices, fim exclusivo; shape (k, 2).
+
+    Média móvel centrada de `smooth_s`, limiar de Otsu sobre os segundos em
+    movimento e run-lengths do sinal acima dele; recuperações mais curtas que
+    `min_recovery_s` são fundidas e trabalhos mais curtos que `min_work_s`
+    descartados. Se a média bruta nos blocos não passar de `min_contrast`
+    vezes a média em movimento fora deles (treino contínuo), não há
+    intervalos. Tudo O(n) — sem
+    laço por amostra nem por candidato de ponto de mudança.
+    """
+    x = np.nan_to_num(np.asarray(x, dtype=np.float64), nan=0.0)  # sem dado = parado
+    none = np.empty((0, 2), dtype=np.int64)
+    if len(x) < max(smooth_s, min_work_s):
+        return none
+
+    half = smooth_s // 2
+    smooth = rolling_mean(np.pad(x, (half, smooth_s - 1 - half), mode="edge"), smooth_s)
+    moving = smooth[smooth > 0]
+    if len(moving) < min_work_s or moving.min() == moving.max():
+        return none
+
+    threshold = _otsu_threshold(moving)
+    edges = np.flatnonzero(np.diff((smooth >= threshold).astype(np.int8), prepend=0, append=0))
+    starts, ends = edges[::2], edges[1::2]
+
+    # recuperações curtas viram parte do bloco de trabalho
+    keep = starts[1:] - ends[:-1] >= min_recovery_s
+    starts = starts[np.concatenate(([True], keep))]
+    ends = ends[np.concatenate((keep, [True]))]
+
+    long_enough = ends - starts >= min_work_s
+    starts, ends = starts[long_enough], ends[long_enough]
+    if len(starts) == 0:
+        return none
+
+    # contraste pelo sinal bruto: trabalho vs o que se fez em movimento fora
+    # dele (aquecimento, recuperações, desaquecimento). Paradas não contam —
+    # uma rodagem com semáforos ou um pedal com descidas não viram intervalos.
+    in_work = np.zeros(len(x) + 1, dtype=np.int64)
+    np.add.at(in_work, starts, 1)
+    np.add.at(in_work, ends, -1)
+    in_work = np.cumsum(in_work[:-1]) > 0
+    work, rest = x[in_work & (x > 0)], x[~in_work & (x > 0)]
+    if len(rest) < min_work_s or work.mean() < min_contrast * rest.mean():
+        return none
+    return np.column_stack((starts, ends)).astype(np.int64)
+
+
+# ============================================================
+# Critical Power / W′ balance
+# ============================================================
+CP_FIT_MIN_S = 120
+CP_FIT_MAX_S = 1200
+CP_FIT_MIN_POINTS = 3
+
+# maior expoente por bloco em w_prime_balance (exp(700) ~ limite do float64)
+WBAL_MAX_EXP = 600.0
+
+
+def fit_critical_power(durations: Sequence[float], watts: Sequence[float]) -> Optional[tuple[float, float]]:
+    """
+    CP (W) and W′ (J) from mean-maximal efforts, pelo modelo linear
+    trabalho-tempo: trabalho = CP * t + W′ (mínimos quadrados).
+
+    Só entram durações entre CP_FIT_MIN_S e CP_FIT_MAX_S (2–20 min, onde o
+    modelo de 2 parâmetros vale). None com menos de CP_FIT_MIN_POINTS
+    pontos ou ajuste sem sentido físico (CP ou W′ <= 0).
+    """
+    t = np.asarray(durations, dtype=np.float64)
+    p = np.asarray(watts, dtype=np.float64)
+    ok = (t >= CP_FIT_MIN_S) & (t <= CP_FIT_MAX_S) & (p > 0)
+    if ok.sum() < CP_FIT_MIN_POINTS:
+        return None
+    cp, w_prime = np.polyfit(t[ok], p[ok] * t[ok], 1)
+    if cp <= 0 or w_prime <= 0:
+        return None
+    return float(cp), float(w_prime)
+
+
+def w_prime_balance(power: np.ndarray, cp: float, w_prime: float) -> np.ndarray:
+    """
+    W′bal (J) a cada segundo, pelo modelo diferencial de Skiba (2015).
+
+    Acima de CP o gasto é P - CP; abaixo, o que falta recuperar decai com
+    exp(-(CP - P) / W′) por segundo. O gasto acumulado é a recorrência afim
+    e[i] = a[i] * e[i-1] + b[i], resolvida sem laço por segundo:
+    e = exp(L) * cumsum(b * exp(-L)), L = cumsum(log a). Os blocos limitam L
+    a WBAL_MAX_EXP para o exp(-L) não estourar; um treino típico cabe num só.
+    `power` em 1 Hz; NaN (sem dado) conta como 0 W. Pode ficar negativo
+    quando o atleta supera o modelo.
+    """
+    p = np.nan_to_num(np.asarray(power, dtype=np.float64), nan=0.0)
+    above = p - cp
+    log_a = np.minimum(above, 0.0) / w_prime
+    b = np.maximum(above, 0.0)
+
+    block = max(1, int(WBAL_MAX_EXP * w_prime / cp))
+    expended = np.empty_like(p)
+    carry = 0.0
+    for start in range(0, len(p), block):
+        stop = start + block
+        L = np.cumsum(log_a[start:stop])
+        e = np.exp(L) * (carry + np.cumsum(b[start:stop] * np.exp(-L)))
+        expended[start:stop] = e
+        carry = float(e[-1])
+    return w_prime - expended
@@ -0,0 +1,134 @@
+"""
+Load Metrics — TSS, IF e TRIMP em lote (NumPy), uma chamada para N atividades.
+
+Única implementação das fórmulas de carga: a ingestão (1 atividade), o
+recálculo por mudança de limiares (lotes) e o TSSCalculator (dicts no
+formato Strava) passam todos por batch_load_metrics.
+
+Entradas em colunas alinhadas (uma posição por atividade); valores
+ausentes como NaN/None. Saídas em arrays float com NaN onde a métrica não
+se aplica.
+
+Regras por esporte (mesmas de antes):
+- bike: TSS = h x IF² x 100, IF = NP / FTP
+- run: rTSS com IF = pace de limiar / NGP (ou pace médio), IF limitado a 1.5 no TSS
+- swim: sTSS com IF = CSS / pace médio (s/100m), limitado a 1.5 no TSS
+- sem dados/limiar do esporte: hrTSS pela reserva de FC; senão 0
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+
+MAX_PACE_IF = 1.5
+HR_TSS_FACTOR = 0.8
+DEFAULT_HR_REST = 60
+
+# TRIMP de Banister: fator de ponderação por sexo
+TRIMP_K = {"male": 1.92, "female": 1.67}
+
+
+def _column(values, n: int) -> np.ndarray:
+    """Float column of length n (None -> NaN; scalar or None broadcast)."""
+    if values is None:
+        return np.full(n, np.nan)
+    if np.isscalar(values):
+        return np.full(n, float(values))
+    return np.asarray(values, dtype=np.float64)  # None vira NaN na conversão
+
+
+def _threshold(value) -> float:
+    return float(value) if value else np.nan
+
+
+def batch_load_metrics(
+    sport: Sequence[str],
+    duration_s: Sequence[float],
+    distance_m: Optional[Sequence[Optional[float]]] = None,
+    avg_hr: Optional[Sequence[Optional[float]]] = None,
+    np_watts: Optional[Sequence[Optional[float]]] = None,
+    ngp_s_km: Optional[Sequence[Optional[float]]] = None,
+    thresholds: Optional[dict] = None,
+) -> dict[str, np.ndarray]:
+    """
+    TSS, IF and TRIMP for many activities of one athlete in one vectorized call.
+
+    `thresholds`: ftp (W), run_threshold_pace (s/km), css (s/100m), hr_max,
+    hr_rest (padrão 60) e, opcional, gender para o TRIMP.
+    Retorna {"tss", "intensity_factor", "trimp"}: TSS arredondado a 0.1
+    (0 quando nada se aplica), IF a 0.001, TRIMP a 0.1; NaN = não se aplica.
+    """
+    thresholds = thresholds or {}
+    sport = np.asarray(sport, dtype=object)  # aceita str e SportType
+    n = len(sport)
+    dur = _column(duration_s, n)
+    dist = _column(distance_m, n)
+    hr = _column(avg_hr, n)
+    npw = _column(np_watts, n)
+    ngp = _column(ngp_s_km, n)
+
+    ftp = _threshold(thresholds.get("ftp"))
+    thr_pace = _threshold(thresholds.get("run_threshold_pace"))
+    css = _threshold(thresholds.get("css"))
+    hr_max = _threshold(thresholds.get("hr_max"))
+    hr_rest = float(thresholds.get("hr_rest") or DEFAULT_HR_REST)
+    hours = dur / 3600
+
+    is_bike = sport == "bike"
+    is_run = sport == "run"
+    is_swim = sport == "swim"
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # IF por esporte
+        power_if = npw / ftp
+        power_ok = power_if > 0  # NaN > 0 é False
+
+        avg_pace_km = np.where((dist > 0) & (dur > 0), dur / dist * 1000, np.nan)
+        run_pace = np.where(ngp > 0, ngp, avg_pace_km)
+        run_if = thr_pace / run_pace
+        run_ok = is_run & (run_if > 0)
+
+        swim_if = css / np.where((dist > 0) & (dur > 0), dur / dist * 100, np.nan)
+        swim_ok = is_swim & (swim_if > 0)
+
+        intensity = np.full(n, np.nan)
+        intensity = np.where(power_ok & ~is_run & ~is_swim, power_if, intensity)
+        intensity = np.where(run_ok, run_if, intensity)
+        intensity = np.where(swim_ok, swim_if, intensity)
+
+        # Reserva de FC (hrTSS e TRIMP)
+        hr_reserve = np.clip((hr - hr_rest) / (hr_max - hr_rest), 0.0, 1.0)
+        hr_ok = (hr > 0) & (hr_max > hr_rest)
+
+        tss = np.zeros(n)
+        tss = np.where(hr_ok, hours * hr_reserve * 100 * HR_TSS_FACTOR, tss)
+        tss = np.where(swim_ok, hours * np.minimum(swim_if, MAX_PACE_IF) ** 2 * 100, tss)
+        tss = np.where(run_ok, hours * np.minimum(run_if, MAX_PACE_IF) ** 2 * 100, tss)
+        tss = np.where(is_bike & power_ok, hours * power_if**2 * 100, tss)
+
+        k = TRIMP_K.get(thresholds.get("gender") or "male", TRIMP_K["male"])
+        trimp = np.where(hr_ok, dur / 60 * hr_reserve * 0.64 * np.exp(k * hr_reserve), np.nan)
+
+    return {
+        "tss": np.round(np.nan_to_num(tss), 1),
+        "intensity_factor": np.round(intensity, 3),
+        "trimp": np.round(trimp, 1),
+    }
+
+
+def load_metrics(
+    sport: str,
+    duration_s: float,
+    distance_m: Optional[float] = None,
+    avg_hr: Optional[float] = None,
+    np_watts: Optional[float] = None,
+    ngp_s_km: Optional[float] = None,
+    thresholds: Optional[dict] = None,
+) -> dict[str, Optional[float]]:
+    """Single activity wrapper: same kernel, Python floats (None = não se aplica)."""
+    out = batch_load_metrics([sport], [duration_s], [distance_m], [avg_hr], [np_watts], [ngp_s_km], thresholds)
+    return {key: to_optional(values)[0] for key, values in out.items()}
+
+
+def to_optional(values: np.ndarray) -> list[Optional[float]]:
+    """Array -> list of floats with None in place of NaN (para o banco/JSON)."""
+    return [None if np.isnan(v) else float(v) for v in values.tolist()]
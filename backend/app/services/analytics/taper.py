@@ -0,0 +1,130 @@
+"""
+Taper — busca do polimento que leva o TSB à janela alvo no dia da prova.
+
+Cada candidato é um cronograma de TSS diário de amanhã até a véspera da
+prova: carga de manutenção (CTL atual) até o início do polimento e, nos
+últimos `length` dias, uma fração dessa carga conforme o formato:
+
+- step: fração constante = intensity
+- two_step: intensity na 1ª metade, intensity/2 na 2ª (o de PMCCalculator.project_taper)
+- linear: cai linearmente de 1 até intensity no último dia
+- exponential: decai exponencialmente até intensity no último dia
+
+Todos os candidatos formam uma matriz (candidatos x dias) e CTL/ATL saem de
+uma única chamada de kernels.ewma. O ranking favorece TSB dentro da janela
+na manhã da prova e, entre esses, a menor perda de CTL.
+"""
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+
+from app.services.analytics.kernels import ewma
+from app.services.analytics.training_metrics import ATL_DAYS, CTL_DAYS
+
+TAPER_SHAPES = ("step", "two_step", "linear", "exponential")
+TAPER_LENGTHS = tuple(range(5, 29))  # dias
+TAPER_INTENSITIES = tuple(np.round(np.arange(0.2, 0.9001, 0.025), 3).tolist())  # fração da carga
+
+TARGET_TSB = (5.0, 25.0)
+MAX_HORIZON_DAYS = 180
+
+# 1 ponto de TSB fora da janela pesa como 10% de CTL perdido
+TSB_MISS_WEIGHT = 10.0
+
+
+def taper_fraction(shape: np.ndarray, length: np.ndarray, intensity: np.ndarray, k: np.ndarray) -> np.ndarray:
+    """
+    Fraction of the maintenance load on taper day k (0 = 1º dia do polimento).
+
+    Argumentos em broadcast: (C, 1) por candidato contra (1, H) dias. Fora do
+    polimento (k < 0) a fração é 1.
+    """
+    step = (k + 1) / length  # 1/L ... 1 no último dia
+    frac = np.select(
+        [shape == 0, shape == 1, shape == 2, shape == 3],
+        [
+            np.broadcast_to(intensity, step.shape),
+            np.where(k < length / 2, intensity, intensity / 2),
+            1 - (1 - intensity) * step,
+            intensity**step,
+        ],
+    )
+    return np.where(k >= 0, frac, 1.0)
+
+
+def optimize_taper(
+    ctl: float,
+    atl: float,
+    today: date,
+    race_date: date,
+    target_tsb: tuple[float, float] = TARGET_TSB,
+    top_k: int = 5,
+) -> dict:
+    """
+    Evaluate every (shape, length, intensity) taper and rank them.
+
+    `ctl`/`atl`: valores ao fim de `today`. Retorna {"evaluated", "candidates"};
+    cada candidato traz a projeção diária até a véspera da prova (o TSB da
+    véspera é a forma na manhã da prova).
+    """
+    horizon = (race_date - today).days - 1
+    lengths = np.array([length for length in TAPER_LENGTHS if length <= horizon])
+    base = ctl  # manutenção: treinar no nível de fitness atual
+
+    shape, length, intensity = (
+        a.ravel()[:, None]
+        for a in np.meshgrid(np.arange(len(TAPER_SHAPES)), lengths, TAPER_INTENSITIES, indexing="ij")
+    )
+    k = np.arange(horizon)[None, :] - (horizon - length)  # dia dentro do polimento
+    tss = base * taper_fraction(shape, length, intensity, k)
+
+    ctl_s = ewma(tss, CTL_DAYS, ctl)
+    atl_s = ewma(tss, ATL_DAYS, atl)
+    tsb_s = ctl_s - atl_s
+
+    race_tsb, race_ctl = tsb_s[:, -1], ctl_s[:, -1]
+    lo, hi = target_tsb
+    miss = np.maximum(lo - race_tsb, 0) + np.maximum(race_tsb - hi, 0)
+    peak = np.maximum(ctl_s.max(axis=1), ctl)
+    ctl_loss = np.where(peak > 0, (peak - race_ctl) / peak * 100, 0.0)
+    score = miss * TSB_MISS_WEIGHT + ctl_loss
+
+    best = np.argsort(score, kind="stable")[:top_k]
+    dates = [today + timedelta(days=d) for d in range(1, horizon + 1)]
+    candidates = []
+    for i in best.tolist():
+        L = int(length[i, 0])
+        candidates.append({
+            "shape": TAPER_SHAPES[int(shape[i, 0])],
+            "length_days": L,
+            "intensity": float(intensity[i, 0]),
+            "start_date": race_date - timedelta(days=L),
+            "race_tsb": round(float(race_tsb[i]), 1),
+            "race_ctl": round(float(race_ctl[i]), 1),
+            "ctl_loss_pct": round(float(ctl_loss[i]), 1),
+            "in_target": bool(miss[i] == 0),
+            "score": round(float(score[i]), 2),
+            "points": [
+                {"date": d, "tss": round(t, 0), "ctl": round(c, 1), "atl": round(a, 1), "tsb": round(b, 1)}
+                for d, t, c, a, b in zip(
+                    dates, tss[i].tolist(), ctl_s[i].tolist(), atl_s[i].tolist(), tsb_s[i].tolist()
+                )
+            ],
+        })
+
+    return {"evaluated": len(score), "candidates": candidates}
+
+
+def taper_horizon_error(ctl: float, today: date, race_date: date) -> Optional[str]:
+    """Motivo (pt-BR) pelo qual não dá para otimizar o polimento, ou None."""
+    days = (race_date - today).days
+    if days <= 0:
+        return "A prova já passou"
+    if days - 1 < TAPER_LENGTHS[0]:
+        return "Prova muito próxima para planejar o polimento"
+    if days > MAX_HORIZON_DAYS:
+        return f"Polimento só pode ser planejado até {MAX_HORIZON_DAYS} dias antes da prova"
+    if ctl <= 0:
+        return "Sem histórico de carga (CTL) para projetar o polimento"
+    return None
@@ -1,13 +1,30 @@
 """
 Training Metrics Service — cálculos unificados de métricas de treino.
 
-Inclui: TSS (HR + power), NP, IF, VI, TRIMP, HR drift,
-pace consistency, zonas FC, zonas potência, CTL/ATL/TSB, monotonia, strain.
+Inclui: TSS (HR + power), NP, IF, VI, TRIMP, desacoplamento aeróbico,
+pace consistency, detecção de intervalos, W′bal, zonas FC/potência/pace, CTL/ATL/TSB, monotonia, strain.
 """
-import math
-from datetime import date, timedelta
+from datetime import date
 from typing import Optional
 
+import numpy as np
+
+from app.services.analytics.kernels import (
+    NP_WINDOW_S,
+    aerobic_decoupling,
+    ewma,
+    graded_speed,
+    normalized_graded_speed,
+    normalized_power,
+    rolling_mean,
+    sample_on_grid,
+    segment_intervals,
+    time_in_zones,
+    w_prime_balance,
+)
+from app.services.analytics.load_metrics import load_metrics
+from app.services.parsers.streams import ActivityStreams
+
 
 # ============================================================
 # Zonas de FC (5 zonas baseadas em % da FC máxima)
@@ -38,58 +55,59 @@ def get_power_zones(ftp: int) -> list[dict]:
 
 
 # ============================================================
-# Tempo em Zonas — segundos em cada zona a partir do HR stream
+# Zonas de Pace (5 zonas em % do pace de limiar, corrida)
 # ============================================================
-def calc_time_in_hr_zones(hr_stream: list[dict], hr_max: int) -> dict[str, int]:
-    zones = get_hr_zones(hr_max)
-    result = {f"z{z['zone']}": 0 for z in zones}
-
-    for i in range(1, len(hr_stream)):
-        hr = hr_stream[i].get("hr", 0)
-        dt = hr_stream[i].get("t", 0) - hr_stream[i - 1].get("t", 0)
-        dt = max(0, min(dt, 10))  # Sanity check: max 10s gap
-
-        for z in zones:
-            if z["min"] <= hr <= z["max"]:
-                result[f"z{z['zone']}"] += dt
-                break
-
-    return result
+def get_pace_zones(threshold_pace_s_km: float) -> list[dict]:
+    """Limites em s/km — quanto menor o pace, mais alta a zona."""
+    t = threshold_pace_s_km
+    return [
+        {"zone": 1, "name": "Recuperação", "min": round(t * 1.29, 1), "max": 9999},
+        {"zone": 2, "name": "Aeróbico", "min": round(t * 1.14, 1), "max": round(t * 1.29, 1)},
+        {"zone": 3, "name": "Tempo", "min": round(t * 1.06, 1), "max": round(t * 1.14, 1)},
+        {"zone": 4, "name": "Limiar", "min": round(t * 0.99, 1), "max": round(t * 1.06, 1)},
+        {"zone": 5, "name": "VO2max", "min": 0, "max": round(t * 0.99, 1)},
+    ]
 
 
 # ============================================================
-# TSS Calculations
+# Tempo em Zonas — segundos em cada zona, na resolução cheia
 # ============================================================
-def calc_bike_tss(duration_s: int, np: int, ftp: int) -> float:
-    if not np or not ftp or ftp == 0:
-        return 0.0
-    intensity_factor = np / ftp
-    return round((duration_s * np * intensity_factor) / (ftp * 3600) * 100, 1)
+def _zone_seconds(values, t, zones: list[dict]) -> dict[str, int]:
+    seconds = time_in_zones(values, t, [z["min"] for z in zones], [z["max"] for z in zones])
+    return {f"z{z['zone']}": int(round(s)) for z, s in zip(zones, seconds)}
 
 
-def calc_run_tss(duration_s: int, distance_m: float, threshold_pace_s_km: float) -> float:
-    if not distance_m or distance_m == 0 or not threshold_pace_s_km:
-        return 0.0
-    pace = (duration_s / distance_m) * 1000
-    intensity_factor = min(threshold_pace_s_km / pace, 1.5)
-    return round((duration_s / 3600) * (intensity_factor**2) * 100, 1)
+def calc_time_in_hr_zones(streams: ActivityStreams, hr_max: int) -> Optional[dict[str, int]]:
+    if streams.hr is None or len(streams) < 2:
+        return None
+    return _zone_seconds(streams.hr, streams.t, get_hr_zones(hr_max))
 
 
-def calc_swim_tss(duration_s: int, distance_m: float, css_s_100m: float) -> float:
-    if not distance_m or distance_m == 0 or not css_s_100m:
-        return 0.0
-    pace = (duration_s / distance_m) * 100
-    intensity_factor = min(css_s_100m / pace, 1.5)
-    return round((duration_s / 3600) * (intensity_factor**2) * 100, 1)
+def calc_zone_times(streams: ActivityStreams, sport: str, athlete: dict) -> dict[str, Optional[dict]]:
+    """
+    Time in HR, power (bike) and pace (run) zones from the 1 Hz streams
+    (segundos NaN não contam). Zonas sem limiar configurado ficam None.
+    """
+    out = {"hr": None, "power": None, "pace": None}
+    if len(streams) < 2:
+        return out
 
+    if streams.hr is not None and athlete.get("hr_max"):
+        out["hr"] = _zone_seconds(streams.hr, streams.t, get_hr_zones(athlete["hr_max"]))
 
-def calc_hr_tss(duration_s: int, avg_hr: int, hr_max: int, hr_rest: int = 60) -> float:
-    if not avg_hr or not hr_max or hr_max <= hr_rest:
-        return 0.0
-    hr_reserve = max(0, min((avg_hr - hr_rest) / (hr_max - hr_rest), 1))
-    return round((duration_s / 3600) * hr_reserve * 100 * 0.8, 1)
+    if sport == "bike" and streams.power is not None and athlete.get("ftp"):
+        out["power"] = _zone_seconds(streams.power, streams.t, get_power_zones(athlete["ftp"]))
 
+    if sport == "run" and streams.speed is not None and athlete.get("run_threshold_pace"):
+        # pace em min/km, zonas em s/km
+        out["pace"] = _zone_seconds(streams.pace * 60, streams.t, get_pace_zones(athlete["run_threshold_pace"]))
 
+    return out
+
+
+# ============================================================
+# TSS Calculations — fórmulas em load_metrics (kernel em lote)
+# ============================================================
 def calc_tss(
     sport: str,
     duration_s: int,
@@ -100,31 +118,22 @@ def calc_tss(
     threshold_pace: Optional[float],
     css: Optional[float],
     hr_max: Optional[int],
+    ngp_s_km: Optional[float] = None,
+    hr_rest: Optional[int] = None,
 ) -> float:
     """Auto-calculate TSS based on sport and available data."""
-    if sport == "bike" and np and ftp:
-        return calc_bike_tss(duration_s, np, ftp)
-    elif sport == "run" and distance_m and threshold_pace:
-        return calc_run_tss(duration_s, distance_m, threshold_pace)
-    elif sport == "swim" and distance_m and css:
-        return calc_swim_tss(duration_s, distance_m, css)
-    elif avg_hr and hr_max:
-        return calc_hr_tss(duration_s, avg_hr, hr_max)
-    return 0.0
+    thresholds = {"ftp": ftp, "run_threshold_pace": threshold_pace, "css": css, "hr_max": hr_max, "hr_rest": hr_rest}
+    return load_metrics(sport, duration_s, distance_m, avg_hr, np, ngp_s_km, thresholds)["tss"]
 
 
 # ============================================================
 # Normalized Power (NP)
 # ============================================================
-def calc_normalized_power(power_stream: list[dict]) -> Optional[int]:
-    values = [p.get("power", 0) for p in power_stream if p.get("power")]
-    if len(values) < 30:
+def calc_normalized_power(streams: ActivityStreams) -> Optional[int]:
+    if streams.power is None or np.count_nonzero(~np.isnan(streams.power)) < 30:
         return None
-    rolling = []
-    for i in range(len(values) - 29):
-        rolling.append(sum(values[i : i + 30]) / 30)
-    avg_fourth = sum(p**4 for p in rolling) / len(rolling)
-    return int(round(avg_fourth**0.25))
+    # já em 1 Hz: segundos sem potência contam como 0, como as pausas no resample
+    return normalized_power(np.nan_to_num(streams.power))
 
 
 # ============================================================
@@ -136,6 +145,38 @@ def calc_intensity_factor(np: int, ftp: int) -> Optional[float]:
     return round(np / ftp, 3)
 
 
+# ============================================================
+# Normalized Graded Pace (NGP) — pace plano equivalente, corrida
+# ============================================================
+def calc_normalized_graded_pace(streams: ActivityStreams) -> Optional[dict]:
+    """
+    NGP (s/km) and the graded pace series from the distance/altitude
+    streams.
+
+    A série graded_pace (min/km, como a de pace) usa a média móvel de 30 s
+    da velocidade ajustada; trechos parados (< 3 km/h) ficam de fora.
+    """
+    t_dist, dist = streams.valid("distance")
+    if len(t_dist) < 2:
+        return None
+    t_alt, alt = streams.valid("altitude")
+    grid, speed = graded_speed(t_dist, dist, t_alt if len(t_alt) else None, alt if len(alt) else None)
+    ngs = normalized_graded_speed(speed)
+    if not ngs:
+        return None
+
+    smooth = rolling_mean(speed, NP_WINDOW_S)
+    t = grid[NP_WINDOW_S - 1:] + t_dist[0]
+    moving = smooth > 1000 / 1200
+    return {
+        "ngp_s_km": 1000 / ngs,  # sem arredondar: o TSS do recálculo parte dele
+        "series": {
+            "t": t[moving].astype(np.int64),
+            "graded_pace": np.round(1000 / smooth[moving] / 60, 2),
+        },
+    }
+
+
 # ============================================================
 # Variability Index (VI) = NP / Avg Power
 # ============================================================
@@ -155,48 +196,156 @@ def calc_trimp(
     hr_max: int,
     gender: str = "male",
 ) -> float:
-    if not avg_hr or not hr_max or hr_max <= hr_rest:
-        return 0.0
-    hr_reserve = max(0, min((avg_hr - hr_rest) / (hr_max - hr_rest), 1))
-    k = 1.92 if gender == "male" else 1.67
-    trimp = (duration_s / 60) * hr_reserve * 0.64 * math.exp(k * hr_reserve)
-    return round(trimp, 1)
+    thresholds = {"hr_max": hr_max, "hr_rest": hr_rest, "gender": gender}
+    return load_metrics("other", duration_s, avg_hr=avg_hr, thresholds=thresholds)["trimp"] or 0.0
 
 
 # ============================================================
-# HR Drift — comparação FC 1ª metade vs 2ª metade
+# Desacoplamento aeróbico (Pa:HR) — saída/FC, 1ª vs 2ª metade
 # ============================================================
-def calc_hr_drift(hr_stream: list[dict]) -> Optional[float]:
-    if not hr_stream or len(hr_stream) < 10:
-        return None
-    mid = len(hr_stream) // 2
-    first_half = [p["hr"] for p in hr_stream[:mid] if p.get("hr")]
-    second_half = [p["hr"] for p in hr_stream[mid:] if p.get("hr")]
-    if not first_half or not second_half:
+def calc_aerobic_decoupling(
+    streams: ActivityStreams,
+    sport: str,
+    graded_pace: Optional[dict[str, np.ndarray]] = None,
+) -> Optional[float]:
+    """
+    Pa:HR (pace) ou Pw:HR (potência) decoupling in %, on the 1 Hz streams.
+
+    Saída: potência no ciclismo (quando houver); senão velocidade, pelo pace
+    ajustado à inclinação (`graded_pace`, série de calc_normalized_graded_pace)
+    ou pela velocidade bruta. Abaixo de ~5% = boa base aeróbica.
+    """
+    if streams.hr is None:
         return None
-    avg_first = sum(first_half) / len(first_half)
-    avg_second = sum(second_half) / len(second_half)
-    if avg_first == 0:
+    if sport == "bike" and streams.power is not None:
+        output = streams.power
+    elif graded_pace is not None and len(graded_pace["t"]):
+        output = sample_on_grid(_speed(graded_pace["graded_pace"]), graded_pace["t"], streams.t)
+    elif streams.speed is not None:
+        output = streams.speed
+    else:
         return None
-    drift = ((avg_second - avg_first) / avg_first) * 100
-    return round(drift, 1)
+
+    decoupling = aerobic_decoupling(streams.hr, output)
+    return round(decoupling, 1) if decoupling is not None else None
+
+
+def _speed(pace_min_km: np.ndarray) -> np.ndarray:
+    """min/km -> m/s (pace 0 = parado)."""
+    pace = np.asarray(pace_min_km, dtype=np.float64)
+    return np.divide(1000 / 60, pace, out=np.zeros_like(pace), where=pace > 0)
 
 
 # ============================================================
 # Pace Consistency — coeficiente de variação dos splits
 # ============================================================
-def calc_pace_consistency(pace_stream: list[dict]) -> Optional[float]:
-    if not pace_stream or len(pace_stream) < 5:
-        return None
-    paces = [p["pace"] for p in pace_stream if p.get("pace") and 2 < p["pace"] < 15]
+def calc_pace_consistency(streams: ActivityStreams) -> Optional[float]:
+    _, paces = streams.valid("pace")
+    paces = paces[(paces > 2) & (paces < 15)]
     if len(paces) < 5:
         return None
-    avg = sum(paces) / len(paces)
-    if avg == 0:
+    cv = paces.std() / paces.mean() * 100
+    return round(float(cv), 1)
+
+
+# ============================================================
+# Intervals — blocos de trabalho/recuperação detectados nos streams
+# ============================================================
+INTERVAL_MIN_REPS = 2
+
+
+def _segment_stats(column: Optional[np.ndarray], bounds: np.ndarray, reduce=np.add) -> Optional[np.ndarray]:
+    """Per-segment mean (ou máximo com reduce=np.maximum) ignoring NaN; NaN sem dado."""
+    if column is None:
+        return None
+    values = column[: bounds[-1]]
+    ok = ~np.isnan(values)
+    if reduce is np.maximum:
+        out = np.maximum.reduceat(np.where(ok, values, -np.inf), bounds[:-1])
+        return np.where(np.isfinite(out), out, np.nan)
+    sums = np.add.reduceat(np.where(ok, values, 0.0), bounds[:-1])
+    counts = np.add.reduceat(ok, bounds[:-1])
+    return np.divide(sums, counts, out=np.full(len(sums), np.nan), where=counts > 0)
+
+
+def calc_intervals(streams: ActivityStreams, sport: str) -> Optional[list[dict]]:
+    """
+    Work/recovery blocks of a structured session (ex.: 6x1km), from the 1 Hz
+    streams — independente dos laps manuais.
+
+    Sinal: potência no ciclismo (quando houver), senão velocidade. Retorna a
+    sequência trabalho, recuperação, trabalho, ... do 1º ao último bloco de
+    trabalho (sem aquecimento e desaquecimento), ou None com menos de
+    INTERVAL_MIN_REPS blocos.
+    """
+    signal = streams.power if sport == "bike" and streams.power is not None else streams.speed
+    if signal is None:
+        return None
+    blocks = segment_intervals(signal)
+    if len(blocks) < INTERVAL_MIN_REPS:
+        return None
+
+    # fronteiras: s0, e0, s1, e1, ...; o segmento j vai de bounds[j] a bounds[j + 1]
+    bounds = blocks.ravel()
+    durations = np.diff(bounds)
+    hr = _segment_stats(streams.hr, bounds)
+    max_hr = _segment_stats(streams.hr, bounds, np.maximum)
+    power = _segment_stats(streams.power, bounds)
+    speed = _segment_stats(streams.speed, bounds)
+    if streams.distance is not None:
+        d = streams.distance[np.minimum(bounds, streams.n - 1)]
+        distance = np.diff(d)
+    elif speed is not None:
+        distance = speed * durations
+    else:
+        distance = None
+
+    def value(arr, i, decimals=None):
+        if arr is None or np.isnan(arr[i]):
+            return None
+        return int(round(float(arr[i]))) if decimals is None else round(float(arr[i]), decimals)
+
+    intervals = []
+    for i, duration in enumerate(durations.tolist()):
+        v = speed[i] if speed is not None else np.nan
+        intervals.append({
+            "interval": i // 2 + 1,
+            "type": "work" if i % 2 == 0 else "recovery",
+            "start_s": int(streams.t0 + bounds[i]),
+            "duration_s": int(duration),
+            "distance_m": value(distance, i, 1),
+            "avg_hr": value(hr, i),
+            "max_hr": value(max_hr, i),
+            "avg_power": value(power, i),
+            "avg_speed_kmh": round(float(v) * 3.6, 2) if v > 0 else None,
+            "avg_pace_min_km": round(1000 / 60 / float(v), 2) if v > 0 else None,
+        })
+    return intervals
+
+
+# ============================================================
+# W′ balance — reserva anaeróbica ao longo do pedal
+# ============================================================
+def calc_w_prime_balance(streams: ActivityStreams, sport: str, athlete: dict) -> Optional[dict]:
+    """
+    W′bal series on the 1 Hz power stream, com o CP/W′ do atleta
+    (athlete["cp"], athlete["w_prime"]; ver services.critical_power).
+
+    Retorna {"series": {"t", "wbal"} em J, "min_wbal_pct": menor W′bal em %
+    de W′, "cp_watts", "w_prime_j"} ou None fora do ciclismo, sem potência
+    ou sem modelo.
+    """
+    cp, w_prime = athlete.get("cp"), athlete.get("w_prime")
+    if sport != "bike" or streams.power is None or not cp or not w_prime:
         return None
-    variance = sum((p - avg) ** 2 for p in paces) / len(paces)
-    cv = (variance**0.5) / avg * 100
-    return round(cv, 1)
+    wbal = w_prime_balance(streams.power, cp, w_prime)
+    ok = ~np.isnan(streams.power)
+    return {
+        "series": {"t": streams.t[ok].astype(np.int64), "wbal": np.round(wbal[ok]).astype(np.int64)},
+        "min_wbal_pct": round(float(wbal.min()) / w_prime * 100, 1),
+        "cp_watts": round(float(cp), 1),
+        "w_prime_j": round(float(w_prime)),
+    }
 
 
 # ============================================================
@@ -215,26 +364,25 @@ def calc_pmc(
     Calculate CTL/ATL/TSB from daily TSS values.
 
     Args:
-        daily_tss: [{"date": date, "tss": float}, ...]
+        daily_tss: [{"date": date, "tss": float}, ...] — um item por dia,
+            sem buracos (ver fill_missing_days)
     """
-    ctl = initial_ctl
-    atl = initial_atl
-    results = []
-
-    for day in sorted(daily_tss, key=lambda x: x["date"]):
-        tss = day["tss"]
-        ctl = ctl + (tss - ctl) / CTL_DAYS
-        atl = atl + (tss - atl) / ATL_DAYS
-        tsb = ctl - atl
-        results.append({
-            "date": day["date"].isoformat() if isinstance(day["date"], date) else day["date"],
-            "tss": tss,
-            "ctl": round(ctl, 1),
-            "atl": round(atl, 1),
-            "tsb": round(tsb, 1),
-        })
+    days = sorted(daily_tss, key=lambda x: x["date"])
+    tss = np.array([d["tss"] for d in days], dtype=np.float64)
+    ctl = ewma(tss, CTL_DAYS, initial_ctl)
+    atl = ewma(tss, ATL_DAYS, initial_atl)
+    tsb, ctl, atl = np.round(ctl - atl, 1), np.round(ctl, 1), np.round(atl, 1)
 
-    return results
+    return [
+        {
+            "date": day["date"].isoformat() if isinstance(day["date"], date) else day["date"],
+            "tss": day["tss"],
+            "ctl": c,
+            "atl": a,
+            "tsb": b,
+        }
+        for day, c, a, b in zip(days, ctl.tolist(), atl.tolist(), tsb.tolist())
+    ]
 
 
 def get_form_status(tsb: float) -> dict:
@@ -273,12 +421,75 @@ def calc_monotony_strain(weekly_tss: list[float]) -> dict:
     return {"monotony": monotony, "strain": strain}
 
 
+MONOTONY_WINDOW = 7
+ACWR_ACUTE_DAYS = 7
+ACWR_CHRONIC_DAYS = 28
+
+
+def _window_sums(x: np.ndarray, window: int) -> np.ndarray:
+    """Sum of the last `window` values at each day (NaN até a janela encher)."""
+    c = np.concatenate([[0.0], np.cumsum(x)])
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        out[window - 1:] = c[window:] - c[:-window]
+    return out
+
+
+def rolling_load_risk(daily_tss: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Monotony, strain and ACWR for every day of a dense daily TSS array.
+
+    Uma passada de somas acumuladas de x e x² dá média e desvio de cada
+    janela de 7 dias (mesmas definições de calc_monotony_strain, desvio
+    populacional; desvio ~0 => monotonia 0) e o ACWR = média aguda (7 d) /
+    média crônica (28 d). NaN onde a janela ainda não encheu ou a carga
+    crônica é zero.
+    """
+    x = np.asarray(daily_tss, dtype=np.float64)
+    w = MONOTONY_WINDOW
+    week_sum = _window_sums(x, w)
+    mean = week_sum / w
+    mean_sq = _window_sums(x * x, w) / w
+    var = np.maximum(mean_sq - mean * mean, 0.0)
+    # cancelamento numérico em históricos longos: desvio < 0.1% do RMS é zero
+    flat = var <= 1e-6 * mean_sq
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monotony = np.where(flat, 0.0, mean / np.sqrt(var))
+        monotony = np.round(np.where(np.isnan(mean), np.nan, monotony), 2)
+        strain = week_sum * monotony  # monotonia já arredondada, como no cálculo semanal
+
+        acute = _window_sums(x, ACWR_ACUTE_DAYS) / ACWR_ACUTE_DAYS
+        chronic = _window_sums(x, ACWR_CHRONIC_DAYS) / ACWR_CHRONIC_DAYS
+        acwr = np.where(chronic > 0, acute / chronic, np.nan)
+
+    return {
+        "monotony": monotony,
+        "strain": np.round(strain, 1),
+        "acwr": np.round(acwr, 2),
+    }
+
+
 def fill_missing_days(daily_data: list[dict], start: date, end: date) -> list[dict]:
     """Fill gaps with 0 TSS for continuous PMC calculation."""
-    by_date = {d["date"]: d["tss"] for d in daily_data}
-    result = []
-    current = start
-    while current <= end:
-        result.append({"date": current, "tss": by_date.get(current, 0)})
-        current += timedelta(days=1)
-    return result
+    dates, tss = dense_daily(daily_data, start, end)
+    return [{"date": d, "tss": v} for d, v in zip(dates.tolist(), tss.tolist())]
+
+
+def dense_daily(daily_data: list[dict], start: date, end: date) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Dense day axis [start, end] (datetime64[D]) and the TSS of each day.
+
+    Os dias com dado entram por índice (data - start) num array de zeros;
+    dias repetidos somam, fora do intervalo são ignorados.
+    """
+    dates = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    tss = np.zeros(len(dates))
+    if not daily_data or not len(dates):
+        return dates, tss
+
+    # ordinal do dia (int) converte bem mais rápido que date -> datetime64
+    idx = np.fromiter((d["date"].toordinal() for d in daily_data), np.int64, len(daily_data)) - start.toordinal()
+    values = np.fromiter((d["tss"] or 0 for d in daily_data), np.float64, len(daily_data))
+    inside = (idx >= 0) & (idx < len(dates))
+    np.add.at(tss, idx[inside], values[inside])
+    return dates, tss
@@ -0,0 +1,249 @@
+"""
+Bulk Import — importação de um ZIP com o histórico de .FIT/.TCX.
+
+Os membros são lidos um a um do arquivo em disco, parseados em paralelo
+no pool de ingestão (janela limitada para não segurar o ZIP inteiro em
+memória) e inseridos em lotes de IMPORT_BATCH_SIZE, um commit por lote.
+O arquivo original só vai para o storage depois que o INSERT do lote passou,
+e é apagado se o commit falhar: nada fica órfão no bucket.
+
+A análise de IA por atividade NÃO é disparada: 2.000 arquivos virariam
+2.000 chamadas à OpenAI. O atleta pede análise das atividades que quiser.
+"""
+import asyncio
+import os
+import posixpath
+import uuid
+import zipfile
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.activity import Activity
+from app.services.activity_builder import build_activity, build_related
+from app.services.daily_load import refresh_daily_load
+from app.services.load_risk import invalidate as invalidate_load_risk
+from app.services.dedupe import (
+    content_hash,
+    find_similar,
+    START_TIME_TOLERANCE,
+    DISTANCE_TOLERANCE_PCT,
+    DISTANCE_TOLERANCE_MIN_M,
+)
+from app.services.file_service import delete_file, upload_file, generate_file_key
+from app.services.ingestion import detect_format, ingest_activity_file
+from app.services.jobs import Job
+from app.services.recompute import refresh_w_prime_balance
+
+JOB_KIND = "zip_import"
+
+
+def list_activity_members(zf: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+    """FIT/TCX members of the archive, skipping folders and macOS metadata."""
+    members = []
+    for info in zf.infolist():
+        if info.is_dir():
+            continue
+        name = posixpath.basename(info.filename)
+        if info.filename.startswith("__MACOSX/") or name.startswith("._"):
+            continue
+        if detect_format(name):
+            members.append(info)
+    return members
+
+
+async def _parse_member(index: int, content: bytes, file_format: str, athlete: dict) -> tuple[int, Any]:
+    try:
+        return index, await ingest_activity_file(content, file_format, athlete)
+    except Exception as e:  # arquivo corrompido não derruba a importação
+        return index, e
+
+
+async def run_zip_import(job: Job, zip_path: str, user_id: uuid.UUID, athlete: dict) -> None:
+    """Background task: import every FIT/TCX member of the ZIP at `zip_path`."""
+    job.status = "running"
+    try:
+        async with async_session() as db:
+            earliest = await _import_archive(db, job, zip_path, user_id, athlete)
+            await _refresh_load(db, user_id, earliest)
+            if earliest is not None:
+                # W′bal depois do lote: cada pedal com o CP/W′ da própria data,
+                # já contando os esforços importados no mesmo ZIP
+                await refresh_w_prime_balance(db, user_id, earliest)
+        job.finish()
+    except Exception as e:
+        job.finish(error=str(e))
+    finally:
+        try:
+            os.unlink(zip_path)
+        except OSError:
+            pass
+
+
+async def _import_archive(db, job: Job, zip_path: str, user_id: uuid.UUID, athlete: dict) -> Optional[datetime]:
+    """Import the members; returns the earliest start_time imported (None = nada importado)."""
+    result = await db.execute(
+        select(Activity.content_hash).where(
+            Activity.user_id == user_id,
+            Activity.content_hash.is_not(None),
+        )
+    )
+    known_hashes = set(result.scalars().all())
+
+    window = max(settings.INGEST_MAX_WORKERS, 1) * 2
+    in_flight: set[asyncio.Task] = set()
+    # índice do membro -> (nome, bytes, hash) enquanto o parse está em andamento
+    payloads: dict[int, tuple[str, bytes, str]] = {}
+    batch: list[tuple[str, Activity, dict, bytes]] = []
+    starts: list[datetime] = []  # start_time de cada atividade importada
+
+    async def collect(tasks) -> None:
+        for task in tasks:
+            index, parsed = task.result()
+            name, content, digest = payloads.pop(index)
+            if isinstance(parsed, Exception):
+                job.record("error", file=name, error=str(parsed) or type(parsed).__name__)
+                continue
+            await _stage(db, job, batch, user_id, name, content, digest, parsed)
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                await _flush(db, job, batch, starts)
+
+    with zipfile.ZipFile(zip_path) as zf:
+        members = list_activity_members(zf)
+        job.total = len(members)
+
+        for index, info in enumerate(members):
+            name = info.filename
+            file_format = detect_format(posixpath.basename(name))
+            if info.file_size > settings.MAX_UPLOAD_MB * 1024 * 1024:
+                job.record("error", file=name, error=f"Arquivo maior que o limite de {settings.MAX_UPLOAD_MB} MB")
+                continue
+            try:
+                content = await asyncio.to_thread(zf.read, info)
+            except (zipfile.BadZipFile, OSError, RuntimeError) as e:
+                job.record("error", file=name, error=str(e))
+                continue
+
+            digest = content_hash(content)
+            if digest in known_hashes:
+                job.record("duplicate", file=name)
+                continue
+            known_hashes.add(digest)
+
+            if len(in_flight) >= window:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                await collect(done)
+
+            payloads[index] = (name, content, digest)
+            in_flight.add(asyncio.create_task(_parse_member(index, content, file_format, athlete)))
+
+    if in_flight:
+        done, _ = await asyncio.wait(in_flight)
+        await collect(done)
+    await _flush(db, job, batch, starts)
+    return min(starts) if starts else None
+
+
+async def _refresh_load(db, user_id: uuid.UUID, earliest: Optional[datetime]) -> None:
+    """PMC a partir do treino importado mais antigo (um refresh para o ZIP inteiro)."""
+    if earliest is not None:
+        await refresh_daily_load(db, user_id, earliest.date())
+        await db.commit()
+        invalidate_load_risk(user_id)
+
+
+async def _stage(db, job: Job, batch: list, user_id: uuid.UUID, name: str, content: bytes, digest: str, parsed: dict) -> None:
+    """Fuzzy-dedupe and queue the Activity (with the file bytes) for the next batch."""
+    start, distance = parsed["start_time"], parsed["total_distance_meters"]
+    if await find_similar(db, user_id, start, distance) or _similar_in_batch(batch, start, distance):
+        job.record("duplicate", file=name)
+        return
+
+    file_key = generate_file_key(str(user_id), posixpath.basename(name))
+    batch.append((name, build_activity(user_id, parsed, file_key=file_key, content_hash=digest), parsed, content))
+
+
+def _similar_in_batch(batch: list, start, distance: float) -> bool:
+    """Same workout in two formats inside the same archive (not yet in the DB)."""
+    tolerance = max(distance * DISTANCE_TOLERANCE_PCT, DISTANCE_TOLERANCE_MIN_M)
+    return any(
+        abs(a.start_time - start) <= START_TIME_TOLERANCE and abs(a.total_distance_meters - distance) <= tolerance
+        for _, a, _, _ in batch
+    )
+
+
+async def _store_and_commit(db, items: list[tuple[str, Activity, dict, bytes]]) -> None:
+    """
+    Upload the original files of rows already flushed, then commit.
+
+    Se o upload ou o commit falhar, desfaz a transação e apaga o que já
+    tinha subido antes de propagar o erro.
+    """
+    uploaded = []
+    try:
+        for _, activity, _, content in items:
+            await upload_file(content, activity.source_file)
+            uploaded.append(activity.source_file)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        for key in uploaded:
+            await delete_file(key)
+        raise
+
+
+async def _flush(db, job: Job, batch: list, starts: list[datetime]) -> None:
+    """Insert the staged activities + stream levels, upload their files, one commit."""
+    if not batch:
+        return
+    try:
+        for _, activity, parsed, _ in batch:
+            db.add(activity)
+            db.add_all(build_related(activity, parsed))
+        await db.flush()
+    except IntegrityError:
+        # Um conflito no lote: refaz linha a linha para isolar o arquivo
+        await db.rollback()
+        for item in batch:
+            activity = await _insert_one(db, job, item)
+            if activity is not None:
+                starts.append(activity.start_time)
+    else:
+        await _store_and_commit(db, batch)
+        for name, activity, parsed, _ in batch:
+            _record_imported(job, name, activity, parsed)
+            starts.append(activity.start_time)
+    batch.clear()
+    db.expunge_all()
+
+
+async def _insert_one(db, job: Job, item: tuple[str, Activity, dict, bytes]) -> Optional[Activity]:
+    name, activity, parsed, _ = item
+    try:
+        db.add(activity)
+        db.add_all(build_related(activity, parsed))
+        await db.flush()
+    except IntegrityError as e:
+        await db.rollback()
+        job.record("duplicate" if "content_hash" in str(e.orig) else "error", file=name, error=str(e.orig))
+        return None
+    try:
+        await _store_and_commit(db, [item])
+    except Exception as e:
+        job.record("error", file=name, error=str(e) or type(e).__name__)
+        return None
+    _record_imported(job, name, activity, parsed)
+    return activity
+
+
+def _record_imported(job: Job, name: str, activity: Activity, parsed: dict) -> None:
+    """Job item for an imported file; notes TCX trackpoints with unreadable times or values."""
+    item = {"file": name, "activity_id": str(activity.id)}
+    for key in ("invalid_timestamps", "malformed_trackpoints"):
+        if parsed.get(key):
+            item[key] = parsed[key]
+    job.record("imported", **item)
@@ -0,0 +1,51 @@
+"""
+Critical Power — CP/W′ do atleta a partir dos melhores esforços.
+
+Os pontos são o melhor watts médio por duração (índice best_efforts) nos
+CP_FIT_DAYS dias anteriores à data avaliada, ajustados por
+kernels.fit_critical_power (ver best_efforts.critical_power_at). Sem
+esforços suficientes, o FTP do perfil faz o papel de CP com um W′ padrão.
+
+Cada pedal é avaliado com o modelo da própria data, não com o de hoje:
+load_power_efforts carrega o histórico uma vez e ele segue no dict de
+limiares da ingestão (athlete["power_efforts"]) ou no recálculo em lote.
+"""
+import uuid
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.best_effort import BestEffort
+from app.services.analytics.best_efforts import CP_FIT_DAYS, critical_power_at
+from app.services.analytics.kernels import CP_FIT_MAX_S, CP_FIT_MIN_S
+
+
+async def load_power_efforts(db: AsyncSession, user_id: uuid.UUID) -> dict[str, np.ndarray]:
+    """
+    Every power best effort in the fit range (2–20 min) of the user, as
+    arrays {"time": datetime64[s] do início da atividade, "target", "value"}.
+    """
+    result = await db.execute(
+        select(BestEffort.start_time, BestEffort.target, BestEffort.value)
+        .where(
+            BestEffort.user_id == user_id,
+            BestEffort.metric == "power",
+            BestEffort.target >= CP_FIT_MIN_S,
+            BestEffort.target <= CP_FIT_MAX_S,
+        )
+        .order_by(BestEffort.start_time)
+    )
+    rows = result.all()
+    return {
+        "time": np.array([r.start_time for r in rows], dtype="datetime64[s]"),
+        "target": np.array([r.target for r in rows], dtype=np.int64),
+        "value": np.array([r.value for r in rows], dtype=np.float64),
+    }
+
+
+async def power_model(db: AsyncSession, user_id: uuid.UUID, ftp, days: int = CP_FIT_DAYS) -> dict:
+    """Current {"cp", "w_prime", "source", "efforts"} (janela dos últimos `days` dias)."""
+    efforts = await load_power_efforts(db, user_id)
+    return critical_power_at(efforts, datetime.utcnow(), ftp, days)
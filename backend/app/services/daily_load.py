@@ -0,0 +1,168 @@
+"""
+Daily Load — TSS diário e CTL/ATL/TSB materializados na tabela daily_load.
+
+Em vez de refazer a média exponencial desde o primeiro treino a cada
+leitura, a série fica gravada por dia. Uma mudança no histórico (upload,
+exclusão, recálculo de TSS) chama refresh_daily_load com o dia afetado:
+o CTL/ATL do dia anterior é o ponto de partida e só os dias seguintes são
+reescritos — O(dias desde a mudança), com um GROUP BY por dia no SQL, um
+eixo denso de datas e a EWMA vetorizada de kernels. Ler o PMC vira um
+range scan.
+
+As linhas vão até o último dia com atividade; depois dele o TSS é 0 e
+CTL/ATL apenas decaem, o que é calculado na leitura (fórmula fechada).
+"""
+import uuid
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.activity import Activity
+from app.models.daily_load import DailyLoad
+from app.services.analytics.kernels import ewma
+from app.services.analytics.training_metrics import ATL_DAYS, CTL_DAYS, dense_daily
+
+
+async def refresh_daily_load(db: AsyncSession, user_id: uuid.UUID, since: Optional[date] = None) -> None:
+    """
+    Rewrite daily_load from `since` forward (None = histórico inteiro).
+
+    Não faz commit: roda na mesma transação da mudança que o disparou. Um
+    advisory lock por usuário (liberado no commit/rollback) serializa
+    refreshes concorrentes — dois uploads, ou um upload durante a importação
+    ZIP ou o recálculo —, que de outro modo gravariam as mesmas chaves
+    (user_id, date); quem espera relê as atividades já commitadas.
+    """
+    await db.execute(select(func.pg_advisory_xact_lock(_lock_key(user_id))))
+
+    ctl = atl = 0.0
+    start = None
+    if since is not None:
+        result = await db.execute(
+            select(DailyLoad.date, DailyLoad.ctl, DailyLoad.atl)
+            .where(DailyLoad.user_id == user_id, DailyLoad.date < since)
+            .order_by(DailyLoad.date.desc())
+            .limit(1)
+        )
+        prev = result.first()
+        if prev is not None:
+            # linhas contínuas: retoma no dia seguinte ao último gravado
+            start, ctl, atl = prev.date + timedelta(days=1), prev.ctl, prev.atl
+
+    stale = DailyLoad.user_id == user_id
+    if start is None:
+        first = await db.scalar(select(func.min(Activity.start_time)).where(Activity.user_id == user_id))
+        if first is None:
+            # última atividade excluída: não sobra carga nenhuma
+            await db.execute(delete(DailyLoad).where(stale))
+            return
+        start = first.date()
+        # sem linha anterior a `since`, o histórico pode ter começado antes de
+        # `start` (ex.: a primeira atividade foi excluída): apaga desde `since`
+        if since is not None:
+            stale = stale & (DailyLoad.date >= min(since, start))
+    else:
+        stale = stale & (DailyLoad.date >= start)
+
+    day = func.date(Activity.start_time)
+    result = await db.execute(
+        select(day, func.sum(func.coalesce(Activity.tss, 0.0)))
+        .where(Activity.user_id == user_id, Activity.start_time >= datetime.combine(start, time.min))
+        .group_by(day)
+    )
+    daily_tss = [{"date": d, "tss": float(tss)} for d, tss in result]
+
+    await db.execute(delete(DailyLoad).where(stale))
+    if not daily_tss:
+        return
+
+    # eixo denso de dias + EWMA vetorizada (sem laço dia a dia)
+    dates, tss = dense_daily(daily_tss, start, max(d["date"] for d in daily_tss))
+    ctl_s = ewma(tss, CTL_DAYS, ctl)
+    atl_s = ewma(tss, ATL_DAYS, atl)
+    rows = [
+        {"user_id": user_id, "date": d, "tss": t, "ctl": c, "atl": a, "tsb": c - a}
+        for d, t, c, a in zip(dates.tolist(), tss.tolist(), ctl_s.tolist(), atl_s.tolist())
+    ]
+    await db.execute(insert(DailyLoad), rows)
+
+
+def _lock_key(user_id: uuid.UUID) -> int:
+    """Advisory lock key (bigint) of the user's daily_load rows."""
+    return int.from_bytes(user_id.bytes[:8], "big", signed=True)
+
+
+async def ensure_daily_load(db: AsyncSession, user_id: uuid.UUID) -> None:
+    """
+    Backfill único para históricos anteriores à daily_load: sem nenhuma
+    linha mas com atividades, materializa tudo e faz commit.
+    """
+    stored = await db.scalar(select(DailyLoad.date).where(DailyLoad.user_id == user_id).limit(1))
+    if stored is not None:
+        return
+    has_activity = await db.scalar(select(Activity.id).where(Activity.user_id == user_id).limit(1))
+    if has_activity is not None:
+        await refresh_daily_load(db, user_id)
+        await db.commit()
+
+
+def _decay(ctl: float, atl: float, days: int) -> tuple[float, float]:
+    """CTL/ATL after `days` days without training (TSS 0)."""
+    return ctl * (1 - 1 / CTL_DAYS) ** days, atl * (1 - 1 / ATL_DAYS) ** days
+
+
+async def load_range(db: AsyncSession, user_id: uuid.UUID, start: date, end: date) -> dict[str, np.ndarray]:
+    """
+    Daily TSS/CTL/ATL/TSB for every day in [start, end].
+
+    Range scan na daily_load sobre o eixo denso de dias (como dense_daily),
+    preenchido por índice: dias antes do histórico saem zerados e dias
+    depois do último treino, com o decaimento a partir dele. Retorna
+    {"dates": datetime64[D], "tss", "ctl", "atl", "tsb"} (arrays alinhados).
+    """
+    result = await db.execute(
+        select(DailyLoad.date, DailyLoad.tss, DailyLoad.ctl, DailyLoad.atl)
+        .where(DailyLoad.user_id == user_id, DailyLoad.date >= start, DailyLoad.date <= end)
+        .order_by(DailyLoad.date)
+    )
+    stored = result.all()
+
+    dates = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    tss, ctl, atl = np.zeros((3, len(dates)))
+    if stored:
+        idx = np.fromiter((r.date.toordinal() for r in stored), np.int64, len(stored)) - start.toordinal()
+        tss[idx], ctl[idx], atl[idx] = np.array([(r.tss, r.ctl, r.atl) for r in stored], dtype=np.float64).T
+
+    if not stored or stored[-1].date < end:
+        # depois da última linha (na janela ou antes dela): só decaimento
+        result = await db.execute(
+            select(DailyLoad.date, DailyLoad.ctl, DailyLoad.atl)
+            .where(DailyLoad.user_id == user_id, DailyLoad.date <= end)
+            .order_by(DailyLoad.date.desc())
+            .limit(1)
+        )
+        last = result.first()
+        if last is not None:
+            days = (dates - np.datetime64(last.date, "D")).astype(np.int64)
+            after = days > 0
+            ctl[after], atl[after] = _decay(last.ctl, last.atl, days[after])
+
+    return {"dates": dates, "tss": tss, "ctl": ctl, "atl": atl, "tsb": ctl - atl}
+
+
+async def load_on(db: AsyncSession, user_id: uuid.UUID, day: date) -> dict:
+    """CTL/ATL/TSB at the end of `day` (última linha até o dia + decaimento)."""
+    result = await db.execute(
+        select(DailyLoad)
+        .where(DailyLoad.user_id == user_id, DailyLoad.date <= day)
+        .order_by(DailyLoad.date.desc())
+        .limit(1)
+    )
+    last = result.scalar_one_or_none()
+    if last is None:
+        return {"ctl": 0.0, "atl": 0.0, "tsb": 0.0}
+    ctl, atl = _decay(last.ctl, last.atl, (day - last.date).days)
+    return {"ctl": ctl, "atl": atl, "tsb": ctl - atl}
@@ -0,0 +1,62 @@
+"""
+Dedupe Service — detecção de uploads repetidos.
+
+1. Hash SHA-256 do arquivo, indexado por usuário: o mesmo .FIT enviado
+   duas vezes (sync do relógio + upload manual) é resolvido antes do parse.
+2. Checagem aproximada em (user_id, start_time, total_distance_meters):
+   pega o mesmo treino exportado em outro formato (FIT vs TCX).
+"""
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.activity import Activity
+
+# Tolerâncias da checagem aproximada
+START_TIME_TOLERANCE = timedelta(seconds=60)
+DISTANCE_TOLERANCE_PCT = 0.01
+DISTANCE_TOLERANCE_MIN_M = 50.0
+
+
+def content_hash(content: bytes) -> str:
+    """Hex SHA-256 of the raw file bytes."""
+    return hashlib.sha256(content).hexdigest()
+
+
+async def find_by_hash(db: AsyncSession, user_id: uuid.UUID, digest: str) -> Optional[Activity]:
+    """Exact duplicate: same user, same file bytes (index lookup)."""
+    result = await db.execute(
+        select(Activity).where(
+            Activity.user_id == user_id,
+            Activity.content_hash == digest,
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def find_similar(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    start_time: datetime,
+    distance_m: float,
+) -> Optional[Activity]:
+    """
+    Same workout from another export: start within ±60 s and distance
+    within 1% (mínimo 50 m).
+    """
+    tolerance = max(distance_m * DISTANCE_TOLERANCE_PCT, DISTANCE_TOLERANCE_MIN_M)
+    result = await db.execute(
+        select(Activity)
+        .where(
+            Activity.user_id == user_id,
+            Activity.start_time.between(start_time - START_TIME_TOLERANCE, start_time + START_TIME_TOLERANCE),
+            func.abs(Activity.total_distance_meters - distance_m) <= tolerance,
+        )
+        .order_by(Activity.created_at)
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
@@ -1,6 +1,9 @@
 """
 File Service — Upload/download de arquivos para S3/R2/Railway Object Storage.
 """
+import asyncio
+import os
+import shutil
 import uuid
 from typing import Optional
 
@@ -44,6 +47,37 @@ async def upload_file(file_bytes: bytes, key: str) -> str:
     return key
 
 
+async def upload_path(path: str, key: str) -> str:
+    """
+    Stream a file on disk to storage (S3 multipart / local copy), without
+    loading it into memory. The source file is left in place. Returns the key.
+    """
+    client = _get_s3_client()
+    if client is None:
+        local_dir = "/tmp/mycoach-files"
+        os.makedirs(local_dir, exist_ok=True)
+        dest = os.path.join(local_dir, key.replace("/", "_"))
+        await asyncio.to_thread(shutil.copyfile, path, dest)
+        return key
+
+    await asyncio.to_thread(client.upload_file, path, settings.S3_BUCKET_NAME, key)
+    return key
+
+
+async def delete_file(key: str) -> None:
+    """Remove a stored file (S3 / local fallback); missing keys are ignored."""
+    client = _get_s3_client()
+    if client is None:
+        path = os.path.join("/tmp/mycoach-files", key.replace("/", "_"))
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        return
+
+    await asyncio.to_thread(client.delete_object, Bucket=settings.S3_BUCKET_NAME, Key=key)
+
+
 def generate_file_key(user_id: str, filename: str) -> str:
     ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else "fit"
     return f"activities/{user_id}/{uuid.uuid4()}.{ext}"
@@ -0,0 +1,235 @@
+"""
+Ingestion Service — parse de .FIT/.TCX + métricas fora do event loop.
+
+O parse e os cálculos são CPU-bound e rodam num ProcessPoolExecutor;
+entradas e saídas são tipos simples (bytes, str, dict) para serem
+picklable. Com INGEST_MAX_WORKERS=0 tudo roda inline.
+"""
+import asyncio
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.services.analytics.best_efforts import calc_power_curve, calc_pace_efforts, critical_power_at
+from app.services.analytics.load_metrics import load_metrics
+from app.services.parsers.fit_parser import MAX_STREAM_POINTS, parse_fit
+from app.services.parsers.streams import ActivityStreams
+from app.services.parsers.tcx_parser import parse_tcx
+from app.services.analytics.training_metrics import (
+    calc_aerobic_decoupling,
+    calc_intervals,
+    calc_pace_consistency,
+    calc_zone_times,
+    calc_normalized_graded_pace,
+    calc_w_prime_balance,
+)
+from app.services.parsers.downsample import build_pyramid, render_stream
+
+SUPPORTED_FORMATS = ("fit", "tcx")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def detect_format(filename: str) -> Optional[str]:
+    """Return 'fit' / 'tcx' from the file extension, or None if unsupported."""
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    return ext if ext in SUPPORTED_FORMATS else None
+
+
+def athlete_thresholds(user) -> dict:
+    """Snapshot of the user fields the metrics need, as a plain dict."""
+    return {
+        "ftp": user.ftp,
+        "run_threshold_pace": user.run_threshold_pace,
+        "css": user.css,
+        "hr_max": user.hr_max,
+        "hr_rest": user.hr_rest,
+        # esforços de potência do histórico (services.critical_power.load_power_efforts)
+        # para o CP/W′ na data do pedal; None = sem W′bal na ingestão
+        "power_efforts": None,
+    }
+
+
+def zone_distribution(time_in_zones: Optional[dict]) -> Optional[dict]:
+    """Seconds per zone -> % of the total (None without time)."""
+    if not time_in_zones:
+        return None
+    total_time = sum(time_in_zones.values())
+    if total_time <= 0:
+        return None
+    return {k: round(v / total_time * 100, 1) for k, v in time_in_zones.items()}
+
+
+def process_activity_file(content: bytes | mmap.mmap, file_format: str, athlete: dict) -> dict[str, Any]:
+    """
+    Parse the file and compute all derived metrics.
+
+    Roda no processo worker: não toca em banco nem em objetos ORM.
+    Retorna um dict com os campos do Activity (sport como string).
+    """
+    if file_format == "fit":
+        parsed = parse_fit(content)
+    elif file_format == "tcx":
+        parsed = parse_tcx(content)
+    else:
+        raise ValueError(f"Formato não suportado: {file_format}")
+
+    # Streams alinhados em 1 Hz; os arrays numpy não saem do worker
+    streams = parsed.pop("streams", None) or ActivityStreams()
+    series = streams.to_series()
+
+    # NGP (corrida): pace plano equivalente pela altimetria
+    ngp_s_km = None
+    graded_pace = None
+    graded_pace_stream = None
+    if parsed["sport"] == "run":
+        graded = calc_normalized_graded_pace(streams)
+        if graded:
+            ngp_s_km = graded["ngp_s_km"]
+            graded_pace = series["graded_pace"] = graded["series"]
+            graded_pace_stream = render_stream(graded_pace, MAX_STREAM_POINTS)
+
+    # Carga (TSS, IF, TRIMP) — depende dos limiares do atleta
+    load = load_metrics(
+        sport=parsed["sport"],
+        duration_s=parsed["total_timer_seconds"],
+        distance_m=parsed["total_distance_meters"],
+        avg_hr=parsed.get("avg_hr"),
+        np_watts=parsed.get("normalized_power"),
+        ngp_s_km=ngp_s_km,
+        thresholds=athlete,
+    )
+
+    # Pa:HR / Pw:HR (depois do NGP, que fornece o pace ajustado)
+    decoupling = calc_aerobic_decoupling(streams, parsed["sport"], graded_pace)
+    pace_con = calc_pace_consistency(streams)
+
+    # Intervalos (trabalho/recuperação) pelo sinal, além dos laps do arquivo
+    intervals = calc_intervals(streams, parsed["sport"])
+
+    # Tempo em zonas (FC, potência, pace)
+    zone_times = calc_zone_times(streams, parsed["sport"], athlete)
+
+    # W′bal (ciclismo): quanto da reserva acima do CP foi gasta
+    wbal = None
+    if parsed["sport"] == "bike" and athlete.get("power_efforts") is not None:
+        model = critical_power_at(athlete["power_efforts"], parsed["start_time"], athlete.get("ftp"))
+        wbal = calc_w_prime_balance(streams, parsed["sport"], model)
+    if wbal:
+        series["wbal"] = wbal["series"]
+
+    # Melhores esforços: curva potência-duração (bike), tempos por distância (run/swim)
+    best_efforts = []
+    power_curve = None
+    if parsed["sport"] == "bike":
+        best_efforts = calc_power_curve(streams) or []
+        power_curve = {str(e["target"]): e["value"] for e in best_efforts} or None
+    elif parsed["sport"] in ("run", "swim"):
+        best_efforts = calc_pace_efforts(streams, parsed["sport"]) or []
+
+    # Pirâmide de zoom por stream
+    stream_levels = [
+        {"stream": name, **level}
+        for name, arrays in series.items()
+        for level in build_pyramid(arrays)
+    ]
+
+    return {
+        **parsed,
+        "stream_levels": stream_levels,
+        "best_efforts": best_efforts,
+        "power_curve": power_curve,
+        **load,
+        "aerobic_decoupling_pct": decoupling,
+        "pace_consistency": pace_con,
+        "intervals_data": intervals,
+        "time_in_zones_seconds": zone_times["hr"],
+        "hr_zone_distribution": zone_distribution(zone_times["hr"]),
+        "power_time_in_zones_seconds": zone_times["power"],
+        "pace_time_in_zones_seconds": zone_times["pace"],
+        "normalized_graded_pace_min_km": round(ngp_s_km / 60, 2) if ngp_s_km else None,
+        "normalized_graded_pace_s_km": ngp_s_km,
+        "graded_pace_stream": graded_pace_stream,
+        "wbal_stream": render_stream(wbal["series"], MAX_STREAM_POINTS) if wbal else None,
+        "cp_watts": wbal["cp_watts"] if wbal else None,
+        "w_prime_j": wbal["w_prime_j"] if wbal else None,
+        "min_wbal_pct": wbal["min_wbal_pct"] if wbal else None,
+    }
+
+
+def process_activity_path(path: str, file_format: str, athlete: dict) -> dict[str, Any]:
+    """
+    Same as process_activity_file, reading the spooled upload via mmap.
+
+    Só o caminho cruza a fronteira do processo; o worker mapeia o arquivo
+    em vez de receber uma cópia picklada dos bytes.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("Arquivo vazio")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return process_activity_file(mm, file_format, athlete)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if settings.INGEST_MAX_WORKERS <= 0:
+        return None
+    if _pool is None:
+        # spawn: o worker não herda o event loop nem conexões do pool do banco
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.INGEST_MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def run_in_pool(fn, *args):
+    """
+    Run a picklable top-level function in the ingestion pool.
+
+    Sem pool (INGEST_MAX_WORKERS=0) roda inline. Se um worker morrer
+    (BrokenProcessPool) o pool quebrado é encerrado e a chamada é repetida
+    uma vez num pool novo; nunca roda inline, já que o próprio arquivo pode
+    ser o que derrubou o worker. Quebrando de novo, levanta ValueError.
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = _get_pool()
+        if pool is None:
+            return fn(*args)
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool as e:
+            _discard_pool(pool)
+            if attempt:
+                raise ValueError("o processamento do arquivo derrubou o worker de ingestão") from e
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Shut down a broken pool (outras chamadas podem já ter trocado o _pool)."""
+    global _pool
+    if _pool is pool:
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def ingest_activity_file(content: bytes, file_format: str, athlete: dict) -> dict[str, Any]:
+    """Parse + metrics off the event loop."""
+    return await run_in_pool(process_activity_file, content, file_format, athlete)
+
+
+async def ingest_activity_path(path: str, file_format: str, athlete: dict) -> dict[str, Any]:
+    """Parse + metrics off the event loop, from a file on disk."""
+    return await run_in_pool(process_activity_path, path, file_format, athlete)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,95 @@
+"""
+Jobs — registro em memória de tarefas longas (importação em lote, recálculos).
+
+Cada job guarda progresso e resultado por item para polling via API.
+Vive no processo da API: some num restart, o que é aceitável para
+tarefas que podem ser reenviadas.
+"""
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional
+
+# Jobs concluídos mais antigos são descartados acima deste limite
+MAX_JOBS = 200
+
+
+class Job:
+    __slots__ = (
+        "id", "user_id", "kind", "status", "total", "done",
+        "counts", "items", "error", "created_at", "finished_at",
+    )
+
+    def __init__(self, user_id: uuid.UUID, kind: str, total: int = 0):
+        self.id = uuid.uuid4()
+        self.user_id = user_id
+        self.kind = kind
+        self.status = "pending"  # pending | running | done | failed
+        self.total = total
+        self.done = 0
+        self.counts: dict[str, int] = {}
+        self.items: list[dict] = []
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+
+    def record(self, outcome: str, **item: Any) -> None:
+        """Register one processed item (outcome: imported, duplicate, error, ...)."""
+        self.done += 1
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        self.items.append({"status": outcome, **item})
+
+    def advance(self, n: int, outcome: str) -> None:
+        """Count `n` processed items without listing them (recálculos em massa)."""
+        self.done += n
+        self.counts[outcome] = self.counts.get(outcome, 0) + n
+
+    def finish(self, error: Optional[str] = None) -> None:
+        self.status = "failed" if error else "done"
+        self.error = error
+        self.finished_at = datetime.utcnow()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "progress": round(self.done / self.total * 100, 1) if self.total else 0.0,
+            "counts": dict(self.counts),
+            "items": list(self.items),
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+_jobs: "OrderedDict[uuid.UUID, Job]" = OrderedDict()
+
+
+def create_job(user_id: uuid.UUID, kind: str, total: int = 0) -> Job:
+    job = Job(user_id, kind, total)
+    _jobs[job.id] = job
+    while len(_jobs) > MAX_JOBS:
+        oldest = next((j for j in _jobs.values() if j.status in ("done", "failed")), None)
+        if oldest is None:
+            break
+        del _jobs[oldest.id]
+    return job
+
+
+def get_job(job_id: uuid.UUID, user_id: uuid.UUID) -> Optional[Job]:
+    """Job by id, only if it belongs to the user."""
+    job = _jobs.get(job_id)
+    if job is None or job.user_id != user_id:
+        return None
+    return job
+
+
+def find_active_job(user_id: uuid.UUID, kind: str) -> Optional[Job]:
+    """Pending/running job of this kind for the user, if any."""
+    for job in reversed(_jobs.values()):
+        if job.user_id == user_id and job.kind == kind and job.status in ("pending", "running"):
+            return job
+    return None
@@ -0,0 +1,67 @@
+"""
+Load Risk — monotonia, strain e ACWR de cada dia do histórico, por atleta.
+
+As séries saem de training_metrics.rolling_load_risk sobre o TSS diário da
+daily_load e ficam em cache em memória até uma atividade entrar, sair ou
+ter o TSS recalculado (invalidate, chamado depois do commit). Cada entrada
+guarda a versão do atleta lida antes da consulta: um cálculo que começou
+antes de uma invalidação nunca é servido depois dela.
+
+Como os jobs, o cache vive no processo da API e some num restart.
+"""
+import uuid
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.daily_load import DailyLoad
+from app.services.analytics.training_metrics import dense_daily, rolling_load_risk
+from app.services.daily_load import ensure_daily_load
+
+# Atletas em cache; os menos usados saem acima deste limite
+MAX_CACHED_USERS = 500
+
+_versions: dict[uuid.UUID, int] = {}
+_cache: "OrderedDict[uuid.UUID, tuple[int, date, dict]]" = OrderedDict()
+
+
+def invalidate(user_id: uuid.UUID) -> None:
+    """Drop the user's cached series (nova atividade, exclusão, recálculo)."""
+    _versions[user_id] = _versions.get(user_id, 0) + 1
+    _cache.pop(user_id, None)
+
+
+async def get_load_risk(db: AsyncSession, user_id: uuid.UUID) -> dict:
+    """
+    Daily series from the first training day to today.
+
+    Retorna {"dates": datetime64[D], "tss", "monotony", "strain", "acwr"}
+    (arrays alinhados, NaN = janela incompleta).
+    """
+    today = date.today()
+    version = _versions.get(user_id, 0)
+    cached = _cache.get(user_id)
+    if cached is not None and cached[0] == version and cached[1] == today:
+        _cache.move_to_end(user_id)
+        return cached[2]
+
+    await ensure_daily_load(db, user_id)
+    result = await db.execute(
+        select(DailyLoad.date, DailyLoad.tss).where(DailyLoad.user_id == user_id).order_by(DailyLoad.date)
+    )
+    daily = [{"date": d, "tss": tss} for d, tss in result]
+    if daily:
+        dates, tss = dense_daily(daily, daily[0]["date"], max(today, daily[-1]["date"]))
+    else:
+        dates, tss = np.array([], dtype="datetime64[D]"), np.zeros(0)
+    series = {"dates": dates, "tss": tss, **rolling_load_risk(tss)}
+
+    if _versions.get(user_id, 0) == version:
+        _cache[user_id] = (version, today, series)
+        _cache.move_to_end(user_id)
+        while len(_cache) > MAX_CACHED_USERS:
+            _cache.popitem(last=False)
+    return series
@@ -0,0 +1,125 @@
+"""
+Downsampling de streams — Largest-Triangle-Three-Buckets vetorizado.
+
+Amostrar 1 a cada N pontos descarta sprints e picos de FC em atividades
+longas. O LTTB divide a série em buckets e, em cada um, fica com o ponto
+que forma o maior triângulo com os vizinhos — os picos sobrevivem com o
+mesmo orçamento de pontos.
+
+Versão vetorizada: o vértice anterior é a média do bucket anterior (em vez
+do ponto escolhido nele), o que permite resolver todos os buckets de uma vez.
+"""
+from typing import Optional
+
+import numpy as np
+
+# Níveis da pirâmide de zoom (pontos por stream); 0 = resolução cheia
+STREAM_LEVELS = (250, 1000, 4000)
+FULL_RESOLUTION = 0
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Return the indices of the points LTTB keeps (always includes first and last).
+
+    x deve ser crescente; y sem NaN.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n-2 pontos do meio em n_out-2 buckets contíguos
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts = edges[:-1]
+    ends = edges[1:]
+    sizes = ends - starts
+
+    # bucket means (vértices anterior/próximo)
+    x_mean = np.add.reduceat(x[1 : n - 1], starts - 1) / sizes
+    y_mean = np.add.reduceat(y[1 : n - 1], starts - 1) / sizes
+    ax = np.concatenate(([x[0]], x_mean[:-1]))
+    ay = np.concatenate(([y[0]], y_mean[:-1]))
+    cx = np.concatenate((x_mean[1:], [x[n - 1]]))
+    cy = np.concatenate((y_mean[1:], [y[n - 1]]))
+
+    # matriz buckets x largura máxima, completada com o último ponto do bucket
+    width = int(sizes.max())
+    idx = starts[:, None] + np.arange(width)[None, :]
+    valid = idx < ends[:, None]
+    idx = np.where(valid, idx, ends[:, None] - 1)
+
+    bx = x[idx]
+    by = y[idx]
+    area = np.abs((ax[:, None] - cx[:, None]) * (by - ay[:, None]) - (ax[:, None] - bx) * (cy[:, None] - ay[:, None]))
+    area[~valid] = -1.0
+
+    picked = idx[np.arange(len(starts)), np.argmax(area, axis=1)]
+    return np.concatenate(([0], picked, [n - 1]))
+
+
+def uniform_indices(n: int, n_out: int) -> np.ndarray:
+    """Evenly spaced indices — for GPS tracks, where peaks don't matter."""
+    if n_out >= n:
+        return np.arange(n)
+    return np.linspace(0, n - 1, n_out).astype(np.int64)
+
+
+def downsample_indices(arrays: dict[str, np.ndarray], n_out: int) -> np.ndarray:
+    """
+    Indices to keep for one series ({"t": .., <key>: ..}).
+
+    GPS (lat/lon) usa índices uniformes; as demais séries, LTTB sobre o valor.
+    """
+    n = len(arrays["t"])
+    if "lat" in arrays:
+        return uniform_indices(n, n_out)
+    value_key = next(k for k in arrays if k != "t")
+    return lttb_indices(arrays["t"], arrays[value_key], n_out)
+
+
+def render_stream(arrays: dict[str, np.ndarray], max_points: int) -> Optional[list[dict]]:
+    """Downsample one series and render it as [{"t": .., <key>: ..}, ...] (None if empty)."""
+    if len(arrays["t"]) == 0:
+        return None
+    keep = downsample_indices(arrays, max_points)
+    columns = {k: v[keep].tolist() for k, v in arrays.items()}
+    keys = list(columns)
+    return [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+
+def build_pyramid(arrays: dict[str, np.ndarray], levels: tuple[int, ...] = STREAM_LEVELS) -> list[dict]:
+    """
+    Zoom levels for one series: each level in `levels` smaller than the
+    series, plus the full resolution (level=FULL_RESOLUTION).
+
+    Os dados ficam em colunas ({"t": [...], "hr": [...]}), bem menores que
+    uma lista de dicts no JSON.
+    """
+    t = arrays["t"]
+    n = len(t)
+    if n == 0:
+        return []
+
+    out = []
+    for level in sorted(levels):
+        if level >= n:
+            break
+        keep = downsample_indices(arrays, level)
+        out.append({
+            "level": level,
+            "n_points": len(keep),
+            "t_start": int(t[0]),
+            "t_end": int(t[-1]),
+            "data": {k: v[keep].tolist() for k, v in arrays.items()},
+        })
+    out.append({
+        "level": FULL_RESOLUTION,
+        "n_points": n,
+        "t_start": int(t[0]),
+        "t_end": int(t[-1]),
+        "data": {k: v.tolist() for k, v in arrays.items()},
+    })
+    return out
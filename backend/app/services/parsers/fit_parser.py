@@ -4,15 +4,29 @@ Extrai TODAS as métricas: session, records (1Hz), laps, running dynamics, swim.
 """
 import io
 import math
+import mmap
+from array import array
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Union
 
+import numpy as np
 from fitparse import FitFile
 
+from app.services.analytics.kernels import normalized_power
+from app.services.parsers.downsample import render_stream
+from app.services.parsers.fit_reader import FitReadError, read_fit
+from app.services.parsers.streams import ActivityStreams
+
 
 SEMICIRCLE_TO_DEGREES = 180.0 / (2**31)
 MAX_STREAM_POINTS = 3600
 
+_NAN = float("nan")
+_MISSING_INT = -1  # sentinel para campos inteiros sem sinal (HR, cadência, potência)
+_UNIX_EPOCH = datetime(1970, 1, 1)
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
 # Mapping FIT sport enum to our sport types
 FIT_SPORT_MAP = {
     "running": "run",
@@ -48,18 +62,101 @@ def _get_value(message, field_name, default=None):
     return default
 
 
-def parse_fit(file_bytes: bytes) -> dict[str, Any]:
+class RecordColumns:
     """
-    Parse a .FIT file and return a standardized activity dict.
+    Colunas tipadas com os campos de `record` usados nos streams.
 
-    Returns dict matching Activity model fields.
+    Cada amostra ocupa 4-8 bytes por campo em vez de um dict por record.
+    Valores ausentes: NaN nas colunas float, -1 nas inteiras.
+    """
+
+    __slots__ = ("timestamp", "heart_rate", "speed", "power", "cadence", "altitude", "lat", "lon", "distance")
+
+    def __init__(self):
+        self.timestamp = array("d")  # epoch seconds (UTC)
+        self.heart_rate = array("i")
+        self.speed = array("d")  # m/s (speed ou enhanced_speed)
+        self.power = array("i")
+        self.cadence = array("i")
+        self.altitude = array("d")  # m (altitude ou enhanced_altitude)
+        self.lat = array("d")  # semicircles
+        self.lon = array("d")
+        self.distance = array("d")  # m acumulados
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def append(self, values: dict) -> None:
+        """Append one record given as a {field_name: value} mapping."""
+        ts = values.get("timestamp")
+        self.timestamp.append((ts - _UNIX_EPOCH).total_seconds() if isinstance(ts, datetime) else _NAN)
+
+        self.heart_rate.append(_int_or_missing(values.get("heart_rate")))
+        self.power.append(_int_or_missing(values.get("power")))
+        self.cadence.append(_int_or_missing(values.get("cadence")))
+
+        speed = values.get("speed") or values.get("enhanced_speed")
+        self.speed.append(_NAN if speed is None else speed)
+
+        alt = values.get("altitude") or values.get("enhanced_altitude")
+        self.altitude.append(_NAN if alt is None else alt)
+
+        lat = values.get("position_lat")
+        lon = values.get("position_long")
+        self.lat.append(_NAN if lat is None else lat)
+        self.lon.append(_NAN if lon is None else lon)
+
+        dist = values.get("distance")
+        self.distance.append(_NAN if dist is None else dist)
+
+    @classmethod
+    def from_records(cls, records: list[dict]) -> "RecordColumns":
+        cols = cls()
+        for record in records:
+            cols.append(record)
+        return cols
+
+
+def _int_or_missing(val) -> int:
+    if val is None:
+        return _MISSING_INT
+    try:
+        return int(val)
+    except (ValueError, TypeError):
+        return _MISSING_INT
+
+
+def _decode_struct(file_bytes: Buffer) -> tuple[dict, RecordColumns, list[dict], dict, list[dict]]:
+    """Decode with the lean struct reader (hot path)."""
+    columns = RecordColumns()
+    session_data, laps_raw, device_info, lengths = read_fit(file_bytes, columns)
+    return session_data, columns, laps_raw, device_info, lengths
+
+
+def _decode_fitparse(file_bytes: Buffer, columnar: bool) -> tuple[dict, RecordColumns, list[dict], dict, list[dict]]:
+    """
+    Decode messages with fitparse.
+
+    columnar=True grava cada record direto nas colunas, sem materializar
+    um dict por amostra; columnar=False mantém o caminho antigo (lista de
+    dicts convertida no final), útil para comparação.
     """
-    fitfile = FitFile(io.BytesIO(file_bytes))
+    if isinstance(file_bytes, mmap.mmap):
+        file_bytes.seek(0)
+        fitfile = FitFile(file_bytes)
+    else:
+        fitfile = FitFile(io.BytesIO(file_bytes))
+    # FitFile guarda toda mensagem já decodificada em `_messages`; no modo
+    # colunar esvaziamos esse cache a cada mensagem para não reter 1 objeto
+    # por record durante o parse inteiro.
+    message_cache = getattr(fitfile, "_messages", None) if columnar else None
 
     session_data = {}
+    columns = RecordColumns()
     records = []
     laps_raw = []
     device_info = {}
+    lengths = []
 
     for message in fitfile.get_messages():
         msg_type = message.name
@@ -69,7 +166,10 @@ def parse_fit(file_bytes: bytes) -> dict[str, Any]:
 
         elif msg_type == "record":
             record = {f.name: f.value for f in message.fields if f.value is not None}
-            records.append(record)
+            if columnar:
+                columns.append(record)
+            else:
+                records.append(record)
 
         elif msg_type == "lap":
             lap = {f.name: f.value for f in message.fields if f.value is not None}
@@ -78,6 +178,41 @@ def parse_fit(file_bytes: bytes) -> dict[str, Any]:
         elif msg_type == "device_info":
             device_info = {f.name: f.value for f in message.fields if f.value is not None}
 
+        elif msg_type == "length":
+            lengths.append({f.name: f.value for f in message.fields if f.value is not None})
+
+        if message_cache:
+            message_cache.clear()
+
+    if not columnar:
+        columns = RecordColumns.from_records(records)
+
+    return session_data, columns, laps_raw, device_info, lengths
+
+
+def parse_fit(file_bytes: Buffer, columnar: bool = True, decoder: str = "struct") -> dict[str, Any]:
+    """
+    Parse a .FIT file and return a standardized activity dict.
+
+    file_bytes pode ser bytes ou um mmap do arquivo em disco (upload
+    spoolado), evitando uma cópia extra em memória.
+
+    decoder="struct" usa o leitor enxuto (fit_reader) e cai para o fitparse
+    se o arquivo tiver algo que ele não entende; decoder="fitparse" força
+    o fitparse. columnar=False implica fitparse com o caminho antigo de dicts.
+
+    Returns dict matching Activity model fields.
+    """
+    decoded = None
+    if decoder == "struct" and columnar:
+        try:
+            decoded = _decode_struct(file_bytes)
+        except FitReadError:
+            decoded = None
+    if decoded is None:
+        decoded = _decode_fitparse(file_bytes, columnar)
+    session_data, columns, laps_raw, _device_info, lengths = decoded
+
     # Determine sport
     raw_sport = str(session_data.get("sport", "generic")).lower()
     sport = FIT_SPORT_MAP.get(raw_sport, "run")
@@ -154,13 +289,14 @@ def parse_fit(file_bytes: bytes) -> dict[str, Any]:
     if pool_length:
         pool_length = int(pool_length / 100) if pool_length > 100 else pool_length
     total_lengths = _safe_int(session_data.get("num_lengths"))
+    if not total_lengths and lengths:
+        total_lengths = sum(1 for ln in lengths if ln.get("length_type") == "active") or None
     swolf = session_data.get("avg_swolf")
 
     # Calculate NP from records if we have power data
     normalized_power = _safe_int(session_data.get("normalized_power"))
-    power_values = [r.get("power") for r in records if r.get("power") is not None]
-    if not normalized_power and power_values and len(power_values) > 30:
-        normalized_power = _calc_normalized_power(power_values)
+    if not normalized_power:
+        normalized_power = _calc_normalized_power(columns)
 
     # IF and VI
     ftp = None  # Will be set from user profile in the route
@@ -169,48 +305,55 @@ def parse_fit(file_bytes: bytes) -> dict[str, Any]:
     if normalized_power and avg_power and avg_power > 0:
         variability_index_val = round(normalized_power / avg_power, 3)
 
-    # Build streams (sampled to MAX_STREAM_POINTS)
-    hr_stream, pace_stream, power_stream_data, cadence_stream = [], [], [], []
-    altitude_stream, gps_stream = [], []
-
-    if records:
-        step = max(1, len(records) // MAX_STREAM_POINTS)
-        first_ts = records[0].get("timestamp")
-
-        for i in range(0, len(records), step):
-            r = records[i]
-            ts = r.get("timestamp")
-            elapsed = int((ts - first_ts).total_seconds()) if ts and first_ts else i
-
-            if r.get("heart_rate"):
-                hr_stream.append({"t": elapsed, "hr": r["heart_rate"]})
-
-            speed = r.get("speed") or r.get("enhanced_speed")
-            if speed and speed > 0:
-                pace = round((1000 / speed) / 60, 2)
-                pace_stream.append({"t": elapsed, "pace": pace})
-
-            if r.get("power"):
-                power_stream_data.append({"t": elapsed, "power": r["power"]})
-
-            cad = r.get("cadence")
-            if cad:
-                if sport == "run":
-                    cad *= 2
-                cadence_stream.append({"t": elapsed, "cadence": cad})
-
-            alt = r.get("altitude") or r.get("enhanced_altitude")
-            if alt is not None:
-                altitude_stream.append({"t": elapsed, "alt": round(alt, 1)})
-
-            lat = r.get("position_lat")
-            lon = r.get("position_long")
-            if lat is not None and lon is not None:
-                gps_stream.append({
-                    "t": elapsed,
-                    "lat": round(lat * SEMICIRCLE_TO_DEGREES, 6),
-                    "lon": round(lon * SEMICIRCLE_TO_DEGREES, 6),
-                })
+    # Séries alinhadas em 1 Hz (métricas e pirâmide de zoom)
+    streams = ActivityStreams()
+    n_records = len(columns)
+    if n_records:
+        timestamps = np.asarray(columns.timestamp)
+        first_ts = timestamps[0]
+        index = np.arange(n_records)
+        if np.isnan(first_ts):
+            elapsed = index
+        else:
+            elapsed = np.where(np.isnan(timestamps), index, np.trunc(timestamps - first_ts)).astype(np.int64)
+
+        # inteiros ausentes (-1) e FC 0 viram NaN; potência/cadência 0 são válidas (roda livre)
+        hr = np.asarray(columns.heart_rate, dtype=np.float64)
+        hr[hr <= 0] = np.nan
+        power = np.asarray(columns.power, dtype=np.float64)
+        power[power < 0] = np.nan
+        cad = np.asarray(columns.cadence, dtype=np.float64)
+        cad[cad < 0] = np.nan
+        speed = np.asarray(columns.speed)
+        speed = np.where(speed >= 0, speed, np.nan)
+
+        lat = np.asarray(columns.lat) * SEMICIRCLE_TO_DEGREES
+        lon = np.asarray(columns.lon) * SEMICIRCLE_TO_DEGREES
+        no_fix = np.isnan(lat) | np.isnan(lon)
+        lat[no_fix] = lon[no_fix] = np.nan
+
+        streams = ActivityStreams.from_samples(
+            elapsed,
+            hr=hr,
+            speed=speed,
+            power=power,
+            cadence=cad * 2 if sport == "run" else cad,
+            altitude=np.asarray(columns.altitude),
+            lat=lat,
+            lon=lon,
+            distance=np.asarray(columns.distance),
+        )
+
+    # Piscina: sem distância nos records, a distância vem dos lengths ativos
+    if sport == "swim" and streams.distance is None and lengths and pool_length:
+        t0 = columns.timestamp[0] if n_records else _NAN
+        pool_series = _pool_distance_series(lengths, pool_length, t0)
+        if pool_series is not None:
+            # um ponto por length: interpola sem limite de intervalo
+            streams.add("distance", pool_series["distance"], pool_series["t"], max_gap_s=np.inf)
+
+    # Streams para o detalhe (LTTB até MAX_STREAM_POINTS)
+    rendered = {name: render_stream(arrays, MAX_STREAM_POINTS) for name, arrays in streams.to_series().items()}
 
     # Build laps
     laps_data = []
@@ -276,13 +419,35 @@ def parse_fit(file_bytes: bytes) -> dict[str, Any]:
         "pool_length_m": pool_length,
         "total_lengths": total_lengths,
         "swolf": swolf,
-        "hr_stream": hr_stream or None,
-        "pace_stream": pace_stream or None,
-        "power_stream": power_stream_data or None,
-        "cadence_stream": cadence_stream or None,
-        "altitude_stream": altitude_stream or None,
-        "gps_stream": gps_stream or None,
+        "hr_stream": rendered.get("hr"),
+        "pace_stream": rendered.get("pace"),
+        "power_stream": rendered.get("power"),
+        "cadence_stream": rendered.get("cadence"),
+        "altitude_stream": rendered.get("altitude"),
+        "gps_stream": rendered.get("gps"),
         "laps_data": laps_data or None,
+        "streams": streams,
+    }
+
+
+def _pool_distance_series(lengths: list[dict], pool_length: int, t0: float) -> dict | None:
+    """Cumulative distance at the end of each active length, on the record time base."""
+    times = []
+    for ln in lengths:
+        start = ln.get("start_time")
+        if ln.get("length_type") != "active" or not isinstance(start, datetime):
+            continue
+        start_s = (start - _UNIX_EPOCH).total_seconds()
+        if not times:
+            times.append(start_s)  # distância 0 no início do primeiro length
+        times.append(start_s + (ln.get("total_elapsed_time") or 0))
+    if not times:
+        return None
+    times = np.asarray(times)
+    base = t0 if not math.isnan(t0) else times[0]
+    return {
+        "t": np.trunc(times - base).astype(np.int64),
+        "distance": np.arange(len(times), dtype=np.float64) * pool_length,
     }
 
 
@@ -295,20 +460,13 @@ def _safe_int(val) -> int | None:
         return None
 
 
-def _calc_normalized_power(power_values: list[int | float]) -> int | None:
-    """Calculate Normalized Power from 30-second rolling average."""
-    if len(power_values) < 30:
+def _calc_normalized_power(columns: RecordColumns) -> int | None:
+    """NP from the power column, on a 1 Hz grid built from the record timestamps."""
+    power = np.frombuffer(columns.power, dtype=np.int32).astype(np.float64)
+    power[power == _MISSING_INT] = np.nan
+    if np.count_nonzero(~np.isnan(power)) <= 30:
         return None
-
-    # 30-second rolling average
-    rolling = []
-    for i in range(len(power_values) - 29):
-        window = power_values[i : i + 30]
-        rolling.append(sum(window) / 30)
-
-    # Raise to 4th power, average, then 4th root
-    fourth_power = [p**4 for p in rolling]
-    avg_fourth = sum(fourth_power) / len(fourth_power)
-    np_value = avg_fourth**0.25
-
-    return int(round(np_value))
+    timestamps = np.frombuffer(columns.timestamp, dtype=np.float64)
+    if np.isnan(timestamps).all():
+        return normalized_power(power)
+    return normalized_power(power, timestamps)
@@ -0,0 +1,411 @@
+"""
+Leitor FIT enxuto — decodifica só as mensagens que o parse_fit usa.
+
+Cada mensagem de definição é compilada uma única vez num struct.Struct
+(campos que não interessam viram padding). Mensagens de outros tipos são
+puladas pelo tamanho, sem decodificar nada. Nomes, escalas e offsets
+seguem o profile FIT, produzindo os mesmos valores que o fitparse.
+
+Records vão direto para as colunas tipadas (RecordColumns do fit_parser).
+"""
+import struct
+from datetime import datetime, timedelta
+from typing import Any
+
+FIT_UTC_REFERENCE = 631065600  # 1989-12-31T00:00:00Z em epoch seconds
+_FIT_EPOCH = datetime(1989, 12, 31)
+_MIN_DATE_TIME = 0x10000000  # abaixo disso o date_time é relativo ao device
+
+MESG_SESSION = 18
+MESG_LAP = 19
+MESG_RECORD = 20
+MESG_DEVICE_INFO = 23
+MESG_LENGTH = 101
+
+FIELD_TIMESTAMP = 253
+
+_NAN = float("nan")
+_MISSING_INT = -1
+
+# base type number (5 bits baixos) -> (struct char, size, invalid value)
+_BASE_TYPES = {
+    0: ("B", 1, 0xFF),  # enum
+    1: ("b", 1, 0x7F),  # sint8
+    2: ("B", 1, 0xFF),  # uint8
+    3: ("h", 2, 0x7FFF),  # sint16
+    4: ("H", 2, 0xFFFF),  # uint16
+    5: ("i", 4, 0x7FFFFFFF),  # sint32
+    6: ("I", 4, 0xFFFFFFFF),  # uint32
+    8: ("f", 4, None),  # float32 (inválido = NaN)
+    9: ("d", 8, None),  # float64
+    10: ("B", 1, 0x00),  # uint8z
+    11: ("H", 2, 0x0000),  # uint16z
+    12: ("I", 4, 0x00000000),  # uint32z
+    14: ("q", 8, 0x7FFFFFFFFFFFFFFF),  # sint64
+    15: ("Q", 8, 0xFFFFFFFFFFFFFFFF),  # uint64
+    16: ("Q", 8, 0x0000000000000000),  # uint64z
+}
+
+SPORT_NAMES = {
+    0: "generic", 1: "running", 2: "cycling", 3: "transition", 4: "fitness_equipment",
+    5: "swimming", 10: "training", 11: "walking", 12: "cross_country_skiing",
+    15: "rowing", 17: "hiking", 18: "multisport", 19: "paddling", 21: "e_biking",
+}
+_SPORT_RUNNING = 1
+
+LENGTH_TYPE_NAMES = {0: "idle", 1: "active"}
+
+# field number -> (name, scale, offset, kind); kind: "date_time" | "sport" | "length_type" | None
+_SESSION_FIELDS = {
+    253: ("timestamp", None, None, "date_time"),
+    2: ("start_time", None, None, "date_time"),
+    5: ("sport", None, None, "sport"),
+    7: ("total_elapsed_time", 1000, None, None),
+    8: ("total_timer_time", 1000, None, None),
+    9: ("total_distance", 100, None, None),
+    11: ("total_calories", None, None, None),
+    14: ("avg_speed", 1000, None, None),
+    15: ("max_speed", 1000, None, None),
+    16: ("avg_heart_rate", None, None, None),
+    17: ("max_heart_rate", None, None, None),
+    18: ("avg_cadence", None, None, None),
+    19: ("max_cadence", None, None, None),
+    20: ("avg_power", None, None, None),
+    21: ("max_power", None, None, None),
+    22: ("total_ascent", None, None, None),
+    23: ("total_descent", None, None, None),
+    24: ("total_training_effect", 10, None, None),
+    26: ("num_laps", None, None, None),
+    33: ("num_lengths", None, None, None),
+    34: ("normalized_power", None, None, None),
+    41: ("avg_stroke_count", 10, None, None),
+    44: ("pool_length", 100, None, None),
+    57: ("avg_temperature", None, None, None),
+    58: ("max_temperature", None, None, None),
+    64: ("min_heart_rate", None, None, None),
+    89: ("avg_vertical_oscillation", 10, None, None),
+    91: ("avg_stance_time", 10, None, None),
+    132: ("avg_vertical_ratio", 100, None, None),
+    133: ("avg_stance_time_balance", 100, None, None),
+    134: ("avg_step_length", 10, None, None),
+    137: ("total_anaerobic_training_effect", 10, None, None),
+}
+
+_LAP_FIELDS = {
+    253: ("timestamp", None, None, "date_time"),
+    2: ("start_time", None, None, "date_time"),
+    7: ("total_elapsed_time", 1000, None, None),
+    8: ("total_timer_time", 1000, None, None),
+    9: ("total_distance", 100, None, None),
+    11: ("total_calories", None, None, None),
+    13: ("avg_speed", 1000, None, None),
+    14: ("max_speed", 1000, None, None),
+    15: ("avg_heart_rate", None, None, None),
+    16: ("max_heart_rate", None, None, None),
+    17: ("avg_cadence", None, None, None),
+    18: ("max_cadence", None, None, None),
+    19: ("avg_power", None, None, None),
+    20: ("max_power", None, None, None),
+    21: ("total_ascent", None, None, None),
+    22: ("total_descent", None, None, None),
+    25: ("sport", None, None, "sport"),
+}
+
+_DEVICE_INFO_FIELDS = {
+    253: ("timestamp", None, None, "date_time"),
+    0: ("device_index", None, None, None),
+    2: ("manufacturer", None, None, None),
+    3: ("serial_number", None, None, None),
+    4: ("product", None, None, None),
+    5: ("software_version", 100, None, None),
+}
+
+_LENGTH_FIELDS = {
+    253: ("timestamp", None, None, "date_time"),
+    2: ("start_time", None, None, "date_time"),
+    3: ("total_elapsed_time", 1000, None, None),
+    4: ("total_timer_time", 1000, None, None),
+    5: ("total_strokes", None, None, None),
+    6: ("avg_speed", 1000, None, None),
+    9: ("avg_swimming_cadence", None, None, None),
+    11: ("total_calories", None, None, None),
+    12: ("length_type", None, None, "length_type"),
+}
+
+_MESSAGE_FIELDS = {
+    MESG_SESSION: _SESSION_FIELDS,
+    MESG_LAP: _LAP_FIELDS,
+    MESG_DEVICE_INFO: _DEVICE_INFO_FIELDS,
+    MESG_LENGTH: _LENGTH_FIELDS,
+}
+
+# record: field number -> posição no plano de decodificação
+_RECORD_PLAN_FIELDS = (
+    FIELD_TIMESTAMP,
+    0,  # position_lat
+    1,  # position_long
+    2,  # altitude (scale 5, offset 500)
+    3,  # heart_rate
+    4,  # cadence
+    5,  # distance (scale 100)
+    6,  # speed (scale 1000)
+    7,  # power
+    73,  # enhanced_speed
+    78,  # enhanced_altitude
+)
+
+# subcampos do profile: cadência vira "running cadence" quando sport == running
+_RUNNING_SUBFIELDS = {
+    "avg_cadence": "avg_running_cadence",
+    "max_cadence": "max_running_cadence",
+}
+
+
+class FitReadError(ValueError):
+    """Arquivo que o leitor enxuto não consegue decodificar."""
+
+
+class _Definition:
+    __slots__ = ("global_num", "size", "unpacker", "field_nums", "invalids", "ts_index", "plan")
+
+    def __init__(self, global_num, size, unpacker, field_nums, invalids, ts_index, plan):
+        self.global_num = global_num
+        self.size = size
+        self.unpacker = unpacker
+        self.field_nums = field_nums
+        self.invalids = invalids
+        self.ts_index = ts_index
+        self.plan = plan
+
+
+def _compile_definition(data, pos: int, has_dev_fields: bool) -> tuple[_Definition, int]:
+    """Compile one definition message starting after its header byte."""
+    architecture = data[pos + 1]
+    endian = ">" if architecture == 1 else "<"
+    global_num = struct.unpack_from(endian + "H", data, pos + 2)[0]
+    num_fields = data[pos + 4]
+    pos += 5
+
+    wanted = _MESSAGE_FIELDS.get(global_num)
+    if global_num == MESG_RECORD:
+        wanted = _RECORD_PLAN_FIELDS
+
+    fmt = [endian]
+    field_nums = []
+    invalids = []
+    total = 0
+    for _ in range(num_fields):
+        num, size, base_type = data[pos], data[pos + 1], data[pos + 2]
+        pos += 3
+        total += size
+        base = _BASE_TYPES.get(base_type & 0x1F)
+        # timestamp é sempre lido: alimenta os headers de timestamp comprimido
+        keep = base is not None and base[1] == size and (
+            num == FIELD_TIMESTAMP or (wanted is not None and num in wanted)
+        )
+        if keep:
+            fmt.append(base[0])
+            field_nums.append(num)
+            invalids.append(base[2])
+        else:
+            fmt.append(f"{size}x")
+
+    if has_dev_fields:
+        num_dev = data[pos]
+        pos += 1
+        dev_size = sum(data[pos + 3 * i + 1] for i in range(num_dev))
+        pos += 3 * num_dev
+        total += dev_size
+        if dev_size:
+            fmt.append(f"{dev_size}x")
+
+    unpacker = struct.Struct("".join(fmt)) if field_nums else None
+    ts_index = field_nums.index(FIELD_TIMESTAMP) if FIELD_TIMESTAMP in field_nums else -1
+
+    plan = None
+    if global_num == MESG_RECORD:
+        plan = tuple(field_nums.index(f) if f in field_nums else -1 for f in _RECORD_PLAN_FIELDS)
+
+    definition = _Definition(global_num, total, unpacker, tuple(field_nums), tuple(invalids), ts_index, plan)
+    return definition, pos
+
+
+def _valid(vals, invalids, i):
+    if i < 0:
+        return None
+    v = vals[i]
+    inv = invalids[i]
+    if inv is None:
+        return None if v != v else v
+    return None if v == inv else v
+
+
+def _append_record(columns, vals, d: _Definition, ts_raw) -> None:
+    i_ts, i_lat, i_lon, i_alt, i_hr, i_cad, i_dist, i_spd, i_pw, i_espd, i_ealt = d.plan
+    inv = d.invalids
+
+    if ts_raw is None and i_ts >= 0:
+        ts_raw = _valid(vals, inv, i_ts)
+    if ts_raw is not None and ts_raw >= _MIN_DATE_TIME:
+        columns.timestamp.append(float(FIT_UTC_REFERENCE + ts_raw))
+    else:
+        columns.timestamp.append(_NAN)
+
+    hr = _valid(vals, inv, i_hr)
+    columns.heart_rate.append(_MISSING_INT if hr is None else int(hr))
+    power = _valid(vals, inv, i_pw)
+    columns.power.append(_MISSING_INT if power is None else int(power))
+    cad = _valid(vals, inv, i_cad)
+    columns.cadence.append(_MISSING_INT if cad is None else int(cad))
+
+    # speed -> enhanced_speed é componente no profile: sem enhanced nativo, vale o mesmo
+    speed = _valid(vals, inv, i_spd)
+    speed = None if speed is None else float(speed) / 1000
+    enhanced = _valid(vals, inv, i_espd)
+    enhanced = speed if enhanced is None else float(enhanced) / 1000
+    speed = speed or enhanced
+    columns.speed.append(_NAN if speed is None else speed)
+
+    alt = _valid(vals, inv, i_alt)
+    alt = None if alt is None else float(alt) / 5 - 500
+    enhanced = _valid(vals, inv, i_ealt)
+    enhanced = alt if enhanced is None else float(enhanced) / 5 - 500
+    alt = alt or enhanced
+    columns.altitude.append(_NAN if alt is None else alt)
+
+    dist = _valid(vals, inv, i_dist)
+    columns.distance.append(_NAN if dist is None else float(dist) / 100)
+
+    lat = _valid(vals, inv, i_lat)
+    lon = _valid(vals, inv, i_lon)
+    columns.lat.append(_NAN if lat is None else float(lat))
+    columns.lon.append(_NAN if lon is None else float(lon))
+
+
+def _decode_message(vals, d: _Definition, ts_raw) -> dict[str, Any]:
+    profile = _MESSAGE_FIELDS[d.global_num]
+    out = {}
+    sport_raw = None
+    for num, v, inv in zip(d.field_nums, vals, d.invalids):
+        if (v != v) if inv is None else (v == inv):
+            continue
+        name, scale, offset, kind = profile[num]
+        if kind == "date_time":
+            v = _FIT_EPOCH + timedelta(seconds=v) if v >= _MIN_DATE_TIME else v
+        elif kind == "sport":
+            sport_raw = v
+            v = SPORT_NAMES.get(v, v)
+        elif kind == "length_type":
+            v = LENGTH_TYPE_NAMES.get(v, v)
+        elif scale:
+            v = float(v) / scale
+            if offset:
+                v = v - offset
+        out[name] = v
+
+    if ts_raw is not None:
+        out["timestamp"] = _FIT_EPOCH + timedelta(seconds=ts_raw) if ts_raw >= _MIN_DATE_TIME else ts_raw
+
+    if sport_raw == _SPORT_RUNNING:
+        for name, sub in _RUNNING_SUBFIELDS.items():
+            if name in out:
+                out[sub] = out.pop(name)
+    return out
+
+
+def _accumulate_timestamp(offset: int, last_ts: int) -> int:
+    value = offset + (last_ts & ~0x1F)
+    if offset < (last_ts & 0x1F):
+        value += 0x20
+    return value
+
+
+def read_fit(data, columns) -> tuple[dict, list[dict], dict, list[dict]]:
+    """
+    Decode session/lap/record/length/device_info from a FIT buffer.
+
+    `data` pode ser bytes, bytearray, memoryview ou mmap. Records são
+    gravados em `columns`; retorna (session, laps, device_info, lengths).
+    O CRC não é verificado — a validação estrutural (tamanhos, definições,
+    assinatura) já barra arquivos truncados.
+    Raises FitReadError para qualquer estrutura inválida.
+    """
+    session: dict = {}
+    laps: list[dict] = []
+    device_info: dict = {}
+    lengths: list[dict] = []
+
+    size = len(data)
+    pos = 0
+    try:
+        while pos < size:
+            # --- file header (arquivos FIT podem vir encadeados) ---
+            header_size = data[pos]
+            if header_size not in (12, 14) or pos + header_size > size:
+                raise FitReadError("Header FIT inválido")
+            data_size = struct.unpack_from("<I", data, pos + 4)[0]
+            if bytes(data[pos + 8 : pos + 12]) != b".FIT":
+                raise FitReadError("Assinatura .FIT ausente")
+            pos += header_size
+            end = pos + data_size
+            if end > size:
+                raise FitReadError("Arquivo FIT truncado")
+
+            definitions: dict[int, _Definition] = {}
+            last_ts = 0
+
+            while pos < end:
+                header = data[pos]
+                pos += 1
+                ts_raw = None
+
+                if header & 0x80:  # compressed timestamp header
+                    local = (header >> 5) & 0x03
+                    time_offset = header & 0x1F
+                elif header & 0x40:  # definition message
+                    definitions[header & 0x0F], pos = _compile_definition(data, pos, bool(header & 0x20))
+                    continue
+                else:
+                    local = header & 0x0F
+                    time_offset = None
+
+                d = definitions.get(local)
+                if d is None:
+                    raise FitReadError(f"Mensagem de dados sem definição (local {local})")
+
+                if d.unpacker is None:
+                    pos += d.size
+                    if time_offset is not None:
+                        last_ts = _accumulate_timestamp(time_offset, last_ts)
+                    continue
+
+                vals = d.unpacker.unpack_from(data, pos)
+                pos += d.size
+
+                if d.ts_index >= 0:
+                    v = vals[d.ts_index]
+                    if v != 0xFFFFFFFF:
+                        last_ts = v
+                if time_offset is not None:
+                    last_ts = _accumulate_timestamp(time_offset, last_ts)
+                    ts_raw = last_ts
+
+                gnum = d.global_num
+                if gnum == MESG_RECORD:
+                    _append_record(columns, vals, d, ts_raw)
+                elif gnum == MESG_SESSION:
+                    session = _decode_message(vals, d, ts_raw)
+                elif gnum == MESG_LAP:
+                    laps.append(_decode_message(vals, d, ts_raw))
+                elif gnum == MESG_LENGTH:
+                    lengths.append(_decode_message(vals, d, ts_raw))
+                elif gnum == MESG_DEVICE_INFO:
+                    device_info = _decode_message(vals, d, ts_raw)
+
+            if pos != end:
+                raise FitReadError("Mensagem ultrapassa o tamanho declarado")
+            pos = end + 2  # file CRC
+    except (struct.error, IndexError) as e:
+        raise FitReadError(f"Arquivo FIT corrompido: {e}") from e
+
+    return session, laps, device_info, lengths
@@ -0,0 +1,132 @@
+"""
+ISO-8601 vetorizado — decodifica todos os timestamps de uma vez.
+
+Cobre as variantes que aparecem em TCX do Garmin e de outros exportadores:
+    2024-03-10T07:00:00Z
+    2024-03-10T07:00:00.123Z          (fração; só os 9 primeiros dígitos contam)
+    2024-03-10T04:00:00-03:00         (offset ±hh:mm, ±hhmm ou ±hh)
+    2024-03-10T07:00:00               (sem fuso = UTC)
+
+Os textos viram uma matriz de bytes (n x largura) e cada campo é lido por
+posição com aritmética de arrays, sem um strptime por ponto. O que não
+casa com o formato vira NaN e é sinalizado na máscara `invalid` — nunca
+"agora".
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+
+# Maior texto aceito: data/hora (19) + fração (até 10) + offset (6)
+MAX_LEN = 35
+
+_ZERO = ord("0")
+_DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+
+
+def parse_iso8601(texts: Sequence[Optional[str]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Decode timestamps to epoch seconds (UTC, float64).
+
+    Retorna (epoch, invalid): epoch é NaN onde o texto falta ou é inválido;
+    invalid marca só os textos presentes que não puderam ser lidos.
+    """
+    n = len(texts)
+    epoch = np.full(n, np.nan)
+    invalid = np.zeros(n, dtype=bool)
+    if n == 0:
+        return epoch, invalid
+
+    present = np.fromiter((t is not None for t in texts), dtype=bool, count=n)
+    raw = [t.strip().encode("ascii", "replace") if t is not None else b"" for t in texts]
+    too_long = np.fromiter((len(b) > MAX_LEN for b in raw), dtype=bool, count=n)
+    buf = np.array([b if len(b) <= MAX_LEN else b"" for b in raw], dtype=f"S{MAX_LEN}")
+    c = buf.view(np.uint8).reshape(n, MAX_LEN).astype(np.int64)
+
+    digit = (c >= _ZERO) & (c <= _ZERO + 9)
+    d = c - _ZERO
+
+    def num(start: int, width: int) -> np.ndarray:
+        out = np.zeros(n, dtype=np.int64)
+        for i in range(start, start + width):
+            out = out * 10 + d[:, i]
+        return out
+
+    ok = present & ~too_long
+    ok &= digit[:, [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]].all(axis=1)
+    ok &= (c[:, 4] == ord("-")) & (c[:, 7] == ord("-")) & ((c[:, 10] == ord("T")) | (c[:, 10] == ord(" ")))
+    ok &= (c[:, 13] == ord(":")) & (c[:, 16] == ord(":"))
+
+    year, month, day = num(0, 4), num(5, 2), num(8, 2)
+    hour, minute, second = num(11, 2), num(14, 2), num(17, 2)
+
+    # --- fração de segundo: '.' seguido de 1-9 dígitos ---
+    has_frac = c[:, 19] == ord(".")
+    tail = digit[:, 20:]
+    frac_len = np.where(tail.all(axis=1), tail.shape[1], np.argmin(tail, axis=1))
+    frac_len = np.where(has_frac, frac_len, 0)
+    ok &= ~has_frac | (frac_len >= 1)
+
+    cols = np.arange(tail.shape[1])
+    in_frac = cols[None, :] < np.minimum(frac_len, 9)[:, None]
+    scale = 10.0 ** -(cols + 1)
+    frac = (np.where(in_frac, d[:, 20:], 0) * scale[None, :]).sum(axis=1)
+
+    # --- fuso: Z, ±hh:mm, ±hhmm, ±hh ou nada ---
+    rows = np.arange(n)
+    tz = 19 + np.where(has_frac, frac_len + 1, 0)
+    tz = np.minimum(tz, MAX_LEN - 1)
+
+    def at(offset: int) -> np.ndarray:
+        idx = np.minimum(tz + offset, MAX_LEN - 1)
+        return np.where(tz + offset < MAX_LEN, c[rows, idx], 0)
+
+    def dig(offset: int) -> np.ndarray:
+        ch = at(offset)
+        return (ch >= _ZERO) & (ch <= _ZERO + 9)
+
+    def val(offset: int) -> np.ndarray:
+        return at(offset) - _ZERO
+
+    sign_ch = at(0)
+    is_z = sign_ch == ord("Z")
+    is_naive = sign_ch == 0
+    is_off = (sign_ch == ord("+")) | (sign_ch == ord("-"))
+
+    colon = at(3) == ord(":")
+    hh_ok = dig(1) & dig(2)
+    mm_colon = colon & dig(4) & dig(5)
+    mm_plain = ~colon & dig(3) & dig(4)
+    only_hh = ~colon & (at(3) == 0)
+    off_len = np.where(mm_colon, 6, np.where(mm_plain, 5, 3))
+    off_min = np.where(mm_colon, val(4) * 10 + val(5), np.where(mm_plain, val(3) * 10 + val(4), 0))
+    off_hours = val(1) * 10 + val(2)
+    offset_s = np.where(is_off, (off_hours * 60 + off_min) * 60, 0)
+    offset_s = np.where(sign_ch == ord("-"), -offset_s, offset_s)
+    ok &= is_z | is_naive | (is_off & hh_ok & (mm_colon | mm_plain | only_hh) & (off_hours < 24) & (off_min < 60))
+
+    # nada além do fuso (o resto do buffer é padding NUL)
+    end = tz + np.where(is_z, 1, np.where(is_off, off_len, 0))
+    trailing = np.arange(MAX_LEN)[None, :] >= end[:, None]
+    ok &= ~(trailing & (c != 0)).any(axis=1)
+
+    # --- faixas ---
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_ok = (month >= 1) & (month <= 12)
+    dim = _DAYS_IN_MONTH[np.where(month_ok, month, 1)] + ((month == 2) & leap)
+    ok &= month_ok & (day >= 1) & (day <= dim) & (hour < 24) & (minute < 60) & (second <= 60)
+
+    seconds = _days_from_civil(year, month, day) * 86400 + hour * 3600 + minute * 60 + second - offset_s
+    epoch = np.where(ok, seconds + frac, np.nan)
+    invalid = present & ~ok
+    return epoch, invalid
+
+
+def _days_from_civil(y: np.ndarray, m: np.ndarray, d: np.ndarray) -> np.ndarray:
+    """Days since 1970-01-01 for a proleptic Gregorian date (H. Hinnant)."""
+    y = y - (m <= 2)
+    era = np.floor_divide(y, 400)
+    yoe = y - era * 400
+    mp = (m + 9) % 12
+    doy = (153 * mp + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
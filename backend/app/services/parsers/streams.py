@@ -0,0 +1,195 @@
+"""
+Activity Streams — séries da atividade numa única base de tempo de 1 Hz.
+
+Os parsers produzem um ActivityStreams por arquivo e as métricas leem as
+colunas direto: FC, velocidade, potência etc. compartilham o mesmo eixo
+(segundo i = t0 + i), então alinhar canais é indexar, não reamostrar de
+novo em cada métrica. Segundos sem amostra (antes do sensor ligar, pausas,
+sensor caído) ficam NaN; canais que o arquivo não tem ficam None.
+
+Para o banco e a API, to_series() gera as séries no formato colunar
+{"t": [...], <valor>: [...]} da pirâmide de zoom (sem os segundos NaN);
+from_series() faz o caminho inverso a partir do nível de resolução cheia.
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.services.analytics.kernels import ALIGN_MAX_GAP_S, sample_on_grid
+
+CHANNELS = ("hr", "speed", "power", "cadence", "altitude", "lat", "lon", "distance")
+
+# Maior duração aceita na base de 1 Hz: um timestamp corrompido (um ano à
+# frente, por exemplo) viraria milhões de linhas a partir de poucas amostras
+MAX_SPAN_S = 48 * 3600
+
+# Séries acumuladas: interpoladas entre amostras em vez de repetidas
+_CUMULATIVE = ("distance",)
+
+# Stream gravado -> (canal, chave no dict, casas decimais; None = inteiro)
+_STREAMS = {
+    "hr": ("hr", "hr", None),
+    "power": ("power", "power", None),
+    "cadence": ("cadence", "cadence", None),
+    "altitude": ("altitude", "alt", 1),
+    "distance": ("distance", "distance", 2),
+}
+
+
+def _grid(t_min: float, t_max: float) -> tuple[int, int]:
+    """(t0, n) of the 1 Hz base covering [t_min, t_max]; ValueError acima de MAX_SPAN_S."""
+    t0 = int(np.floor(t_min))
+    n = int(np.floor(t_max)) - t0 + 1
+    if n > MAX_SPAN_S:
+        raise ValueError(f"Intervalo de tempo de {n} s excede o limite de {MAX_SPAN_S} s (timestamps inválidos?)")
+    return t0, n
+
+
+def _speed_from_pace(pace_min_km: np.ndarray) -> np.ndarray:
+    """min/km -> m/s (pace 0 ou NaN = sem velocidade)."""
+    pace = np.asarray(pace_min_km, dtype=np.float64)
+    return np.divide(1000 / 60, pace, out=np.full_like(pace, np.nan), where=pace > 0)
+
+
+class ActivityStreams:
+    """
+    NumPy columns on one 1 Hz time base (segundos desde o início: t0 + i).
+
+    Cada canal é um array float64 de tamanho n (NaN = sem dado) ou None.
+    """
+
+    __slots__ = ("t0", "n") + CHANNELS
+
+    def __init__(self, t0: int = 0, n: int = 0, **columns: Optional[np.ndarray]):
+        self.t0 = t0
+        self.n = n
+        for name in CHANNELS:
+            setattr(self, name, columns.get(name))
+
+    def __len__(self) -> int:
+        return self.n
+
+    @classmethod
+    def from_samples(
+        cls,
+        t: Sequence[float],
+        max_gap_s: float = ALIGN_MAX_GAP_S,
+        **columns: Sequence[float],
+    ) -> "ActivityStreams":
+        """
+        Streams from per-sample columns sharing the timestamps `t` (s desde
+        o início; NaN = amostra sem valor naquele canal).
+
+        Raises ValueError if the samples span more than MAX_SPAN_S.
+        """
+        t = np.asarray(t, dtype=np.float64)
+        if np.isnan(t).all():
+            return cls()
+        streams = cls(*_grid(np.nanmin(t), np.nanmax(t)))
+        for name, values in columns.items():
+            streams.add(name, values, t, max_gap_s)
+        return streams
+
+    @classmethod
+    def from_series(cls, series: dict[str, dict[str, Sequence[float]]]) -> "ActivityStreams":
+        """
+        Rebuild from stored series ({"t", <valor>} por stream, ver to_series).
+
+        Aceita também streams legados já reduzidos (LTTB): a falha máxima de
+        cada série é 3x o intervalo mediano, se maior que o padrão.
+        """
+        streams = cls()
+        for name, arrays in series.items():
+            t = np.asarray(arrays["t"], dtype=np.float64)
+            if len(t) == 0:
+                continue
+            max_gap_s = max(ALIGN_MAX_GAP_S, 3 * float(np.median(np.diff(t)))) if len(t) > 1 else ALIGN_MAX_GAP_S
+            if name in _STREAMS:
+                channel, key, _ = _STREAMS[name]
+                streams.add(channel, arrays[key], t, max_gap_s)
+            elif name == "pace":
+                streams.add("speed", _speed_from_pace(arrays["pace"]), t, max_gap_s)
+            elif name == "gps":
+                streams.add("lat", arrays["lat"], t, max_gap_s)
+                streams.add("lon", arrays["lon"], t, max_gap_s)
+        return streams
+
+    def add(
+        self,
+        name: str,
+        values: Sequence[float],
+        t: Sequence[float],
+        max_gap_s: float = ALIGN_MAX_GAP_S,
+    ) -> None:
+        """
+        Put one channel sampled at times `t` on the time base.
+
+        O primeiro canal com amostras define a base; os seguintes são
+        recortados a ela. Canal sem nenhuma amostra válida fica None.
+        """
+        if name not in CHANNELS:
+            raise ValueError(f"Canal desconhecido: {name}")
+        t = np.asarray(t, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if self.n == 0:
+            ok = ~np.isnan(t) & ~np.isnan(values)
+            if not ok.any():
+                return
+            self.t0, self.n = _grid(t[ok].min(), t[ok].max())
+
+        column = sample_on_grid(values, t, self.t, max_gap_s, interpolate=name in _CUMULATIVE)
+        setattr(self, name, None if np.isnan(column).all() else column)
+
+    @property
+    def t(self) -> np.ndarray:
+        """Seconds since the start for each row."""
+        return np.arange(self.t0, self.t0 + self.n, dtype=np.float64)
+
+    @property
+    def pace(self) -> Optional[np.ndarray]:
+        """Pace in min/km from speed (NaN parado ou sem dado)."""
+        if self.speed is None:
+            return None
+        return np.divide(1000 / 60, self.speed, out=np.full(self.n, np.nan), where=self.speed > 0)
+
+    def valid(self, name: str) -> tuple[np.ndarray, np.ndarray]:
+        """(t, values) of one channel without the NaN seconds."""
+        column = getattr(self, name) if name != "pace" else self.pace
+        if column is None:
+            return np.empty(0), np.empty(0)
+        ok = ~np.isnan(column)
+        return self.t[ok], column[ok]
+
+    def series(self, name: str) -> Optional[dict[str, np.ndarray]]:
+        """One stored stream ({"t": int, <valor>: ...}), or None without data."""
+        if name == "gps":
+            if self.lat is None or self.lon is None:
+                return None
+            ok = ~np.isnan(self.lat) & ~np.isnan(self.lon)
+            if not ok.any():
+                return None
+            return {
+                "t": self.t[ok].astype(np.int64),
+                "lat": np.round(self.lat[ok], 6),
+                "lon": np.round(self.lon[ok], 6),
+            }
+
+        if name == "pace":
+            t, values = self.valid("pace")
+            key, decimals = "pace", 2
+        else:
+            channel, key, decimals = _STREAMS[name]
+            t, values = self.valid(channel)
+        if len(t) == 0:
+            return None
+        values = np.round(values).astype(np.int64) if decimals is None else np.round(values, decimals)
+        return {"t": t.astype(np.int64), key: values}
+
+    def to_series(self) -> dict[str, dict[str, np.ndarray]]:
+        """All stored streams with data, by name (hr, pace, power, ...)."""
+        out = {}
+        for name in ("hr", "pace", "power", "cadence", "altitude", "gps", "distance"):
+            arrays = self.series(name)
+            if arrays is not None:
+                out[name] = arrays
+        return out
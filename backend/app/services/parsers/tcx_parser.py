@@ -2,14 +2,46 @@
 TCX File Parser — fallback para quando .FIT não está disponível.
 Extrai: HR, cadência, laps, calorias, GPS, elevação.
 Não tem: running dynamics, swim metrics detalhados, training effect.
+
+O modo padrão lê o XML com iterparse: cada Trackpoint vai direto para
+colunas tipadas e é descartado em seguida, então o pico de memória não
+cresce com o tamanho do arquivo (só as colunas, ~56 bytes por ponto).
 """
+import io
 import xml.etree.ElementTree as ET
-from datetime import datetime
-from typing import Any
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+import numpy as np
+
+from app.services.parsers.downsample import render_stream
+from app.services.parsers.iso8601 import parse_iso8601
+from app.services.parsers.streams import ActivityStreams
 
 NS = {"ns": "http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2"}
 MAX_STREAM_POINTS = 3600
 
+_TAG = "{%s}" % NS["ns"]
+_ACTIVITY = _TAG + "Activity"
+_ID = _TAG + "Id"
+_LAP = _TAG + "Lap"
+_TRACKPOINT = _TAG + "Trackpoint"
+_POSITION = _TAG + "Position"
+_TIME = _TAG + "Time"
+_LAT = _TAG + "LatitudeDegrees"
+_LNG = _TAG + "LongitudeDegrees"
+_ALT = _TAG + "AltitudeMeters"
+_DIST = _TAG + "DistanceMeters"
+_CAD = _TAG + "Cadence"
+_HR_BPM = _TAG + "HeartRateBpm"
+_VALUE = _TAG + "Value"
+_POINT_FIELDS = frozenset((_TIME, _LAT, _LNG, _ALT, _DIST, _CAD))
+
+_NAN = float("nan")
+_UNIX_EPOCH = datetime(1970, 1, 1)
+_TIME_CHUNK = 4096  # textos de <Time> decodificados por vez
+
 TCX_SPORT_MAP = {
     "running": "run",
     "biking": "bike",
@@ -18,62 +50,118 @@ TCX_SPORT_MAP = {
 }
 
 
-def parse_tcx(file_bytes: bytes) -> dict[str, Any]:
-    """Parse a .TCX file and return a standardized activity dict."""
-    root = ET.fromstring(file_bytes)
-
-    activity = root.find(".//ns:Activity", NS)
-    if activity is None:
-        raise ValueError("Nenhuma atividade encontrada no arquivo TCX")
-
-    raw_sport = (activity.get("Sport") or "Other").lower()
-    sport = TCX_SPORT_MAP.get(raw_sport, "run")
-
-    id_tag = activity.find("ns:Id", NS)
-    start_time_str = id_tag.text if id_tag is not None else None
-    start_time = _parse_time(start_time_str) if start_time_str else datetime.utcnow()
-
-    total_time = 0.0
-    total_distance = 0.0
-    total_calories = 0
-    hr_values = []
-    all_trackpoints = []
-    laps_data = []
-
-    laps = activity.findall("ns:Lap", NS)
-
-    for i, lap in enumerate(laps):
-        lap_time = _float(lap, "ns:TotalTimeSeconds")
-        lap_dist = _float(lap, "ns:DistanceMeters")
-        lap_cal = _int(lap, "ns:Calories")
-
-        total_time += lap_time
-        total_distance += lap_dist
-        total_calories += lap_cal
+class TrackpointColumns:
+    """
+    Colunas tipadas com os campos de Trackpoint usados nos streams.
+
+    Todas float64; ausente = NaN. Os textos de <Time> são acumulados e
+    decodificados em blocos de _TIME_CHUNK por parse_iso8601; chame
+    finish() ao fim da leitura.
+    """
+
+    __slots__ = ("time", "hr", "cadence", "alt", "lat", "lng", "distance", "invalid_times", "malformed", "_pending_times")
+
+    def __init__(self):
+        self.time = array("d")  # epoch seconds (UTC)
+        self.hr = array("d")
+        self.cadence = array("d")
+        self.alt = array("d")
+        self.lat = array("d")
+        self.lng = array("d")
+        self.distance = array("d")
+        self.invalid_times = 0  # textos de <Time> presentes mas ilegíveis (interpolados)
+        self.malformed = 0  # trackpoints descartados por valor numérico inválido
+        self._pending_times: list[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def append(self, time_str, lat, lng, alt, dist, hr, cad, has_position: bool) -> bool:
+        """
+        Append one trackpoint from its raw element texts (None = absent).
+        Returns False (and appends nothing, só conta em malformed) if a
+        value is malformed.
+        """
+        try:
+            lat = float(lat) if has_position else _NAN
+            lng = float(lng) if has_position else _NAN
+            alt = float(alt) if alt is not None else _NAN
+            dist = float(dist) if dist is not None else _NAN
+            hr = int(hr) if hr is not None else _NAN
+            cad = int(cad) if cad is not None else _NAN
+        except (TypeError, ValueError):
+            self.malformed += 1
+            return False
+
+        self._pending_times.append(time_str)
+        if len(self._pending_times) >= _TIME_CHUNK:
+            self._decode_times()
+        self.lat.append(lat)
+        self.lng.append(lng)
+        self.alt.append(alt)
+        self.distance.append(dist)
+        self.hr.append(hr)
+        self.cadence.append(cad)
+        return True
+
+    def finish(self) -> "TrackpointColumns":
+        """Decode the remaining <Time> texts."""
+        self._decode_times()
+        return self
+
+    def _decode_times(self) -> None:
+        if not self._pending_times:
+            return
+        epoch, invalid = parse_iso8601(self._pending_times)
+        self.time.extend(epoch.tolist())
+        self.invalid_times += int(invalid.sum())
+        self._pending_times.clear()
+
+    def append_trackpoint(self, pt: ET.Element) -> bool:
+        """Append one <Trackpoint> element (tree mode)."""
+        pos = pt.find("ns:Position", NS)
+        return self.append(
+            _text(pt, "ns:Time"),
+            _text(pos, "ns:LatitudeDegrees") if pos is not None else None,
+            _text(pos, "ns:LongitudeDegrees") if pos is not None else None,
+            _text(pt, "ns:AltitudeMeters"),
+            _text(pt, "ns:DistanceMeters"),
+            _text(pt, ".//ns:HeartRateBpm/ns:Value"),
+            _text(pt, "ns:Cadence"),
+            has_position=pos is not None,
+        )
+
+
+def parse_tcx(file_bytes, streaming: bool = True) -> dict[str, Any]:
+    """
+    Parse a .TCX file and return a standardized activity dict.
+
+    Aceita bytes ou um objeto file-like/mmap. streaming=False monta a
+    árvore inteira (ET.fromstring/parse) — caminho antigo, para comparação.
+    """
+    if hasattr(file_bytes, "read"):
+        file_bytes.seek(0)
+        source = file_bytes
+    else:
+        source = io.BytesIO(file_bytes)
 
-        lap_hr_values = []
-        track = lap.find("ns:Track", NS)
-        if track is not None:
-            for pt in track.findall("ns:Trackpoint", NS):
-                tp = _parse_trackpoint(pt)
-                if tp:
-                    all_trackpoints.append(tp)
-                    if tp.get("hr"):
-                        hr_values.append(tp["hr"])
-                        lap_hr_values.append(tp["hr"])
-
-        laps_data.append({
-            "lap": i + 1,
-            "distance_m": round(lap_dist, 1),
-            "duration_s": round(lap_time, 1),
-            "avg_hr": int(sum(lap_hr_values) / len(lap_hr_values)) if lap_hr_values else None,
-            "max_hr": max(lap_hr_values) if lap_hr_values else None,
-            "calories": lap_cal,
-        })
-
-    avg_hr = int(sum(hr_values) / len(hr_values)) if hr_values else None
-    max_hr = max(hr_values) if hr_values else None
-    min_hr = min(hr_values) if hr_values else None
+    reader = _read_streaming if streaming else _read_tree
+    try:
+        sport, id_text, laps_data, columns = reader(source)
+    except ET.ParseError as e:
+        # XML malformado: ValueError como os demais erros de parse
+        raise ValueError(f"Arquivo TCX inválido: {e}") from e
+    start_time = _resolve_start_time(id_text, columns)
+
+    total_time = sum(lap.pop("_time") for lap in laps_data)
+    total_distance = sum(lap.pop("_distance") for lap in laps_data)
+    total_calories = sum(lap["calories"] for lap in laps_data)
+
+    hr_all = np.frombuffer(columns.hr, dtype=np.float64)
+    hr_values = hr_all[hr_all > 0]  # NaN > 0 é False
+    avg_hr = int(hr_values.sum() / len(hr_values)) if len(hr_values) else None
+    max_hr = int(hr_values.max()) if len(hr_values) else None
+    min_hr = int(hr_values.min()) if len(hr_values) else None
 
     # Speed / Pace
     avg_speed_kmh = None
@@ -83,60 +171,53 @@ def parse_tcx(file_bytes: bytes) -> dict[str, Any]:
         avg_speed_kmh = round(avg_speed_ms * 3.6, 2)
         avg_pace_min_km = round((1000 / avg_speed_ms) / 60, 2)
 
-    # Build streams
-    hr_stream = []
-    altitude_stream = []
-    gps_stream = []
-    pace_stream = []
-
-    if all_trackpoints:
-        step = max(1, len(all_trackpoints) // MAX_STREAM_POINTS)
-        first_ts = all_trackpoints[0].get("time_dt")
-
-        prev_dist = 0
-        prev_time = 0
-
-        for i in range(0, len(all_trackpoints), step):
-            tp = all_trackpoints[i]
-            ts = tp.get("time_dt")
-            elapsed = int((ts - first_ts).total_seconds()) if ts and first_ts else i
-
-            if tp.get("hr"):
-                hr_stream.append({"t": elapsed, "hr": tp["hr"]})
-
-            if tp.get("alt") is not None:
-                altitude_stream.append({"t": elapsed, "alt": round(tp["alt"], 1)})
-
-            if tp.get("lat") is not None and tp.get("lng") is not None:
-                gps_stream.append({
-                    "t": elapsed,
-                    "lat": tp["lat"],
-                    "lon": tp["lng"],
-                })
-
-            # Estimate pace from distance deltas
-            curr_dist = tp.get("distance") or 0
-            if curr_dist > prev_dist and elapsed > prev_time:
-                delta_dist = curr_dist - prev_dist
-                delta_time = elapsed - prev_time
-                if delta_dist > 0:
-                    speed = delta_dist / delta_time
-                    pace = round((1000 / speed) / 60, 2) if speed > 0 else None
-                    if pace and pace < 20:  # Sanity check
-                        pace_stream.append({"t": elapsed, "pace": pace})
-                prev_dist = curr_dist
-                prev_time = elapsed
-
-    # Calculate elevation from altitude stream
+    # Séries alinhadas em 1 Hz (métricas e pirâmide de zoom)
+    streams = ActivityStreams()
     total_ascent = 0.0
     total_descent = 0.0
-    if altitude_stream:
-        for i in range(1, len(altitude_stream)):
-            diff = altitude_stream[i]["alt"] - altitude_stream[i - 1]["alt"]
-            if diff > 0:
-                total_ascent += diff
-            else:
-                total_descent += abs(diff)
+
+    n_points = len(columns)
+    if n_points:
+        step = max(1, n_points // MAX_STREAM_POINTS)
+        elapsed = _elapsed_seconds(np.frombuffer(columns.time, dtype=np.float64))
+        hr = np.where(hr_all > 0, hr_all, np.nan)  # NaN > 0 é False
+        alt = np.frombuffer(columns.alt, dtype=np.float64)
+        lat = np.frombuffer(columns.lat, dtype=np.float64)
+        lng = np.frombuffer(columns.lng, dtype=np.float64)
+        dist = np.frombuffer(columns.distance, dtype=np.float64)
+        no_fix = np.isnan(lat) | np.isnan(lng)
+
+        streams = ActivityStreams.from_samples(
+            elapsed,
+            hr=hr,
+            altitude=alt,
+            lat=np.where(no_fix, np.nan, lat),
+            lon=np.where(no_fix, np.nan, lng),
+            distance=dist,
+        )
+
+        # Velocidade a partir de deltas de distância, na mesma janela (step pontos) de antes
+        dist_idx = np.flatnonzero(dist > 0)
+        if len(dist_idx) > step:
+            d = dist[dist_idx]
+            t = elapsed[dist_idx]
+            delta_dist = d[step:] - d[:-step]
+            delta_time = t[step:] - t[:-step]
+            ok = (delta_dist > 0) & (delta_time > 0)
+            speed = delta_dist[ok] / delta_time[ok]
+            sane = (1000 / speed) / 60 < 20  # Sanity check (pace < 20 min/km)
+            streams.add("speed", speed[sane], t[step:][ok][sane])
+
+        # Elevação: mesma amostragem (1 a cada step) usada antes, para não inflar com ruído do GPS
+        alt_sampled = np.round(alt[::step], 1)
+        alt_sampled = alt_sampled[~np.isnan(alt_sampled)]
+        if len(alt_sampled) > 1:
+            diffs = np.diff(alt_sampled)
+            total_ascent = float(diffs[diffs > 0].sum())
+            total_descent = float(-diffs[diffs < 0].sum())
+
+    # Streams para o detalhe (LTTB até MAX_STREAM_POINTS)
+    rendered = {name: render_stream(arrays, MAX_STREAM_POINTS) for name, arrays in streams.to_series().items()}
 
     # Title
     dist_km = total_distance / 1000
@@ -185,58 +266,165 @@ def parse_tcx(file_bytes: bytes) -> dict[str, Any]:
         "pool_length_m": None,
         "total_lengths": None,
         "swolf": None,
-        "hr_stream": hr_stream or None,
-        "pace_stream": pace_stream or None,
+        "hr_stream": rendered.get("hr"),
+        "pace_stream": rendered.get("pace"),
         "power_stream": None,
         "cadence_stream": None,
-        "altitude_stream": altitude_stream or None,
-        "gps_stream": gps_stream or None,
+        "altitude_stream": rendered.get("altitude"),
+        "gps_stream": rendered.get("gps"),
         "laps_data": laps_data or None,
+        "invalid_timestamps": columns.invalid_times,
+        "malformed_trackpoints": columns.malformed,
+        "streams": streams,
     }
 
 
-def _parse_trackpoint(pt: ET.Element) -> dict | None:
-    try:
-        time_el = pt.find("ns:Time", NS)
-        time_str = time_el.text if time_el is not None else None
-        time_dt = _parse_time(time_str) if time_str else None
+def _read_streaming(source) -> tuple[str, Optional[str], list[dict], TrackpointColumns]:
+    """
+    iterparse: os textos de cada Trackpoint são lidos nos eventos "end"
+    das folhas e gravados nas colunas quando o Trackpoint fecha; o elemento
+    é então removido da árvore. Cada Lap é resumido e removido ao fechar.
+    Lê só a primeira <Activity>.
+    """
+    columns = TrackpointColumns()
+    laps_data: list[dict] = []
+    sport = None
+    start_time = None
+    lap_first_point = 0
+    parents: list[ET.Element] = []
+
+    in_point = False
+    point: dict[str, str | None] = {}
+    has_position = False
+
+    for event, el in ET.iterparse(source, events=("start", "end")):
+        tag = el.tag
+        if event == "start":
+            if tag == _TRACKPOINT:
+                in_point = True
+                point = {}
+                has_position = False
+            elif tag == _POSITION:
+                has_position = True
+            elif tag == _LAP:
+                lap_first_point = len(columns)
+            elif tag == _ACTIVITY and sport is None:
+                sport = TCX_SPORT_MAP.get((el.get("Sport") or "Other").lower(), "run")
+            parents.append(el)
+            continue
 
-        pos = pt.find("ns:Position", NS)
-        lat = float(pos.find("ns:LatitudeDegrees", NS).text) if pos is not None else None
-        lng = float(pos.find("ns:LongitudeDegrees", NS).text) if pos is not None else None
+        parents.pop()
+        if in_point:
+            if tag == _TRACKPOINT:
+                in_point = False
+                columns.append(
+                    point.get(_TIME), point.get(_LAT), point.get(_LNG), point.get(_ALT),
+                    point.get(_DIST), point.get(_HR_BPM), point.get(_CAD), has_position,
+                )
+                el.clear()
+                if parents:
+                    parents[-1].remove(el)
+            elif tag == _VALUE:
+                if parents and parents[-1].tag == _HR_BPM:
+                    point.setdefault(_HR_BPM, el.text)
+            elif tag in _POINT_FIELDS and parents and parents[-1].tag in (_TRACKPOINT, _POSITION):
+                point.setdefault(tag, el.text)
+        elif tag == _LAP:
+            laps_data.append(_lap_summary(el, len(laps_data), columns, lap_first_point))
+            el.clear()
+            if parents:
+                parents[-1].remove(el)
+        elif tag == _ID and parents and parents[-1].tag == _ACTIVITY and start_time is None:
+            start_time = el.text
+        elif tag == _ACTIVITY:
+            break
+
+    if sport is None:
+        raise ValueError("Nenhuma atividade encontrada no arquivo TCX")
+    return sport, start_time, laps_data, columns.finish()
+
+
+def _read_tree(source) -> tuple[str, Optional[str], list[dict], TrackpointColumns]:
+    """Full-tree reader (ET.parse) — same output as _read_streaming."""
+    root = ET.parse(source).getroot()
+
+    activity = root.find(".//ns:Activity", NS)
+    if activity is None:
+        raise ValueError("Nenhuma atividade encontrada no arquivo TCX")
+
+    raw_sport = (activity.get("Sport") or "Other").lower()
+    sport = TCX_SPORT_MAP.get(raw_sport, "run")
 
-        alt_el = pt.find("ns:AltitudeMeters", NS)
-        alt = float(alt_el.text) if alt_el is not None else None
+    start_time = _text(activity, "ns:Id")
 
-        dist_el = pt.find("ns:DistanceMeters", NS)
-        dist = float(dist_el.text) if dist_el is not None else None
+    columns = TrackpointColumns()
+    laps_data = []
+    for i, lap in enumerate(activity.findall("ns:Lap", NS)):
+        first_point = len(columns)
+        track = lap.find("ns:Track", NS)
+        if track is not None:
+            for pt in track.findall("ns:Trackpoint", NS):
+                columns.append_trackpoint(pt)
+        laps_data.append(_lap_summary(lap, i, columns, first_point))
 
-        hr_el = pt.find(".//ns:HeartRateBpm/ns:Value", NS)
-        hr = int(hr_el.text) if hr_el is not None else None
+    return sport, start_time, laps_data, columns.finish()
 
-        cad_el = pt.find("ns:Cadence", NS)
-        cad = int(cad_el.text) if cad_el is not None else None
 
-        return {
-            "time_dt": time_dt,
-            "lat": lat,
-            "lng": lng,
-            "alt": alt,
-            "distance": dist,
-            "hr": hr,
-            "cadence": cad,
-        }
-    except Exception:
-        return None
+def _lap_summary(lap: ET.Element, index: int, columns: TrackpointColumns, first_point: int) -> dict:
+    """laps_data entry; _time/_distance are popped by parse_tcx for the totals."""
+    lap_time = _float(lap, "ns:TotalTimeSeconds")
+    lap_dist = _float(lap, "ns:DistanceMeters")
+    lap_cal = _int(lap, "ns:Calories")
 
+    # cópia da fatia: um view sobre o array impediria novos appends
+    hr = np.array(columns.hr[first_point:], dtype=np.float64)
+    hr = hr[hr > 0]
 
-def _parse_time(s: str) -> datetime:
-    for fmt in ("%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S"):
-        try:
-            return datetime.strptime(s, fmt)
-        except ValueError:
-            continue
-    return datetime.utcnow()
+    return {
+        "lap": index + 1,
+        "distance_m": round(lap_dist, 1),
+        "duration_s": round(lap_time, 1),
+        "avg_hr": int(hr.sum() / len(hr)) if len(hr) else None,
+        "max_hr": int(hr.max()) if len(hr) else None,
+        "calories": lap_cal,
+        "_time": lap_time,
+        "_distance": lap_dist,
+    }
+
+
+def _elapsed_seconds(time: np.ndarray) -> np.ndarray:
+    """
+    Whole seconds since the first trackpoint. Horários faltando/ilegíveis
+    são interpolados entre os vizinhos válidos; sem nenhum, usa o índice.
+    """
+    index = np.arange(len(time), dtype=np.int64)
+    valid = ~np.isnan(time)
+    if not valid.any():
+        return index
+    if not valid.all():
+        time = np.interp(index, index[valid], time[valid])
+    return np.trunc(time - time[0]).astype(np.int64)
+
+
+def _resolve_start_time(id_text: Optional[str], columns: TrackpointColumns) -> datetime:
+    """
+    Start time from <Id>; if absent/unreadable, the first valid trackpoint
+    time. Sem nenhum horário válido o arquivo é rejeitado.
+    """
+    epoch, _ = parse_iso8601([id_text])
+    start = epoch[0]
+    if np.isnan(start):
+        times = np.frombuffer(columns.time, dtype=np.float64)
+        valid = times[~np.isnan(times)]
+        if not len(valid):
+            raise ValueError("Arquivo TCX sem horário de início válido")
+        start = valid[0]
+    return _UNIX_EPOCH + timedelta(seconds=float(start))
+
+
+def _text(el: ET.Element, path: str):
+    child = el.find(path, NS)
+    return child.text if child is not None else None
 
 
 def _float(el: ET.Element, path: str) -> float:
@@ -0,0 +1,266 @@
+"""
+Recompute — recálculo de TSS/IF/TRIMP e zonas quando os limiares mudam.
+
+Mudar FTP, pace de limiar, CSS ou FC máx/repouso no perfil deixa as
+métricas guardadas com os limiares antigos. O job percorre as atividades
+do atleta em lotes (keyset por id), carrega só as colunas escalares e os
+streams de resolução cheia que as zonas alteradas precisam, recalcula e
+grava com um UPDATE em lote por chunk. Mudar o FTP refaz também o W′bal dos
+pedais (o FTP é o CP de reserva quando não há ajuste dos esforços), com
+refresh_w_prime_balance — usado ainda pela importação em lote.
+
+Novas mudanças durante o job entram em `_pending` e são processadas pelo
+mesmo job numa nova passada, com os limiares já atualizados.
+"""
+import uuid
+from datetime import datetime
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import delete, func, select, update
+
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.activity import Activity
+from app.models.activity_stream import ActivityStreamLevel
+from app.models.training_plan import SportType
+from app.models.user import User
+from app.services.analytics.load_metrics import batch_load_metrics, to_optional
+from app.services.analytics.best_efforts import critical_power_at
+from app.services.analytics.training_metrics import calc_w_prime_balance, calc_zone_times
+from app.services.critical_power import load_power_efforts
+from app.services.daily_load import refresh_daily_load
+from app.services.load_risk import invalidate as invalidate_load_risk
+from app.services.ingestion import zone_distribution
+from app.services.jobs import Job, create_job, find_active_job
+from app.services.parsers.downsample import FULL_RESOLUTION, build_pyramid, render_stream
+from app.services.parsers.fit_parser import MAX_STREAM_POINTS
+from app.services.parsers.streams import ActivityStreams
+
+JOB_KIND = "threshold_recompute"
+
+THRESHOLD_FIELDS = ("ftp", "run_threshold_pace", "css", "hr_max", "hr_rest")
+
+# limiar -> (stream de resolução cheia, coluna legada, colunas de zona)
+_ZONE_INPUTS = {
+    "hr_max": ("hr", Activity.hr_stream, ("time_in_zones_seconds", "hr_zone_distribution")),
+    "ftp": ("power", Activity.power_stream, ("power_time_in_zones_seconds",)),
+    "run_threshold_pace": ("pace", Activity.pace_stream, ("pace_time_in_zones_seconds",)),
+}
+
+# Campos alterados aguardando recálculo, por usuário
+_pending: dict[uuid.UUID, set[str]] = {}
+
+
+def request_recompute(user_id: uuid.UUID, fields: set[str]) -> tuple[Job, bool]:
+    """
+    Queue a recompute of `fields` for the user.
+
+    Retorna (job, criado): com um job ativo, os campos entram na próxima
+    passada dele e nada novo precisa ser agendado.
+    """
+    _pending.setdefault(user_id, set()).update(fields)
+    job = find_active_job(user_id, JOB_KIND)
+    if job is not None:
+        return job, False
+    return create_job(user_id, JOB_KIND), True
+
+
+async def run_recompute(job: Job, user_id: uuid.UUID) -> None:
+    """Background task: recompute every activity of the user until nothing is pending."""
+    job.status = "running"
+    try:
+        async with async_session() as db:
+            while fields := _pending.pop(user_id, None):
+                await _recompute_all(db, job, user_id, fields)
+                if "ftp" in fields:
+                    await refresh_w_prime_balance(db, user_id)
+                # TSS mudou em todo o histórico: PMC refeito do início
+                await refresh_daily_load(db, user_id)
+                await db.commit()
+                invalidate_load_risk(user_id)
+            # sem await entre o último pop e o finish: um pedido que chegue
+            # depois já não vê o job ativo e cria outro (nada fica no _pending)
+            job.finish()
+    except Exception as e:
+        if job.status == "running":
+            _pending.pop(user_id, None)
+            job.finish(error=str(e))
+
+
+async def _recompute_all(db, job: Job, user_id: uuid.UUID, fields: set[str]) -> None:
+    result = await db.execute(select(*(getattr(User, f) for f in THRESHOLD_FIELDS)).where(User.id == user_id))
+    athlete = dict(result.one()._mapping)
+
+    job.total += await db.scalar(select(func.count()).select_from(Activity).where(Activity.user_id == user_id))
+
+    # TSS/IF/TRIMP sempre; zonas só para os limiares alterados
+    zones = {f: _ZONE_INPUTS[f] for f in fields if f in _ZONE_INPUTS}
+
+    last_id: Optional[uuid.UUID] = None
+    while True:
+        query = (
+            select(
+                Activity.id,
+                Activity.sport,
+                Activity.total_timer_seconds,
+                Activity.total_distance_meters,
+                Activity.avg_hr,
+                Activity.normalized_power,
+                Activity.normalized_graded_pace_min_km,
+                Activity.normalized_graded_pace_s_km,
+            )
+            .where(Activity.user_id == user_id)
+            .order_by(Activity.id)
+            .limit(settings.RECOMPUTE_BATCH_SIZE)
+        )
+        if last_id is not None:
+            query = query.where(Activity.id > last_id)
+        rows = (await db.execute(query)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        # TSS/IF/TRIMP do chunk inteiro numa chamada
+        load = batch_load_metrics(
+            sport=[r.sport.value for r in rows],
+            duration_s=[r.total_timer_seconds for r in rows],
+            distance_m=[r.total_distance_meters for r in rows],
+            avg_hr=[r.avg_hr for r in rows],
+            np_watts=[r.normalized_power for r in rows],
+            ngp_s_km=[_ngp_s_km(r) for r in rows],
+            thresholds=athlete,
+        )
+        columns = {key: to_optional(values) for key, values in load.items()}
+        values = [{"id": row.id, **{key: col[i] for key, col in columns.items()}} for i, row in enumerate(rows)]
+
+        if zones:
+            series = await _load_series(db, [r.id for r in rows], zones.values())
+            for row, row_values in zip(rows, values):
+                streams = ActivityStreams.from_series(series.get(row.id, {}))
+                row_values.update(_zone_values(row.sport.value, streams, athlete, zones))
+
+        await db.execute(update(Activity), values)
+        await db.commit()
+        job.advance(len(rows), "updated")
+
+
+def _ngp_s_km(row) -> Optional[float]:
+    """NGP in s/km as used at ingest; rows from before the s/km column fall back to min/km."""
+    if row.normalized_graded_pace_s_km:
+        return row.normalized_graded_pace_s_km
+    return row.normalized_graded_pace_min_km * 60 if row.normalized_graded_pace_min_km else None
+
+
+def _zone_values(sport: str, streams: ActivityStreams, athlete: dict, zones: dict) -> dict[str, Any]:
+    zone_times = calc_zone_times(streams, sport, athlete)
+    values = {}
+    for stream, _, columns in zones.values():
+        values[columns[0]] = zone_times[stream]
+        if stream == "hr":
+            values[columns[1]] = zone_distribution(zone_times["hr"])
+    return values
+
+
+async def refresh_w_prime_balance(db, user_id: uuid.UUID, since: Optional[datetime] = None) -> int:
+    """
+    Recompute W′bal of the user's rides from `since` (None = todos).
+
+    Cada pedal usa o CP/W′ da própria data (esforços dos CP_FIT_DAYS dias
+    anteriores a ele), com o histórico carregado uma vez. Commit por chunk;
+    retorna quantos pedais foram atualizados.
+    """
+    ftp = await db.scalar(select(User.ftp).where(User.id == user_id))
+    efforts = await load_power_efforts(db, user_id)
+    power_input = [("power", Activity.power_stream, ())]
+
+    updated = 0
+    last_id: Optional[uuid.UUID] = None
+    while True:
+        query = (
+            select(Activity.id, Activity.start_time)
+            .where(Activity.user_id == user_id, Activity.sport == SportType.BIKE)
+            .order_by(Activity.id)
+            .limit(settings.RECOMPUTE_BATCH_SIZE)
+        )
+        if since is not None:
+            query = query.where(Activity.start_time >= since)
+        if last_id is not None:
+            query = query.where(Activity.id > last_id)
+        rows = (await db.execute(query)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        series = await _load_series(db, [r.id for r in rows], power_input)
+        levels: list[ActivityStreamLevel] = []
+        values = []
+        for row in rows:
+            streams = ActivityStreams.from_series(series.get(row.id, {}))
+            model = critical_power_at(efforts, row.start_time, ftp)
+            values.append({"id": row.id, **_wbal_values(row.id, streams, model, levels)})
+
+        await db.execute(
+            delete(ActivityStreamLevel).where(
+                ActivityStreamLevel.activity_id.in_([r.id for r in rows]),
+                ActivityStreamLevel.stream == "wbal",
+            )
+        )
+        db.add_all(levels)
+        await db.execute(update(Activity), values)
+        await db.commit()
+        updated += len(rows)
+    return updated
+
+
+def _wbal_values(activity_id: uuid.UUID, streams: ActivityStreams, model: dict, levels: list) -> dict[str, Any]:
+    """W′bal columns for one ride (model: cp/w_prime); the new pyramid rows go into `levels`."""
+    wbal = calc_w_prime_balance(streams, "bike", model)
+    if wbal is None:
+        return {"wbal_stream": None, "cp_watts": None, "w_prime_j": None, "min_wbal_pct": None}
+    levels.extend(
+        ActivityStreamLevel(activity_id=activity_id, stream="wbal", **level) for level in build_pyramid(wbal["series"])
+    )
+    return {
+        "wbal_stream": render_stream(wbal["series"], MAX_STREAM_POINTS),
+        "cp_watts": wbal["cp_watts"],
+        "w_prime_j": wbal["w_prime_j"],
+        "min_wbal_pct": wbal["min_wbal_pct"],
+    }
+
+
+async def _load_series(db, ids: list[uuid.UUID], inputs) -> dict[uuid.UUID, dict[str, dict[str, np.ndarray]]]:
+    """
+    Full resolution series ({"t", <valor>} em arrays) per activity.
+
+    Vem da pirâmide de streams (nível FULL_RESOLUTION); atividades anteriores
+    a ela caem no stream JSON legado da própria atividade.
+    """
+    inputs = list(inputs)
+    out: dict[uuid.UUID, dict[str, dict[str, np.ndarray]]] = {}
+
+    result = await db.execute(
+        select(ActivityStreamLevel.activity_id, ActivityStreamLevel.stream, ActivityStreamLevel.data).where(
+            ActivityStreamLevel.activity_id.in_(ids),
+            ActivityStreamLevel.stream.in_([stream for stream, _, _ in inputs]),
+            ActivityStreamLevel.level == FULL_RESOLUTION,
+        )
+    )
+    for activity_id, stream, data in result:
+        out.setdefault(activity_id, {})[stream] = {k: np.asarray(v, dtype=np.float64) for k, v in data.items()}
+
+    for stream, legacy_column, _ in inputs:
+        missing = [i for i in ids if stream not in out.get(i, {})]
+        if not missing:
+            continue
+        result = await db.execute(
+            select(Activity.id, legacy_column).where(Activity.id.in_(missing), legacy_column.is_not(None))
+        )
+        for activity_id, points in result:
+            points = [p for p in points if p.get(stream) is not None and p.get("t") is not None]
+            if points:
+                out.setdefault(activity_id, {})[stream] = {
+                    "t": np.array([p["t"] for p in points], dtype=np.float64),
+                    stream: np.array([p[stream] for p in points], dtype=np.float64),
+                }
+    return out
@@ -0,0 +1,46 @@
+"""
+Compara memória de pico e throughput do parse_fit colunar vs o caminho
+antigo (lista de dicts por record), ambos com o decoder fitparse para que
+só a forma da saída mude entre as duas medições.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_fit_decoder --hours 10
+"""
+import argparse
+import time
+import tracemalloc
+
+from app.services.parsers.fit_parser import parse_fit
+from benchmarks.fit_synth import make_fit
+
+
+def _measure(fn, *args, **kwargs) -> tuple[float, float]:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn(*args, **kwargs)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hours", type=float, default=10.0)
+    args = ap.parse_args()
+
+    seconds = int(args.hours * 3600)
+    data = make_fit(sport="cycling", duration_s=seconds)
+    print(f"arquivo: {len(data) / 1024 / 1024:.1f} MB, {seconds} records")
+
+    for label, columnar in (("dicts (antigo)", False), ("colunar", True)):
+        # tempo sem tracemalloc, memória com
+        t0 = time.perf_counter()
+        parse_fit(data, columnar=columnar, decoder="fitparse")
+        elapsed = time.perf_counter() - t0
+        _, peak_mb = _measure(parse_fit, data, columnar=columnar, decoder="fitparse")
+        print(f"{label:>15}: {elapsed:6.2f}s  {seconds / elapsed:8.0f} records/s  pico {peak_mb:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
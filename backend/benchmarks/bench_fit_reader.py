@@ -0,0 +1,71 @@
+"""
+Valida o leitor FIT enxuto (fit_reader) contra o fitparse num corpus de
+arquivos sintéticos e mede o ganho de throughput.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_fit_reader --hours 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.parsers.fit_parser import _decode_struct, parse_fit
+from benchmarks.fit_synth import make_fit
+
+CORPUS = [
+    dict(sport="cycling", duration_s=1800),
+    dict(sport="cycling", duration_s=1800, dropout_rate=0.05, seed=7),
+    dict(sport="cycling", duration_s=1800, big_endian=True),
+    dict(sport="running", duration_s=2400, with_power=False),
+    dict(sport="running", duration_s=2400, compressed_timestamps=True),
+    dict(sport="running", duration_s=2400, compressed_timestamps=True, big_endian=True, dropout_rate=0.1),
+    dict(sport="swimming", duration_s=1500, with_gps=False, with_power=False),
+    dict(sport="training", duration_s=900, with_gps=False, with_power=False),
+    dict(sport="cycling", duration_s=40, lap_every_s=10),
+]
+
+
+def validate() -> None:
+    for params in CORPUS:
+        data = make_fit(**params)
+        _decode_struct(data)  # garante que não caiu no fallback
+        fast = parse_fit(data, decoder="struct")
+        reference = parse_fit(data, decoder="fitparse")
+        diff = [k for k in reference if k != "streams" and reference[k] != fast.get(k)]
+        ref_series, fast_series = reference["streams"].to_series(), fast["streams"].to_series()
+        diff += [
+            f"streams.{name}"
+            for name, arrays in ref_series.items()
+            if name not in fast_series
+            or any(not np.array_equal(v, fast_series[name][k]) for k, v in arrays.items())
+        ]
+        status = "ok" if not diff else f"DIVERGE em {diff}"
+        print(f"  {params}: {status}")
+        if diff:
+            raise SystemExit(1)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hours", type=float, default=10.0)
+    args = ap.parse_args()
+
+    print("validação struct vs fitparse:")
+    validate()
+
+    seconds = int(args.hours * 3600)
+    data = make_fit(sport="cycling", duration_s=seconds)
+    print(f"\narquivo: {len(data) / 1024 / 1024:.1f} MB, {seconds} records")
+
+    timings = {}
+    for decoder in ("fitparse", "struct"):
+        t0 = time.perf_counter()
+        parse_fit(data, decoder=decoder)
+        timings[decoder] = time.perf_counter() - t0
+        print(f"{decoder:>9}: {timings[decoder]:6.2f}s  {seconds / timings[decoder]:9.0f} records/s")
+    print(f"speedup: {timings['fitparse'] / timings['struct']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
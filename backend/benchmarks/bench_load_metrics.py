@@ -0,0 +1,123 @@
+"""
+Microbenchmark de TSS/IF/TRIMP: laço por atividade com as funções escalares
+antigas (training_metrics) vs batch_load_metrics sobre colunas de N
+atividades sintéticas — a partir de listas Python (como vêm do banco) e de
+arrays já prontos —, com verificação de que os resultados batem.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_load_metrics --n 1000 100000
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from app.services.analytics.load_metrics import batch_load_metrics
+
+THRESHOLDS = {"ftp": 250, "run_threshold_pace": 270.0, "css": 95.0, "hr_max": 188, "hr_rest": 60}
+
+
+# ------------------------------------------------------------
+# Implementação antiga (uma atividade por chamada)
+# ------------------------------------------------------------
+def _old_tss(sport, duration_s, distance_m, avg_hr, np, ngp_s_km, t) -> float:
+    if sport == "bike" and np and t["ftp"]:
+        intensity_factor = np / t["ftp"]
+        return round((duration_s * np * intensity_factor) / (t["ftp"] * 3600) * 100, 1)
+    if sport == "run" and (distance_m or ngp_s_km) and t["run_threshold_pace"]:
+        pace = ngp_s_km or (duration_s / distance_m) * 1000
+        intensity_factor = min(t["run_threshold_pace"] / pace, 1.5)
+        return round((duration_s / 3600) * (intensity_factor**2) * 100, 1)
+    if sport == "swim" and distance_m and t["css"]:
+        pace = (duration_s / distance_m) * 100
+        intensity_factor = min(t["css"] / pace, 1.5)
+        return round((duration_s / 3600) * (intensity_factor**2) * 100, 1)
+    if avg_hr and t["hr_max"]:
+        hr_reserve = max(0, min((avg_hr - 60) / (t["hr_max"] - 60), 1))
+        return round((duration_s / 3600) * hr_reserve * 100 * 0.8, 1)
+    return 0.0
+
+
+def _old_trimp(duration_s, avg_hr, t):
+    if not avg_hr or not t["hr_max"]:
+        return None
+    hr_reserve = max(0, min((avg_hr - t["hr_rest"]) / (t["hr_max"] - t["hr_rest"]), 1))
+    return round((duration_s / 60) * hr_reserve * 0.64 * math.exp(1.92 * hr_reserve), 1)
+
+
+def _old_loop(cols: dict) -> tuple[list, list]:
+    tss, trimp = [], []
+    for sport, dur, dist, hr, np_w, ngp in zip(
+        cols["sport"], cols["duration_s"], cols["distance_m"], cols["avg_hr"], cols["np_watts"], cols["ngp_s_km"]
+    ):
+        tss.append(_old_tss(sport, dur, dist, hr, np_w, ngp, THRESHOLDS))
+        trimp.append(_old_trimp(dur, hr, THRESHOLDS))
+    return tss, trimp
+
+
+# ------------------------------------------------------------
+# Atividades sintéticas
+# ------------------------------------------------------------
+def _activities(n: int, seed: int = 11) -> dict:
+    """Mix of bike/run/swim/strength; ~20% without HR, ~30% of rides without power."""
+    rng = np.random.default_rng(seed)
+    sport = rng.choice(["bike", "run", "swim", "strength"], n, p=[0.4, 0.4, 0.15, 0.05])
+    duration = rng.integers(900, 5 * 3600, n)
+    speed = np.select([sport == "bike", sport == "run", sport == "swim"], [8.5, 3.2, 1.05], 0.0)
+    speed = speed * rng.uniform(0.8, 1.2, n)
+    distance = np.round(duration * speed, 1)
+    avg_hr = np.where(rng.random(n) < 0.8, rng.integers(110, 175, n), 0)
+    np_watts = np.where((sport == "bike") & (rng.random(n) < 0.7), rng.integers(140, 300, n), 0)
+    ngp = np.where(
+        (sport == "run") & (rng.random(n) < 0.5),
+        np.round(1000 / np.maximum(speed, 0.1) * rng.uniform(0.9, 1.0, n), 1),
+        0,
+    )
+
+    def as_list(a):
+        return [None if v == 0 else v for v in a.tolist()]
+
+    return {
+        "sport": sport.tolist(),
+        "duration_s": duration.tolist(),
+        "distance_m": as_list(distance),
+        "avg_hr": as_list(avg_hr),
+        "np_watts": as_list(np_watts),
+        "ngp_s_km": as_list(ngp),
+    }
+
+
+def _best_of(fn, *args, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, nargs="+", default=[1000, 100_000])
+    args = ap.parse_args()
+
+    for n in args.n:
+        cols = _activities(n)
+        t_old, (tss_old, trimp_old) = _best_of(_old_loop, cols)
+        t_new, out = _best_of(lambda: batch_load_metrics(**cols, thresholds=THRESHOLDS))
+        arrays = {k: np.asarray(v, dtype=object if k == "sport" else np.float64) for k, v in cols.items()}
+        t_arr, _ = _best_of(lambda: batch_load_metrics(**arrays, thresholds=THRESHOLDS))
+
+        tss_diff = np.max(np.abs(np.asarray(tss_old) - out["tss"]))
+        trimp_old = np.array([np.nan if v is None else v for v in trimp_old])
+        same_trimp = np.allclose(trimp_old, out["trimp"], atol=0.051, equal_nan=True)
+        print(
+            f"{n:7d} atividades: laço {t_old * 1000:8.1f} ms  lote (listas) {t_new * 1000:7.2f} ms  "
+            f"lote (arrays) {t_arr * 1000:7.2f} ms  {t_old / t_arr:5.0f}x  "
+            f"(máx |ΔTSS| {tss_diff:.2f}, TRIMP {'ok' if same_trimp else 'DIFERENTE'})"
+        )
+
+
+if __name__ == "__main__":
+    main()
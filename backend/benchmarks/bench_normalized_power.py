@@ -0,0 +1,67 @@
+"""
+Microbenchmark do Normalized Power: janela de 30 amostras recriada a cada
+ponto (implementação antiga) vs kernel de soma acumulada, com e sem a
+reamostragem por timestamp.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_normalized_power --hours 1 6 12
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.analytics.kernels import normalized_power
+
+
+def _np_slices(values: list[float]) -> int:
+    """A implementação antiga (fit_parser / training_metrics)."""
+    rolling = []
+    for i in range(len(values) - 29):
+        rolling.append(sum(values[i : i + 30]) / 30)
+    avg_fourth = sum(p**4 for p in rolling) / len(rolling)
+    return int(round(avg_fourth**0.25))
+
+
+def _power_series(seconds: int, seed: int = 7) -> tuple[np.ndarray, np.ndarray]:
+    """1 Hz power with surges, 2% dropped samples and a 5 min stop every hour."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(seconds, dtype=np.float64)
+    power = 200 + 40 * np.sin(t / 300) + rng.normal(0, 15, seconds)
+    power[(t % 600) < 20] += 250
+    keep = (rng.random(seconds) > 0.02) & ((t % 3600) < 3300)
+    return t[keep], np.clip(power[keep], 0, None).round()
+
+
+def _best_of(fn, *args, repeat: int = 3) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hours", type=float, nargs="+", default=[1.0, 6.0, 12.0])
+    args = ap.parse_args()
+
+    for hours in args.hours:
+        t, power = _power_series(int(hours * 3600))
+        values = power.tolist()
+
+        t_old, np_old = _best_of(_np_slices, values)
+        t_idx, np_idx = _best_of(normalized_power, power)
+        t_ts, np_ts = _best_of(normalized_power, power, t)
+        print(
+            f"{hours:5.1f}h ({len(values)} amostras): "
+            f"fatias {t_old * 1000:8.1f} ms (NP {np_old})  "
+            f"cumsum {t_idx * 1000:6.2f} ms (NP {np_idx})  "
+            f"cumsum+1Hz {t_ts * 1000:6.2f} ms (NP {np_ts})  "
+            f"{t_old / t_ts:5.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Microbenchmark do PMC: laço dia a dia (fill_missing_days + calc_pmc antigos)
+vs eixo denso de datas + EWMA vetorizada (kernels.ewma) sobre N anos de
+TSS diário sintético, com verificação de que CTL/ATL batem.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_pmc --years 1 10 30
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.services.analytics.kernels import ewma
+from app.services.analytics.training_metrics import ATL_DAYS, CTL_DAYS, dense_daily
+
+
+# ------------------------------------------------------------
+# Implementação antiga (um dia por iteração)
+# ------------------------------------------------------------
+def _old_pmc(daily: list[dict], start: date, end: date) -> tuple[list, list]:
+    by_date = {d["date"]: d["tss"] for d in daily}
+    ctl = atl = 0.0
+    ctls, atls = [], []
+    current = start
+    while current <= end:
+        tss = by_date.get(current, 0)
+        ctl = ctl + (tss - ctl) / CTL_DAYS
+        atl = atl + (tss - atl) / ATL_DAYS
+        ctls.append(ctl)
+        atls.append(atl)
+        current += timedelta(days=1)
+    return ctls, atls
+
+
+def _new_pmc(daily: list[dict], start: date, end: date) -> tuple[np.ndarray, np.ndarray]:
+    _, tss = dense_daily(daily, start, end)
+    return ewma(tss, CTL_DAYS), ewma(tss, ATL_DAYS)
+
+
+def _history(years: int, seed: int = 5) -> tuple[list[dict], date, date]:
+    """~5 treinos por semana com TSS 30-180 (como sai do GROUP BY por dia)."""
+    rng = np.random.default_rng(seed)
+    end = date(2026, 1, 1)
+    start = end - timedelta(days=365 * years - 1)
+    n = (end - start).days + 1
+    trained = np.flatnonzero(rng.random(n) < 5 / 7)
+    tss = rng.uniform(30, 180, len(trained)).round(1)
+    return [{"date": start + timedelta(days=int(i)), "tss": float(v)} for i, v in zip(trained, tss)], start, end
+
+
+def _best_of(fn, *args, repeat: int = 5):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--years", type=int, nargs="+", default=[1, 10, 30])
+    args = ap.parse_args()
+
+    for years in args.years:
+        daily, start, end = _history(years)
+        t_old, (ctl_old, atl_old) = _best_of(_old_pmc, daily, start, end)
+        t_new, (ctl_new, atl_new) = _best_of(_new_pmc, daily, start, end)
+        diff = max(np.max(np.abs(np.asarray(ctl_old) - ctl_new)), np.max(np.abs(np.asarray(atl_old) - atl_new)))
+        print(
+            f"{years:3d} anos ({len(ctl_old):6d} dias): laço {t_old * 1000:7.2f} ms  "
+            f"vetorizado {t_new * 1000:6.2f} ms  {t_old / t_new:5.1f}x  (máx |Δ| {diff:.1e})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Compara memória de pico e tempo do parse_tcx em streaming (iterparse)
+vs árvore inteira, em arquivos de tamanhos diferentes — no streaming o
+pico deve crescer só com as colunas, não com o XML.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_tcx_parser --hours 2 10
+"""
+import argparse
+import time
+import tracemalloc
+
+from app.services.parsers.tcx_parser import parse_tcx
+from benchmarks.tcx_synth import make_tcx
+
+
+def _peak_mb(fn, *args, **kwargs) -> float:
+    tracemalloc.start()
+    fn(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hours", type=float, nargs="+", default=[2.0, 10.0])
+    args = ap.parse_args()
+
+    for hours in args.hours:
+        seconds = int(hours * 3600)
+        data = make_tcx(sport="Biking", duration_s=seconds)
+        print(f"arquivo: {len(data) / 1024 / 1024:.1f} MB, {seconds} trackpoints")
+
+        for label, streaming in (("árvore", False), ("iterparse", True)):
+            t0 = time.perf_counter()
+            parse_tcx(data, streaming=streaming)
+            elapsed = time.perf_counter() - t0
+            peak_mb = _peak_mb(parse_tcx, data, streaming=streaming)
+            print(f"{label:>12}: {elapsed:6.2f}s  {seconds / elapsed:8.0f} pts/s  pico {peak_mb:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Decodificação de <Time> do TCX: loop de strptime (até 3 formatos por
+ponto, caindo em utcnow()) vs parse_iso8601 vetorizado.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_tcx_timestamps --points 20000
+"""
+import argparse
+import re
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.services.parsers.iso8601 import parse_iso8601
+from benchmarks.tcx_synth import make_tcx
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _strptime_loop(texts: list[str]) -> np.ndarray:
+    """O decoder antigo do tcx_parser, ponto a ponto."""
+    out = np.empty(len(texts))
+    for i, s in enumerate(texts):
+        for fmt in ("%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S"):
+            try:
+                dt = datetime.strptime(s, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            dt = datetime.utcnow()
+        out[i] = (dt - _EPOCH).total_seconds()
+    return out
+
+
+def _best_of(fn, arg, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--points", type=int, default=20000)
+    args = ap.parse_args()
+
+    for style in ("seconds", "millis", "mixed"):
+        data = make_tcx(duration_s=args.points, time_style=style)
+        texts = [m.decode() for m in re.findall(rb"<Time>([^<]*)</Time>", data)]
+
+        old = _strptime_loop(texts)
+        new, invalid = parse_iso8601(texts)
+        t_old = _best_of(_strptime_loop, texts)
+        t_new = _best_of(parse_iso8601, texts)
+
+        mismatches = int((np.abs(old - new) > 1e-3).sum())
+        print(
+            f"{style:>8}: {len(texts)} pts  strptime {t_old * 1000:7.1f} ms  "
+            f"vetorizado {t_new * 1000:6.1f} ms  ({t_old / t_new:4.1f}x)  "
+            f"divergências {mismatches}  inválidos {int(invalid.sum())}"
+        )
+
+
+if __name__ == "__main__":
+    main()
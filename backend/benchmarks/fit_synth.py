@@ -0,0 +1,209 @@
+"""
+Gerador de arquivos .FIT sintéticos para benchmarks e validação dos parsers.
+
+Escreve file_id, device_info, event, records (1Hz), laps e session com o
+mesmo layout que um Garmin grava. Opções cobrem os casos que o decoder
+precisa tratar: big-endian, headers de timestamp comprimido, campos
+inválidos (sensor caindo) e mensagens que devem ser ignoradas.
+"""
+import math
+import random
+import struct
+from datetime import datetime
+
+FIT_EPOCH = datetime(1989, 12, 31)
+
+_CRC_TABLE = (
+    0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
+    0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400,
+)
+
+# base types: (code, struct char, invalid value)
+ENUM = (0x00, "B", 0xFF)
+SINT8 = (0x01, "b", 0x7F)
+UINT8 = (0x02, "B", 0xFF)
+UINT16 = (0x84, "H", 0xFFFF)
+SINT32 = (0x85, "i", 0x7FFFFFFF)
+UINT32 = (0x86, "I", 0xFFFFFFFF)
+UINT32Z = (0x8C, "I", 0)
+
+SPORTS = {"running": 1, "cycling": 2, "swimming": 5, "training": 10}
+
+RECORD_FIELDS = [
+    (253, UINT32),  # timestamp
+    (0, SINT32),  # position_lat
+    (1, SINT32),  # position_long
+    (2, UINT16),  # altitude (scale 5, offset 500)
+    (3, UINT8),  # heart_rate
+    (4, UINT8),  # cadence
+    (5, UINT32),  # distance (scale 100)
+    (6, UINT16),  # speed (scale 1000)
+    (7, UINT16),  # power
+]
+
+LAP_FIELDS = [
+    (253, UINT32), (2, UINT32), (7, UINT32), (8, UINT32), (9, UINT32), (11, UINT16),
+    (13, UINT16), (15, UINT8), (16, UINT8), (17, UINT8), (19, UINT16), (21, UINT16),
+]
+
+SESSION_FIELDS = [
+    (253, UINT32), (2, UINT32), (5, ENUM), (7, UINT32), (8, UINT32), (9, UINT32),
+    (11, UINT16), (14, UINT16), (15, UINT16), (16, UINT8), (17, UINT8), (18, UINT8),
+    (19, UINT8), (20, UINT16), (21, UINT16), (22, UINT16), (23, UINT16), (24, UINT8),
+    (57, SINT8), (58, SINT8), (64, UINT8), (137, UINT8),
+]
+
+
+def fit_crc(data: bytes, crc: int = 0) -> int:
+    for byte in data:
+        tmp = _CRC_TABLE[crc & 0xF]
+        crc = (crc >> 4) & 0x0FFF
+        crc = crc ^ tmp ^ _CRC_TABLE[byte & 0xF]
+        tmp = _CRC_TABLE[crc & 0xF]
+        crc = (crc >> 4) & 0x0FFF
+        crc = crc ^ tmp ^ _CRC_TABLE[(byte >> 4) & 0xF]
+    return crc
+
+
+class _Writer:
+    def __init__(self, big_endian: bool = False):
+        self.big_endian = big_endian
+        self.chunks: list[bytes] = []
+        self.layouts: dict[int, tuple] = {}
+
+    def define(self, local: int, global_num: int, fields: list) -> None:
+        endian = ">" if self.big_endian else "<"
+        body = struct.pack(endian + "BBHB", 0, 1 if self.big_endian else 0, global_num, len(fields))
+        for num, (code, char, _invalid) in fields:
+            body += struct.pack("BBB", num, struct.calcsize(char), code)
+        self.chunks.append(bytes([0x40 | local]) + body)
+        self.layouts[local] = (fields, struct.Struct(endian + "".join(c for _, (_, c, _) in fields)))
+
+    def data(self, local: int, values: list, compressed_offset: int | None = None) -> None:
+        fields, packer = self.layouts[local]
+        packed = [
+            invalid if v is None else v
+            for v, (_, (_, _, invalid)) in zip(values, fields)
+        ]
+        if compressed_offset is None:
+            header = local
+        else:
+            header = 0x80 | (local << 5) | (compressed_offset & 0x1F)
+        self.chunks.append(bytes([header]) + packer.pack(*packed))
+
+    def to_bytes(self) -> bytes:
+        data = b"".join(self.chunks)
+        header = struct.pack("<BBHI4s", 14, 0x20, 2132, len(data), b".FIT")
+        header += struct.pack("<H", fit_crc(header))
+        body = header + data
+        return body + struct.pack("<H", fit_crc(body))
+
+
+def make_fit(
+    sport: str = "cycling",
+    duration_s: int = 3600,
+    start: datetime = datetime(2024, 3, 10, 7, 0, 0),
+    with_power: bool = True,
+    with_gps: bool = True,
+    dropout_rate: float = 0.0,
+    big_endian: bool = False,
+    compressed_timestamps: bool = False,
+    lap_every_s: int = 1200,
+    pool_length_m: int = 25,
+    seed: int = 42,
+) -> bytes:
+    """Build a synthetic activity file with one record per second."""
+    rng = random.Random(seed)
+    w = _Writer(big_endian=big_endian)
+    start_ts = int((start - FIT_EPOCH).total_seconds())
+
+    w.define(0, 0, [(0, ENUM), (1, UINT16), (2, UINT16), (3, UINT32Z), (4, UINT32)])
+    w.data(0, [4, 1, 3121, 123456789, start_ts])
+
+    w.define(1, 23, [(253, UINT32), (0, UINT8), (2, UINT16), (4, UINT16), (5, UINT16)])
+    w.data(1, [start_ts, 0, 1, 3121, 1520])
+
+    # event (global 21) — não usada pelo parser, deve ser pulada
+    w.define(2, 21, [(253, UINT32), (0, ENUM), (1, ENUM)])
+    w.data(2, [start_ts, 0, 0])
+
+    w.define(3, 20, RECORD_FIELDS)
+    if compressed_timestamps:
+        w.define(2, 20, RECORD_FIELDS[1:])  # header comprimido só aceita local 0-3
+
+    lat0, lon0 = -23.55, -46.63
+    distance = 0.0
+    alt = 760.0
+    base_speed = {"cycling": 9.0, "swimming": 1.1}.get(sport, 3.2)
+    hr_list, pw_list, spd_list = [], [], []
+    for i in range(duration_s):
+        ts = start_ts + i
+        speed = max(0.5, base_speed + 1.5 * math.sin(i / 300) + rng.uniform(-0.4, 0.4))
+        if i % 900 < 30:
+            speed *= 1.4  # sprints
+        distance += speed
+        alt += 3 * math.sin(i / 200) * 0.05
+        hr = int(130 + 25 * math.sin(i / 900) + rng.uniform(-3, 3))
+        power = int(200 + 80 * math.sin(i / 120) + rng.uniform(-30, 30)) if with_power else None
+        if with_power and i % 900 < 30:
+            power += 400
+        cad = int(88 + rng.uniform(-5, 5)) if sport == "cycling" else int(85 + rng.uniform(-3, 3))
+        lat = int((lat0 + distance * 1e-6) / (180.0 / 2**31)) if with_gps else None
+        lon = int((lon0 + distance * 5e-7) / (180.0 / 2**31)) if with_gps else None
+        if dropout_rate and rng.random() < dropout_rate:
+            hr = None
+        if dropout_rate and rng.random() < dropout_rate:
+            power = None
+        if power is not None and power < 0:
+            power = 0
+        hr_list.append(hr)
+        pw_list.append(power)
+        spd_list.append(speed)
+        values = [
+            ts, lat, lon, int((alt + 500) * 5), hr, cad,
+            int(distance * 100), int(speed * 1000), power,
+        ]
+        if compressed_timestamps and i % 10:
+            w.data(2, values[1:], compressed_offset=ts)
+        else:
+            w.data(3, values)
+
+    if sport == "swimming":
+        # length (global 101): start_time, total_elapsed_time, total_strokes, avg_speed, length_type
+        w.define(7, 101, [(253, UINT32), (2, UINT32), (3, UINT32), (5, UINT16), (6, UINT16), (12, ENUM)])
+        t = 0
+        while t < duration_s:
+            length_s = int(pool_length_m / base_speed) + rng.randint(0, 4)
+            is_rest = rng.random() < 0.1
+            w.data(7, [
+                start_ts + t + length_s, start_ts + t, length_s * 1000, 0 if is_rest else 18,
+                0 if is_rest else int(pool_length_m / length_s * 1000), 0 if is_rest else 1,
+            ])
+            t += length_s
+
+    w.define(5, 19, LAP_FIELDS)
+    n_laps = max(1, math.ceil(duration_s / lap_every_s))
+    for lap in range(n_laps):
+        a, b = lap * lap_every_s, min(duration_s, (lap + 1) * lap_every_s)
+        lap_hr = [h for h in hr_list[a:b] if h is not None]
+        lap_pw = [p for p in pw_list[a:b] if p is not None]
+        lap_dist = sum(spd_list[a:b])
+        w.data(5, [
+            start_ts + b, start_ts + a, (b - a) * 1000, (b - a) * 1000, int(lap_dist * 100),
+            (b - a) // 6, int(lap_dist / (b - a) * 1000),
+            int(sum(lap_hr) / len(lap_hr)) if lap_hr else None, max(lap_hr) if lap_hr else None,
+            88, int(sum(lap_pw) / len(lap_pw)) if lap_pw else None, 40,
+        ])
+
+    w.define(6, 18, SESSION_FIELDS)
+    valid_hr = [h for h in hr_list if h is not None]
+    valid_pw = [p for p in pw_list if p is not None]
+    w.data(6, [
+        start_ts + duration_s, start_ts, SPORTS.get(sport, 0), duration_s * 1000, duration_s * 1000,
+        int(distance * 100), duration_s // 6, int(distance / duration_s * 1000),
+        int(max(spd_list) * 1000), int(sum(valid_hr) / len(valid_hr)), max(valid_hr), 88, 99,
+        int(sum(valid_pw) / len(valid_pw)) if valid_pw else None, max(valid_pw) if valid_pw else None,
+        420, 415, 32, 24, 29, min(valid_hr), 18,
+    ])
+
+    return w.to_bytes()
@@ -0,0 +1,24 @@
+"""ActivityStreams: limite da base de 1 Hz contra timestamps corrompidos."""
+import numpy as np
+import pytest
+
+from app.services.parsers.streams import MAX_SPAN_S, ActivityStreams
+
+
+def test_from_samples_rejects_span_over_limit():
+    # 3 amostras, uma delas um ano à frente: não pode alocar ~31M linhas
+    t = [0.0, 1.0, 365 * 86400.0]
+    with pytest.raises(ValueError):
+        ActivityStreams.from_samples(t, hr=[120, 121, 122])
+
+
+def test_add_rejects_span_over_limit():
+    streams = ActivityStreams()
+    with pytest.raises(ValueError):
+        streams.add("power", [200, 210], [0.0, MAX_SPAN_S + 1.0])
+
+
+def test_from_samples_accepts_span_at_limit():
+    t = np.array([0.0, MAX_SPAN_S - 1.0])
+    streams = ActivityStreams.from_samples(t, hr=[120, 130])
+    assert len(streams) == MAX_SPAN_S
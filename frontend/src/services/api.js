@@ -46,6 +46,7 @@ export const authApi = {
 export const profileApi = {
   get: () => api.get('/profile'),
   update: (data) => api.put('/profile', data),
+  recomputeStatus: (jobId) => api.get(`/profile/recompute/${jobId}`),
 }
 
 export const activitiesApi = {
@@ -55,16 +56,26 @@ export const activitiesApi = {
   }),
   list: (params) => api.get('/activities', { params }),
   get: (id) => api.get(`/activities/${id}`),
+  streams: (id, params) => api.get(`/activities/${id}/streams`, { params }),
   delete: (id) => api.delete(`/activities/${id}`),
 }
 
 export const plansApi = {
   getRaces: () => api.get('/plans/races'),
   createRace: (data) => api.post('/plans/races', data),
+  optimizeTaper: (raceId, params) => api.get(`/plans/races/${raceId}/taper`, { params }),
   generatePlan: (data) => api.post('/plans/generate', data),
   generateWeekSessions: (weekId) => api.post(`/plans/weeks/${weekId}/generate`),
   getCurrentWeek: () => api.get('/plans/current-week'),
   analyzeWeek: (weekId) => api.post(`/plans/weeks/${weekId}/analyze`),
 }
 
+export const metricsApi = {
+  powerCurve: (params) => api.get('/metrics/power-curve', { params }),
+  criticalPower: (params) => api.get('/metrics/critical-power', { params }),
+  paceRecords: (params) => api.get('/metrics/pace-records', { params }),
+  pmc: (params) => api.get('/metrics/pmc', { params }),
+  loadRisk: (params) => api.get('/metrics/load-risk', { params }),
+}
+
 export default api